@@ -0,0 +1,77 @@
+from OpenGL.GL import GL_COLOR_BUFFER_BIT, glClear, glFinish, glViewport
+from PyQt6.QtGui import QOffscreenSurface, QOpenGLContext, QSurfaceFormat
+from PyQt6.QtOpenGL import QOpenGLFramebufferObject
+from PyQt6.QtWidgets import QApplication
+
+from algebraics.benchmark.suite import BenchmarkSkipped, Run
+from algebraics.polynomial.generation import enumerate_shards, generate_roots
+from algebraics.ui.circle import COLORS, generate_circles
+from algebraics.ui.gl_widget import GLWidget
+
+FRAME_WIDTH = 1024
+FRAME_HEIGHT = 1024
+
+
+def offscreen_context() -> tuple[QOpenGLContext, QOffscreenSurface]:
+    """
+    Makes a compatibility profile context current on an offscreen surface, the kind
+    of context QOpenGLWidget gives GLWidget
+    """
+    surface_format = QSurfaceFormat()
+    surface_format.setVersion(2, 1)
+    surface_format.setProfile(QSurfaceFormat.OpenGLContextProfile.CompatibilityProfile)
+
+    context = QOpenGLContext()
+    context.setFormat(surface_format)
+    if not context.create():
+        raise BenchmarkSkipped("no OpenGL context is available on this platform")
+
+    surface = QOffscreenSurface()
+    surface.setFormat(context.format())
+    surface.create()
+    if not context.makeCurrent(surface):
+        raise BenchmarkSkipped("the OpenGL context can't be made current")
+    return context, surface
+
+
+def load_widget(widget: GLWidget, max_length: int, max_degree: int):
+    """
+    Replaces the circles of widget with those of the given parameters, generated
+    synchronously and without the root cache rather than by its background worker.
+    Holding shards keeps the widget from starting a generation of its own later.
+    """
+    widget.cancel_generation()
+    widget.wait_for_workers()
+    widget.shards = set(enumerate_shards(max_length, max_degree))
+    widget.circles.retain(set())
+    for shard, roots in generate_roots(max_length, max_degree):
+        widget.circles.add(shard, generate_circles(shard, roots))
+    widget.colors_by_degree = {k: v for k, v in COLORS.items() if k <= max_degree}
+    widget.max_length, widget.max_degree = max_length, max_degree
+
+
+def frame_run(max_length: int, max_degree: int) -> Run:
+    """
+    Draws one frame of GLWidget.paintGL per run into a framebuffer object, waiting
+    for the GPU to finish it
+    """
+    application = QApplication.instance() or QApplication([])
+    context, surface = offscreen_context()
+    framebuffer = QOpenGLFramebufferObject(FRAME_WIDTH, FRAME_HEIGHT)
+    framebuffer.bind()
+
+    widget = GLWidget()
+    widget.resize(FRAME_WIDTH, FRAME_HEIGHT)
+    load_widget(widget, max_length, max_degree)
+    glViewport(0, 0, FRAME_WIDTH, FRAME_HEIGHT)
+    widget.initializeGL()
+
+    def run():
+        glClear(GL_COLOR_BUFFER_BIT)
+        widget.paintGL()
+        glFinish()
+        # Keep the Qt objects alive for as long as the run is
+        _ = application, context, surface, framebuffer
+        return len(widget.circles), {"instanced": widget.renderer is not None}
+
+    return run
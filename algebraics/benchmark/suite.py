@@ -0,0 +1,501 @@
+import gc
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Generator, Optional
+
+import numpy as np
+from pydantic import BaseModel
+
+from algebraics.config import settings
+from algebraics.polynomial.batch import find_roots_batch
+from algebraics.polynomial.cache import solver_fingerprint
+from algebraics.polynomial.enumeration import coefficient_block, enumerate_rows
+from algebraics.polynomial.generation import (
+    enumerate_shards,
+    generate_roots,
+    shard_coefficients,
+    solve_shard,
+)
+from algebraics.polynomial.models import ComplexPolynomial, SolverStatistics
+from algebraics.polynomial.partition import enumerate_partitions
+from algebraics.polynomial.polynomial import enumerate_polynomials, find_roots
+from algebraics.polynomial.ranking import polynomial_ranks
+from algebraics.ui.circle import generate_circles
+from algebraics.ui.spatial import build_point_index
+from algebraics.ui.store import CircleStore
+
+# Number of polynomials of every degree timed with find_roots
+FIND_ROOTS_SAMPLE = 200
+
+# The application measured by the startup case, which starts with a length and
+# degree of 5 whatever the sizes of the suite
+APPLICATION = Path(__file__).resolve().parents[2] / "app.py"
+STARTUP_SIZE = (5, 5)
+
+# Seconds the application is given to draw its first circles
+STARTUP_TIMEOUT = 60.0
+
+# Points around the unit circle looked up by the nearest_roots case, and the distance
+# they are looked up within, about 8 pixels of a 1000 pixel wide view
+NEAREST_QUERIES = 1000
+NEAREST_DISTANCE = 0.016
+
+# PRECISION and POLISH settings compared by the solve_precision cases
+PRECISIONS = {
+    "double": ("double", False),
+    "single": ("single", False),
+    "single+polish": ("single", True),
+}
+
+# A run returns the number of items it processed and any details worth reporting
+Run = Callable[[], tuple[int, dict[str, Any]]]
+
+
+class BenchmarkSkipped(Exception):
+    pass
+
+
+class Measurement(BaseModel):
+    name: str
+    max_length: int
+    max_degree: int
+    repeat: int = 0
+    seconds: float = 0.0  # median over the repeats
+    min_seconds: float = 0.0
+    items: int = 0
+    throughput: float = 0.0  # items per second at the median
+    peak_bytes: int = 0
+    details: dict[str, Any] = {}
+    skipped: Optional[str] = None
+
+
+class Report(BaseModel):
+    metadata: dict[str, Any]
+    measurements: list[Measurement]
+
+    def save(self, path: str | Path):
+        Path(path).write_text(self.model_dump_json(indent=2))
+
+    @classmethod
+    def load(cls, path: str | Path) -> "Report":
+        return cls.model_validate_json(Path(path).read_text())
+
+
+class Regression(BaseModel):
+    name: str
+    max_length: int
+    max_degree: int
+    metric: str
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline
+
+
+def enumerate_partitions_case(max_length: int, max_degree: int) -> Run:
+    def run():
+        count = sum(
+            1
+            for n in range(1, max_length + 1)
+            for parts in range(1, max_degree + 2)
+            for _ in enumerate_partitions(n, parts)
+        )
+        return count, {}
+
+    return run
+
+
+def enumerate_polynomials_case(max_length: int, max_degree: int) -> Run:
+    def run():
+        return sum(1 for _ in enumerate_polynomials(max_length, max_degree)), {}
+
+    return run
+
+
+def enumerate_rows_case(max_length: int, max_degree: int) -> Run:
+    def run():
+        return sum(1 for _ in enumerate_rows(max_length, max_degree)), {}
+
+    return run
+
+
+def coefficient_blocks_case(max_length: int, max_degree: int) -> Run:
+    def run():
+        shards = enumerate_shards(max_length, max_degree)
+        return sum(shard_coefficients(shard).shape[0] for shard in shards), {}
+
+    return run
+
+
+def find_roots_case(max_length: int, degree: int) -> Run:
+    """
+    find_roots on a fixed sample of the polynomials of the given degree
+    """
+    coefficients = coefficient_block(max_length, degree)
+    rows = random.Random(degree).sample(
+        range(coefficients.shape[0]), min(FIND_ROOTS_SAMPLE, coefficients.shape[0])
+    )
+    sample = [coefficients[row].tolist() for row in rows]
+
+    def run():
+        rng = random.Random(0)
+        solved = sum(
+            find_roots(
+                ComplexPolynomial(coefficients=polynomial, length=max_length), rng
+            )
+            is not None
+            for polynomial in sample
+        )
+        return len(sample), {"solved": solved}
+
+    return run
+
+
+def solve_shards_case(max_length: int, max_degree: int) -> Run:
+    """
+    Solves every shard in-process and without the root cache, reporting the work of
+    the solvers
+    """
+
+    def run():
+        solver_statistics = SolverStatistics()
+        count = 0
+        for shard in enumerate_shards(max_length, max_degree):
+            count += solve_shard(shard, solver_statistics).shape[0]
+        return count, solver_statistics.model_dump()
+
+    return run
+
+
+@contextmanager
+def precision_settings(precision: str) -> Generator[None]:
+    section = settings.POLYNOMIAL
+    previous = section.PRECISION, section.POLISH
+    section.PRECISION, section.POLISH = PRECISIONS[precision]
+    try:
+        yield
+    finally:
+        section.PRECISION, section.POLISH = previous
+
+
+def newton_errors(coefficients: np.ndarray, roots: np.ndarray) -> np.ndarray:
+    """
+    Estimates the distance of every root to the exact root by the size of a Newton
+    step |p(z) / p'(z)| taken in complex128
+    """
+    coefficients = coefficients.astype(np.complex128)
+    z = roots.astype(np.complex128)
+    degree = coefficients.shape[1] - 1
+    value = np.repeat(coefficients[:, degree, None], z.shape[1], axis=1)
+    derivative = np.zeros_like(z)
+    for n in range(degree - 1, -1, -1):
+        derivative = derivative * z + value
+        value = value * z + coefficients[:, n, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.abs(value / derivative)
+
+
+def solve_precision_case(max_length: int, max_degree: int, precision: str) -> Run:
+    """
+    find_roots_batch on every shard in one of PRECISIONS, reporting the bytes of the
+    roots and the error of the roots of the converged rows. Repeated roots have no
+    finite error estimate and are left out of it.
+    """
+    blocks = [
+        coefficients
+        for shard in enumerate_shards(max_length, max_degree)
+        if (coefficients := shard_coefficients(shard)).shape[0]
+    ]
+    errors: dict[str, Any] = {}
+
+    def run():
+        with precision_settings(precision):
+            results = [find_roots_batch(coefficients) for coefficients in blocks]
+        if not errors:
+            # Measured once rather than in the timed runs
+            estimates = np.concatenate(
+                [
+                    newton_errors(coefficients[converged], roots[converged]).ravel()
+                    for coefficients, (roots, converged) in zip(blocks, results)
+                ]
+            )
+            estimates = estimates[np.isfinite(estimates)]
+            errors.update(
+                median_error=float(np.median(estimates)),
+                p99_error=float(np.percentile(estimates, 99)),
+                converged=sum(int(converged.sum()) for _, converged in results),
+            )
+        root_bytes = sum(roots.nbytes for roots, _ in results)
+        return sum(len(coefficients) for coefficients in blocks), {
+            "root_bytes": root_bytes,
+            **errors,
+        }
+
+    return run
+
+
+def generate_circles_case(max_length: int, max_degree: int) -> Run:
+    roots_by_shard = list(generate_roots(max_length, max_degree))
+
+    def run():
+        batches = [generate_circles(shard, roots) for shard, roots in roots_by_shard]
+        return sum(len(batch) for batch in batches), {}
+
+    return run
+
+
+def nearest_roots_case(max_length: int, max_degree: int) -> Run:
+    """
+    Looks up the roots nearest to points around the unit circle, where most roots
+    are, in a CircleStore holding every shard and their PointIndex, like hovering
+    over the view does once a generation is done
+    """
+    store = CircleStore()
+    for shard, roots in generate_roots(max_length, max_degree):
+        store.add(shard, generate_circles(shard, roots, polynomial_ranks(shard, roots)))
+    started = time.perf_counter()
+    store.set_point_index(
+        build_point_index(
+            dict(store.items()),
+            settings.RENDERING.GRID_CELLS,
+            settings.INSPECTION.POINTS_PER_CELL,
+        )
+    )
+    index_seconds = time.perf_counter() - started
+    rng = np.random.default_rng(0)
+    angles = rng.uniform(0, 2 * np.pi, NEAREST_QUERIES)
+    magnitudes = rng.uniform(0.5, 1.5, NEAREST_QUERIES)
+    points = list(zip(magnitudes * np.cos(angles), magnitudes * np.sin(angles)))
+
+    def run():
+        found, slowest = 0, 0.0
+        for x, y in points:
+            started = time.perf_counter()
+            found += len(
+                store.nearest(x, y, NEAREST_DISTANCE, settings.INSPECTION.ROOTS)
+            )
+            slowest = max(slowest, time.perf_counter() - started)
+        return len(points), {
+            "circles": len(store),
+            "shards": len(store.batches),
+            "found": found,
+            "index_seconds": index_seconds,
+            "max_query_seconds": slowest,
+        }
+
+    return run
+
+
+def paint_gl_case(max_length: int, max_degree: int) -> Run:
+    # Qt and OpenGL are only needed for this case
+    from algebraics.benchmark.frames import frame_run
+
+    return frame_run(max_length, max_degree)
+
+
+def startup_case() -> Run:
+    """
+    Launches the application until it drew its first circles, timed from launch to
+    exit, with the times to the window, the first frame and the first circles it
+    measured itself as details
+    """
+    # Qt is only needed for this case
+    from algebraics.ui.startup import StartupTimes
+
+    def launch() -> StartupTimes:
+        with tempfile.TemporaryDirectory() as directory:
+            output = Path(directory) / "startup.json"
+            subprocess.run(
+                [
+                    sys.executable,
+                    str(APPLICATION),
+                    "--measure-startup",
+                    str(output),
+                    "--startup-timeout",
+                    str(STARTUP_TIMEOUT),
+                ],
+                check=True,
+                capture_output=True,
+                # Every launch starts from an empty root cache of its own
+                env={**os.environ, "DYNACONF_CACHE__DIRECTORY": directory},
+            )
+            return StartupTimes.model_validate_json(output.read_text())
+
+    if launch().first_circles is None:
+        raise BenchmarkSkipped("the application drew no circles, OpenGL is missing")
+
+    def run():
+        return 1, launch().model_dump()
+
+    return run
+
+
+def measure(
+    name: str, max_length: int, max_degree: int, setup: Callable[[], Run], repeat: int
+) -> Measurement:
+    """
+    Times repeat runs after a warm-up run, then measures the peak of the memory
+    allocated by one more run with tracemalloc, which would skew the timings
+    """
+    measurement = Measurement(name=name, max_length=max_length, max_degree=max_degree)
+    try:
+        run = setup()
+    except BenchmarkSkipped as error:
+        measurement.skipped = str(error)
+        return measurement
+
+    run()
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        items, details = run()
+        timings.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    measurement.repeat = repeat
+    measurement.seconds = statistics.median(timings)
+    measurement.min_seconds = min(timings)
+    measurement.items = items
+    measurement.throughput = items / max(measurement.seconds, 1e-12)
+    measurement.peak_bytes = peak_bytes
+    measurement.details = details
+    return measurement
+
+
+def cases(max_length: int, max_degree: int) -> list[tuple[str, Callable[[], Run]]]:
+    size = (max_length, max_degree)
+    return [
+        ("enumerate_partitions", partial(enumerate_partitions_case, *size)),
+        ("enumerate_polynomials", partial(enumerate_polynomials_case, *size)),
+        ("enumerate_rows", partial(enumerate_rows_case, *size)),
+        ("coefficient_blocks", partial(coefficient_blocks_case, *size)),
+        *[
+            (
+                f"find_roots[degree={degree}]",
+                partial(find_roots_case, max_length, degree),
+            )
+            for degree in range(2, max_degree + 1)
+        ],
+        ("solve_shards", partial(solve_shards_case, *size)),
+        *[
+            (
+                f"solve_precision[{precision}]",
+                partial(solve_precision_case, *size, precision),
+            )
+            for precision in PRECISIONS
+        ],
+        ("generate_circles", partial(generate_circles_case, *size)),
+        ("nearest_roots", partial(nearest_roots_case, *size)),
+        ("paint_gl", partial(paint_gl_case, *size)),
+    ]
+
+
+def metadata() -> dict[str, Any]:
+    return {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "solver": solver_fingerprint(),
+    }
+
+
+def run_suite(
+    sizes: list[tuple[int, int]],
+    repeat: int = 5,
+    only: Optional[list[str]] = None,
+    progress: Callable[[Measurement], None] = lambda _: None,
+) -> Report:
+    """
+    Measures every case at every (max_length, max_degree) size, then the startup of
+    the application once. only restricts the cases to those whose name starts with
+    one of its entries.
+    """
+
+    def selected(name: str) -> bool:
+        return not only or any(name.startswith(prefix) for prefix in only)
+
+    measurements = []
+    for max_length, max_degree in sizes:
+        for name, setup in cases(max_length, max_degree):
+            if selected(name):
+                measurement = measure(name, max_length, max_degree, setup, repeat)
+                progress(measurement)
+                measurements.append(measurement)
+
+    if selected("startup"):
+        measurement = measure("startup", *STARTUP_SIZE, startup_case, repeat)
+        progress(measurement)
+        measurements.append(measurement)
+    return Report(metadata=metadata(), measurements=measurements)
+
+
+def compare(
+    report: Report,
+    baseline: Report,
+    threshold: float = 0.2,
+    noise_seconds: float = 1e-3,
+    noise_bytes: int = 2**20,
+) -> list[Regression]:
+    """
+    Flags the measurements that are more than threshold (relative) slower, or that
+    allocate more than threshold more memory, than the same measurement of
+    baseline. Differences below noise_seconds and noise_bytes are ignored.
+    """
+    previous = {
+        (m.name, m.max_length, m.max_degree): m
+        for m in baseline.measurements
+        if m.skipped is None
+    }
+    regressions = []
+    for current in report.measurements:
+        before = previous.get((current.name, current.max_length, current.max_degree))
+        if current.skipped is not None or before is None:
+            continue
+        slower = current.seconds - before.seconds > noise_seconds
+        if slower and current.seconds > before.seconds * (1 + threshold):
+            regressions.append(
+                Regression(
+                    name=current.name,
+                    max_length=current.max_length,
+                    max_degree=current.max_degree,
+                    metric="seconds",
+                    baseline=before.seconds,
+                    current=current.seconds,
+                )
+            )
+        larger = current.peak_bytes - before.peak_bytes > noise_bytes
+        if larger and current.peak_bytes > before.peak_bytes * (1 + threshold):
+            regressions.append(
+                Regression(
+                    name=current.name,
+                    max_length=current.max_length,
+                    max_degree=current.max_degree,
+                    metric="peak_bytes",
+                    baseline=before.peak_bytes,
+                    current=current.peak_bytes,
+                )
+            )
+    return regressions
@@ -0,0 +1,13 @@
+from pathlib import Path
+
+from dynaconf import Dynaconf
+
+# The one settings object of the application. Files are looked up next to the
+# algebraics package rather than in the working directory, which also finds them in
+# the PyInstaller bundle. Export DYNACONF_SECTION__KEY=value to override a key.
+settings = Dynaconf(
+    envvar_prefix="DYNACONF",
+    root_path=Path(__file__).resolve().parent.parent,
+    settings_files=["settings.toml", ".secrets.toml"],
+    environments=False,
+)
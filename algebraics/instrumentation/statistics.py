@@ -0,0 +1,126 @@
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import ContextManager, Generator, Optional
+
+from pydantic import BaseModel, Field, computed_field
+
+from algebraics.polynomial.models import SolverStatistics
+
+# Stages of the pipeline, in the order a generation goes through them
+STAGES = ("count", "enumerate", "solve", "cache", "circles")
+
+
+class StageTimer(BaseModel):
+    calls: int = 0
+    seconds: float = 0.0  # wall time, summed over calls
+
+
+class PipelineStatistics(BaseModel):
+    """
+    Wall time spent in every stage of the pipeline and counts of the work done by a
+    generation and the frames drawn since. Functions that are given one record into
+    it and skip all bookkeeping when they are given None.
+    Shards solved by worker processes are timed in the workers, so the enumerate and
+    solve stages sum the time of all processes and can exceed the wall time.
+    """
+
+    stages: dict[str, StageTimer] = Field(
+        default_factory=lambda: {stage: StageTimer() for stage in STAGES}
+    )
+    polynomials: int = 0  # enumerated by the shards that were solved
+    shards_solved: int = 0
+    shards_cached: int = 0
+    root_sets: int = 0
+    circles: int = 0  # generated
+    solver: SolverStatistics = Field(default_factory=SolverStatistics)
+    frames: int = 0
+    frame_seconds: float = 0.0  # summed over frames
+    last_frame_seconds: float = 0.0
+    circles_drawn: int = 0  # by the last frame
+
+    @computed_field  # type: ignore
+    @property
+    def mean_frame_seconds(self) -> float:
+        return self.frame_seconds / max(self.frames, 1)
+
+    @contextmanager
+    def stage(self, name: str) -> Generator[None]:
+        timer = self.stages[name]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            timer.calls += 1
+            timer.seconds += time.perf_counter() - start
+
+    def record_frame(self, seconds: float, circles_drawn: int):
+        self.frames += 1
+        self.frame_seconds += seconds
+        self.last_frame_seconds = seconds
+        self.circles_drawn = circles_drawn
+
+    def add(self, other: "PipelineStatistics"):
+        """
+        Adds the stage timers and generation counters of other, typically recorded
+        by a worker process
+        """
+        for name, timer in other.stages.items():
+            self.stages[name].calls += timer.calls
+            self.stages[name].seconds += timer.seconds
+        self.polynomials += other.polynomials
+        self.shards_solved += other.shards_solved
+        self.shards_cached += other.shards_cached
+        self.root_sets += other.root_sets
+        self.circles += other.circles
+        self.solver.add(other.solver)
+
+    def replace_generation(self, other: "PipelineStatistics"):
+        """
+        Replaces the stage timers and generation counters with those of other,
+        keeping the frames, typically with a copy of what a generation recorded so
+        far in another thread
+        """
+        self.stages = other.stages
+        self.polynomials = other.polynomials
+        self.shards_solved = other.shards_solved
+        self.shards_cached = other.shards_cached
+        self.root_sets = other.root_sets
+        self.circles = other.circles
+        self.solver = other.solver
+
+    def save(self, path: str | Path):
+        Path(path).write_text(self.model_dump_json(indent=2))
+
+
+def stage(statistics: Optional[PipelineStatistics], name: str) -> ContextManager:
+    """
+    statistics.stage(name), or a context that does nothing without statistics
+    """
+    return nullcontext() if statistics is None else statistics.stage(name)
+
+
+def format_statistics(statistics: PipelineStatistics) -> str:
+    """
+    A few lines summing up statistics for the status panel
+    """
+    solver = statistics.solver
+    lines = [
+        f"{name:<12} {timer.seconds:.3f} s, {timer.calls:,} calls"
+        for name, timer in statistics.stages.items()
+        if timer.calls
+    ]
+    lines += [
+        f"polynomials  {statistics.polynomials:,}",
+        f"shards       {statistics.shards_solved:,} solved, "
+        f"{statistics.shards_cached:,} cached",
+        f"root sets    {statistics.root_sets:,}, {solver.dropped:,} dropped",
+        f"iterations   {solver.iterations_per_row:.1f} per polynomial",
+        f"fallbacks    {solver.fallbacks:,}, {solver.newton_iterations:,} Newton "
+        f"iterations, {solver.newton_restarts:,} restarts",
+        f"circles      {statistics.circles:,}, {statistics.circles_drawn:,} drawn",
+        f"frames       {statistics.frames:,}, "
+        f"{statistics.last_frame_seconds * 1000:.1f} ms last, "
+        f"{statistics.mean_frame_seconds * 1000:.1f} ms mean",
+    ]
+    return "\n".join(lines)
@@ -0,0 +1,414 @@
+import math
+import random
+from collections import defaultdict
+from typing import Generator, Iterable, Optional
+
+import numpy as np
+
+from algebraics.config import settings
+from algebraics.polynomial.models import ComplexPolynomial, RootSet, SolverStatistics
+from algebraics.polynomial.polynomial import find_roots
+from algebraics.polynomial.reduction import square_free_decomposition, trailing_zeros
+
+# Bump whenever a change to the solvers changes the roots they produce, this
+# invalidates the on-disk root cache
+SOLVER_VERSION = 2
+
+# Converged rows with two roots closer than this are checked for repeated factors
+CLUSTER_DISTANCE = 1e-4
+
+
+def solver_dtype() -> np.dtype:
+    """
+    The dtype find_roots_batch iterates in, complex64 with a PRECISION of "single"
+    """
+    if settings.POLYNOMIAL.PRECISION == "single":
+        return np.dtype(np.complex64)
+    return np.dtype(np.complex128)
+
+
+def root_dtype() -> np.dtype:
+    """
+    The dtype of the roots the solvers return and the root cache stores: the solver
+    dtype, or complex128 when single precision roots are polished
+    """
+    if settings.POLYNOMIAL.POLISH:
+        return np.dtype(np.complex128)
+    return solver_dtype()
+
+
+def initial_guesses(coefficients: np.ndarray) -> np.ndarray:
+    """
+    Spread the starting points of every row on a circle whose radius is the geometric
+    mean of the root magnitudes, |a_0 / a_n|^(1/n). The angular offset breaks the
+    symmetry that would otherwise stall the iteration on real polynomials.
+    """
+    rows, degree = coefficients.shape[0], coefficients.shape[1] - 1
+    radius = np.abs(coefficients[:, 0] / coefficients[:, -1]) ** (1 / degree)
+    radius = np.clip(radius, 0.5, 2.0)
+    angles = 2 * np.pi * np.arange(degree) / degree + 0.4
+    return radius[:, None] * np.exp(1j * angles)[None, :] * np.ones((rows, 1))
+
+
+def aberth_iteration(
+    coefficients: np.ndarray,
+    roots: np.ndarray,
+    statistics: Optional[SolverStatistics] = None,
+    tolerance: Optional[float] = None,
+) -> np.ndarray:
+    """
+    Refines the approximations in roots in place and returns the per-row convergence
+    flags. Rows are dropped from the iteration as soon as they converge or produce a
+    non-finite correction, so the cost of each step shrinks with the active set.
+    The iteration runs in the dtype of roots, which coefficients should share, and
+    stops once the squared step is below tolerance, BATCH_TOLERANCE by default.
+    """
+    rows, degree = roots.shape
+    converged = np.zeros(rows, dtype=bool)
+    active = np.arange(rows)
+    off_diagonal = ~np.eye(degree, dtype=bool)
+    if tolerance is None:
+        tolerance = settings.POLYNOMIAL.BATCH_TOLERANCE
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        for _ in range(settings.POLYNOMIAL.MAX_BATCH_ITERATIONS):
+            if active.size == 0:
+                break
+            if statistics is not None:
+                statistics.iterations += active.size
+
+            z = roots[active]
+            a = coefficients[active]
+
+            # Horner's scheme for p(z) and p'(z), vectorized over rows and roots
+            value = np.repeat(a[:, degree, None], degree, axis=1)
+            derivative = np.zeros_like(z)
+            for n in range(degree - 1, -1, -1):
+                derivative = derivative * z + value
+                value = value * z + a[:, n, None]
+
+            differences = z[:, :, None] - z[:, None, :]
+            repulsion = np.sum(np.where(off_diagonal, 1 / differences, 0), axis=2)
+            correction = value / (derivative - value * repulsion)
+            correction = np.where(value == 0, 0, correction)
+
+            finite = np.isfinite(correction).all(axis=1)
+            roots[active[finite]] = z[finite] - correction[finite]
+
+            step = np.max(np.abs(correction), axis=1) ** 2
+            done = finite & (step <= tolerance)
+            converged[active[done]] = True
+            active = active[finite & ~done]
+
+    return converged
+
+
+def find_roots_batch(
+    coefficients: np.ndarray,
+    statistics: Optional[SolverStatistics] = None,
+    seeds: Optional[np.ndarray] = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    find_roots_batch takes an (N, degree + 1) array where every row holds the
+    coefficients a_0, a_1, ..., a_n of one polynomial of the same degree, and finds
+    all roots of all rows at once with Aberth-Ehrlich simultaneous iteration,
+    starting from seeds when given and from initial_guesses otherwise.
+
+    Returns an (N, degree) array of roots and an (N,) array of booleans flagging the
+    rows whose iteration converged. Rows that did not converge (typically those with
+    repeated roots) should be handed to find_roots individually.
+
+    With a PRECISION of "single" the iteration runs in complex64 down to
+    SINGLE_TOLERANCE, and with POLISH the converged roots are then refined in
+    complex128 down to BATCH_TOLERANCE. Roots are returned as root_dtype().
+    """
+    dtype = solver_dtype()
+    coefficients = np.asarray(coefficients, dtype=np.complex128)
+    degree = coefficients.shape[1] - 1
+    if statistics is not None:
+        statistics.rows += coefficients.shape[0]
+
+    if degree == 1:
+        roots = (-coefficients[:, 0] / coefficients[:, 1])[:, None]
+        return roots.astype(root_dtype()), np.isfinite(roots).all(axis=1)
+
+    if statistics is not None:
+        if seeds is None:
+            statistics.cold_starts += coefficients.shape[0]
+        else:
+            statistics.warm_starts += coefficients.shape[0]
+    roots = initial_guesses(coefficients) if seeds is None else np.array(seeds)
+    roots = roots.astype(dtype)
+    converged = np.zeros(coefficients.shape[0], dtype=bool)
+    single = dtype != np.complex128
+    iterated = coefficients.astype(dtype)
+    tolerance = settings.POLYNOMIAL.SINGLE_TOLERANCE if single else None
+
+    # Chunking bounds the (rows, degree, degree) temporaries of the iteration
+    chunk_size = settings.POLYNOMIAL.BATCH_CHUNK_SIZE
+    for start in range(0, coefficients.shape[0], chunk_size):
+        chunk = slice(start, start + chunk_size)
+        converged[chunk] = aberth_iteration(
+            iterated[chunk], roots[chunk], statistics, tolerance
+        )
+
+    if single and settings.POLYNOMIAL.POLISH:
+        roots = polish_roots(coefficients, roots, converged, statistics)
+    return roots, converged
+
+
+def polish_roots(
+    coefficients: np.ndarray,
+    roots: np.ndarray,
+    converged: np.ndarray,
+    statistics: Optional[SolverStatistics] = None,
+) -> np.ndarray:
+    """
+    Refines the converged rows of single precision roots in complex128 down to
+    BATCH_TOLERANCE, which takes a step or two from roots that are already close.
+    Rows the refinement loses keep their single precision roots.
+    """
+    polished = roots.astype(np.complex128)
+    rows = np.flatnonzero(converged)
+    chunk_size = settings.POLYNOMIAL.BATCH_CHUNK_SIZE
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start : start + chunk_size]
+        refined = polished[chunk]
+        done = aberth_iteration(coefficients[chunk], refined, statistics)
+        polished[chunk[done]] = refined[done]
+    return polished
+
+
+def find_roots_continuation(
+    coefficients: np.ndarray, statistics: Optional[SolverStatistics] = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Warm-started counterpart of find_roots_batch. The rows are sorted so that
+    neighbours share as many coefficients as possible, starting from a_0, and the
+    sorted rows are cut into WARM_START_LANES lanes that are solved in lockstep: step
+    t solves the t-th row of every lane starting from the roots its lane found at
+    step t - 1. Rows whose neighbour didn't converge start from initial_guesses, and
+    warm-started rows that don't converge are started again from there.
+    """
+    coefficients = np.asarray(coefficients)
+    rows, degree = coefficients.shape[0], coefficients.shape[1] - 1
+    if degree == 1 or rows == 0:
+        return find_roots_batch(coefficients, statistics)
+
+    lanes = min(settings.POLYNOMIAL.WARM_START_LANES, rows)
+    steps = math.ceil(rows / lanes)
+    grid = np.full(lanes * steps, -1)
+    grid[:rows] = np.lexsort(coefficients.real.T[::-1])
+    grid = grid.reshape(lanes, steps)
+
+    roots = np.zeros((rows, degree), dtype=root_dtype())
+    converged = np.zeros(rows, dtype=bool)
+    warm_started = np.zeros(rows, dtype=bool)
+    for step in range(steps):
+        current = grid[:, step]
+        members = current[current >= 0]
+        if step > 0:
+            neighbours = grid[current >= 0, step - 1]
+            warm = converged[neighbours]
+            warm_started[members[warm]] = True
+            roots[members[warm]], converged[members[warm]] = find_roots_batch(
+                coefficients[members[warm]], statistics, roots[neighbours[warm]]
+            )
+            members = members[~warm]
+        roots[members], converged[members] = find_roots_batch(
+            coefficients[members], statistics
+        )
+
+    restart = np.flatnonzero(warm_started & ~converged)
+    roots[restart], converged[restart] = find_roots_batch(
+        coefficients[restart], statistics
+    )
+    if statistics is not None:
+        statistics.restarts += restart.size
+        # Restarted rows were already counted when they were warm-started
+        statistics.rows -= restart.size
+    return roots, converged
+
+
+def solve_batch(
+    coefficients: np.ndarray, statistics: Optional[SolverStatistics] = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    find_roots_continuation with WARM_START, find_roots_batch otherwise
+    """
+    if settings.POLYNOMIAL.WARM_START:
+        return find_roots_continuation(coefficients, statistics)
+    return find_roots_batch(coefficients, statistics)
+
+
+def clustered(roots: np.ndarray) -> np.ndarray:
+    """
+    Flags the rows of an (N, degree) array of roots with two roots closer than
+    CLUSTER_DISTANCE
+    """
+    flags = np.zeros(roots.shape[0], dtype=bool)
+    if roots.shape[1] < 2:
+        return flags
+    off_diagonal = ~np.eye(roots.shape[1], dtype=bool)
+    chunk_size = settings.POLYNOMIAL.BATCH_CHUNK_SIZE
+    for start in range(0, roots.shape[0], chunk_size):
+        chunk = roots[start : start + chunk_size]
+        distances = np.abs(chunk[:, :, None] - chunk[:, None, :])
+        flags[start : start + chunk_size] = (
+            (distances < CLUSTER_DISTANCE) & off_diagonal
+        ).any(axis=(1, 2))
+    return flags
+
+
+def find_row_roots(
+    coefficients: np.ndarray,
+    length: int,
+    rng=random,
+    seeds: Optional[np.ndarray] = None,
+    statistics: Optional[SolverStatistics] = None,
+):
+    """
+    find_roots for one row of a block, starting from the finite seeds, typically the
+    approximations find_roots_batch left. Returns None when it fails.
+    """
+    if statistics is not None:
+        statistics.fallbacks += 1
+    polynomial = ComplexPolynomial(
+        coefficients=np.asarray(coefficients).tolist(), length=length
+    )
+    seeds = np.empty(0) if seeds is None else seeds[np.isfinite(seeds)]
+    root_set = find_roots(polynomial, rng, seeds.tolist(), statistics)
+    return None if root_set is None else np.array(root_set.roots)
+
+
+def find_factored_roots(
+    coefficients: np.ndarray,
+    length: int,
+    rng=random,
+    statistics: Optional[SolverStatistics] = None,
+) -> dict[int, np.ndarray]:
+    """
+    Solves the rows of a block that have repeated factors through their square-free
+    factors, whose roots are simple so the solvers converge quickly and accurately.
+    The factors are batched by degree. Returns the roots by row, leaving out the
+    square-free rows and those with a factor that can't be solved.
+    """
+    factors_by_row = {}
+    for row, polynomial in enumerate(np.asarray(coefficients).tolist()):
+        factors = square_free_decomposition(polynomial)
+        if any(multiplicity > 1 for _, multiplicity in factors):
+            factors_by_row[row] = factors
+
+    factors_by_degree = defaultdict(set)
+    for factors in factors_by_row.values():
+        for factor, _ in factors:
+            factors_by_degree[len(factor) - 1].add(tuple(factor))
+
+    factor_roots = {}
+    for factors in factors_by_degree.values():
+        factors = sorted(factors)
+        roots, converged = find_roots_batch(np.array(factors), statistics)
+        for factor, row_roots, row_converged in zip(factors, roots, converged):
+            if not row_converged:
+                row_roots = find_row_roots(
+                    np.array(factor), length, rng, row_roots, statistics
+                )
+            factor_roots[factor] = row_roots
+
+    roots_by_row = {}
+    for row, factors in factors_by_row.items():
+        parts = [factor_roots[tuple(factor)] for factor, _ in factors]
+        if all(part is not None for part in parts):
+            roots_by_row[row] = np.concatenate(
+                [
+                    np.tile(part, multiplicity)
+                    for part, (_, multiplicity) in zip(parts, factors)
+                ]
+            )
+    return roots_by_row
+
+
+def solve_rows(
+    coefficients: np.ndarray,
+    length: int,
+    rng=random,
+    statistics: Optional[SolverStatistics] = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Solves a block with solve_batch and retries the rows that did not converge
+    with find_roots, starting from the approximations of the batch. Returns the
+    roots of every row and the flags of the rows that could be solved.
+
+    With REDUCE_POLYNOMIALS, the roots at 0 of integer blocks are split off before
+    solving, and rows that did not converge or whose roots cluster are solved
+    through their square-free factors, which recovers most of the polynomials with
+    repeated roots that find_roots gives up on.
+    """
+    integer = np.issubdtype(coefficients.dtype, np.integer)
+    if not (settings.POLYNOMIAL.REDUCE_POLYNOMIALS and integer):
+        roots, converged = solve_batch(coefficients, statistics)
+        for row in np.flatnonzero(~converged):
+            row_roots = find_row_roots(
+                coefficients[row], length, rng, roots[row], statistics
+            )
+            if row_roots is not None:
+                roots[row] = row_roots
+                converged[row] = True
+        return roots, converged
+
+    rows, degree = coefficients.shape[0], coefficients.shape[1] - 1
+    roots = np.zeros((rows, degree), dtype=root_dtype())
+    solved = np.ones(rows, dtype=bool)
+    zeros = trailing_zeros(coefficients)
+    for count in np.unique(zeros):
+        group = np.flatnonzero(zeros == count)
+        reduced = coefficients[group, count:]
+        if reduced.shape[1] == 1:
+            continue
+
+        group_roots, converged = solve_batch(reduced, statistics)
+        suspicious = np.flatnonzero(~converged | clustered(group_roots))
+        factored = find_factored_roots(reduced[suspicious], length, rng, statistics)
+        for index, row in enumerate(suspicious):
+            row_roots = factored.get(index)
+            if row_roots is None and not converged[row]:
+                row_roots = find_row_roots(
+                    reduced[row], length, rng, group_roots[row], statistics
+                )
+            if row_roots is not None:
+                group_roots[row] = row_roots
+                converged[row] = True
+        roots[group, count:] = group_roots
+        solved[group] = converged
+    return roots, solved
+
+
+def solve_block(
+    coefficients: np.ndarray,
+    length: int,
+    rng=random,
+    statistics: Optional[SolverStatistics] = None,
+) -> np.ndarray:
+    """
+    Returns the roots of every row of a block that could be solved with solve_rows,
+    in row order; like find_roots, polynomials whose roots can't be found are
+    dropped.
+    """
+    roots, solved = solve_rows(coefficients, length, rng, statistics)
+    if statistics is not None:
+        statistics.dropped += int(np.count_nonzero(~solved))
+    return roots[solved]
+
+
+def find_root_sets(polynomials: Iterable[ComplexPolynomial]) -> Generator[RootSet]:
+    """
+    Groups polynomials into (length, degree) blocks and solves every block with
+    solve_block.
+    """
+    blocks: dict[tuple[int, int], list[list[complex]]] = defaultdict(list)
+    for polynomial in polynomials:
+        blocks[(polynomial.length, polynomial.degree)].append(polynomial.coefficients)
+
+    for (length, _), block in blocks.items():
+        for roots in solve_block(np.array(block), length):
+            yield RootSet(roots=roots.tolist(), length=length)
@@ -0,0 +1,231 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import uuid
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+
+from algebraics.config import settings
+from algebraics.polynomial.batch import SOLVER_VERSION, root_dtype
+from algebraics.polynomial.models import Plan, Shard
+
+
+def temporary_path(path: Path, suffix: str = ".tmp") -> Path:
+    """
+    A new name next to path to write it under before it is renamed into place.
+    Every call gets its own, so writers of the same path never share a file.
+    """
+    return path.with_name(f"{path.name}.{uuid.uuid4().hex}{suffix}")
+
+
+class NpyWriter:
+    """
+    Writes a .npy file one chunk of rows at a time, without holding more than a
+    chunk in memory. Rows have the given number of columns, or are scalars when it
+    is None. They go to a temporary file until commit prepends the header, whose
+    shape is only known then, and moves the result to path.
+    """
+
+    def __init__(self, path: str | Path, dtype: np.dtype, columns: Optional[int]):
+        self.path = Path(path)
+        self.dtype = np.dtype(dtype)
+        self.columns = columns
+        self.rows = 0
+        self.temporary = temporary_path(self.path, ".rows")
+        self.file = open(self.temporary, "wb")
+
+    def write(self, rows: np.ndarray):
+        rows = np.ascontiguousarray(rows, dtype=self.dtype)
+        self.file.write(rows.tobytes())
+        self.rows += rows.size // (self.columns or 1)
+
+    def commit(self):
+        self.file.close()
+        shape = (self.rows,) if self.columns is None else (self.rows, self.columns)
+        header = {
+            "descr": np.lib.format.dtype_to_descr(self.dtype),
+            "fortran_order": False,
+            "shape": shape,
+        }
+        output = temporary_path(self.path)
+        with open(output, "wb") as file, open(self.temporary, "rb") as rows:
+            np.lib.format.write_array_header_1_0(file, header)
+            shutil.copyfileobj(rows, file)
+        self.temporary.unlink()
+        # Readers never see a partial file
+        os.replace(output, self.path)
+
+    def discard(self):
+        self.file.close()
+        self.temporary.unlink(missing_ok=True)
+
+
+def shard_filename(shard: Shard) -> str:
+    return f"{shard.name('-')}.npy"
+
+
+def file_sha256(path: str | Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        while block := file.read(2**20):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# Name of the directory of the entries of every solver fingerprint
+FINGERPRINT = re.compile("[0-9a-f]{16}")
+
+
+def solver_fingerprint() -> str:
+    """
+    Identifies everything that influences the solved roots: the solver
+    implementation and all of its settings. Entries written under another
+    fingerprint are never read back.
+    """
+    config = {"solver": SOLVER_VERSION, **dict(settings.POLYNOMIAL)}
+    encoded = json.dumps(config, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+class RootCache:
+    """
+    On-disk cache of solved shards, one .npy file per shard, that are loaded back
+    memory-mapped. Entries are kept in a directory per solver fingerprint, so
+    switching between settings finds the entries of each again. The total size of
+    all of them is capped by evicting the least recently used files, where every
+    read refreshes the modification time of a file.
+    """
+
+    def __init__(self, directory: str | Path, max_bytes: int):
+        self.root = Path(directory).expanduser()
+        self.directory = self.root / solver_fingerprint()
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.evict()
+
+    def path(self, shard: Shard) -> Path:
+        return self.directory / shard_filename(shard)
+
+    def __contains__(self, shard: Shard) -> bool:
+        return self.path(shard).exists()
+
+    def get(self, shard: Shard) -> Optional[np.ndarray]:
+        path = self.path(shard)
+        try:
+            roots = np.load(path, mmap_mode="r")
+        except (FileNotFoundError, ValueError):
+            return None
+        os.utime(path)
+        return roots
+
+    def put(self, shard: Shard, roots: np.ndarray):
+        path = self.path(shard)
+        # Write to a temporary file first so readers never see a partial entry
+        temporary = temporary_path(path)
+        with open(temporary, "wb") as file:
+            np.save(file, roots)
+        os.replace(temporary, path)
+        self._added(path)
+
+    def writer(self, shard: Shard) -> "RootWriter":
+        """
+        Returns a writer that adds the roots of shard chunk by chunk and stores them
+        once it is committed
+        """
+        return RootWriter(self, shard)
+
+    def _added(self, path: Path):
+        self.total_bytes += path.stat().st_size
+        if self.total_bytes > self.max_bytes:
+            self.evict()
+
+    def evict(self):
+        """
+        Removes the least recently used entries, of this fingerprint or any other,
+        until the whole cache fits in max_bytes. Only the directories named like a
+        fingerprint are touched.
+        """
+        entries = []
+        for directory in self.root.iterdir():
+            if not FINGERPRINT.fullmatch(directory.name) or not directory.is_dir():
+                continue
+            for path in directory.glob("*.npy"):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            if path.parent != self.directory:
+                try:
+                    path.parent.rmdir()
+                except OSError:
+                    pass
+        self.total_bytes = total
+
+
+class RootWriter(NpyWriter):
+    def __init__(self, cache: RootCache, shard: Shard):
+        super().__init__(cache.path(shard), root_dtype(), shard.degree)
+        self.cache = cache
+
+    def commit(self):
+        super().commit()
+        self.cache._added(self.path)
+
+
+class Dataset:
+    """
+    Read-only counterpart of RootCache over a dataset merged by sharding.merge:
+    one .npy file per shard and the plan the shards were solved from. Shards the
+    dataset doesn't hold are looked up in and written to fallback, so it can stand
+    in for the root cache anywhere.
+    """
+
+    def __init__(self, directory: str | Path, fallback: Optional[RootCache] = None):
+        self.directory = Path(directory).expanduser()
+        self.plan = Plan.model_validate_json(
+            (self.directory / "dataset.json").read_text()
+        )
+        if self.plan.fingerprint != solver_fingerprint():
+            raise ValueError(
+                f"The dataset in {directory} was solved with other [polynomial] "
+                "settings"
+            )
+        self.shards = set(self.plan.shards())
+        self.fallback = fallback
+
+    def __contains__(self, shard: Shard) -> bool:
+        if shard in self.shards:
+            return True
+        return self.fallback is not None and shard in self.fallback
+
+    def get(self, shard: Shard) -> Optional[np.ndarray]:
+        if shard in self.shards:
+            return np.load(self.directory / shard_filename(shard), mmap_mode="r")
+        return None if self.fallback is None else self.fallback.get(shard)
+
+    def writer(self, shard: Shard) -> Optional["RootWriter"]:
+        return None if self.fallback is None else self.fallback.writer(shard)
+
+
+def open_root_cache() -> Optional[Union[RootCache, Dataset]]:
+    """
+    The root cache, read through the dataset of DATASET.DIRECTORY when one is set
+    """
+    cache = None
+    if settings.CACHE.ENABLED:
+        cache = RootCache(settings.CACHE.DIRECTORY, settings.CACHE.MAX_SIZE_MB * 2**20)
+    if settings.DATASET.DIRECTORY:
+        return Dataset(settings.DATASET.DIRECTORY, cache)
+    return cache
@@ -0,0 +1,267 @@
+import math
+from typing import Generator, Optional
+
+import numpy as np
+
+from algebraics.polynomial.models import PolynomialBlock
+
+
+def enumerate_compositions(total: int, parts: int) -> np.ndarray:
+    """
+    Returns every way of writing total as an ordered sum of parts non-negative
+    integers, one per row, in lexicographic order.
+    """
+    compositions = np.zeros((1, 0), dtype=np.int64)
+    remaining = np.array([total])
+    for _ in range(parts - 1):
+        counts = remaining + 1
+        starts = np.cumsum(counts) - counts
+        values = np.arange(counts.sum()) - np.repeat(starts, counts)
+        compositions = np.column_stack(
+            [np.repeat(compositions, counts, axis=0), values]
+        )
+        remaining = np.repeat(remaining, counts) - values
+    return np.column_stack([compositions, remaining])
+
+
+def expand_signs(magnitudes: np.ndarray) -> np.ndarray:
+    """
+    Replaces every row by all of its sign patterns, in the order generate_signs yields
+    them: each non-zero entry is taken positive then negative, and the last column
+    varies fastest.
+    """
+    rows = magnitudes
+    for column in range(magnitudes.shape[1]):
+        counts = np.where(rows[:, column] != 0, 2, 1)
+        rows = np.repeat(rows, counts, axis=0)
+        negate = np.arange(rows.shape[0]) - np.repeat(
+            np.cumsum(counts) - counts, counts
+        )
+        rows[negate == 1, column] *= -1
+    return rows
+
+
+def block_dtype(length: int) -> np.dtype:
+    """
+    The smallest integer type that holds the coefficients of the given length, from
+    -length to length
+    """
+    # Signed types hold one more negative value than positive ones
+    return np.min_scalar_type(-max(length, 1) - 1)
+
+
+def coefficient_block(
+    length: int, degree: int, constant: Optional[int] = None
+) -> np.ndarray:
+    """
+    Returns an (N, degree + 1) array with the coefficients a_0, ..., a_n of every
+    polynomial of the given length (sum of absolute values of the coefficients) and
+    degree, in the order enumerate_polynomials yields them. When constant is given,
+    only the polynomials with |a_0| == constant are included.
+    """
+    dtype = block_dtype(length)
+    if constant is None:
+        magnitudes = enumerate_compositions(length, degree + 1)
+    elif constant > length:
+        magnitudes = np.zeros((0, degree + 1), dtype=np.int64)
+    else:
+        rest = enumerate_compositions(length - constant, degree)
+        magnitudes = np.column_stack([np.full(rest.shape[0], constant), rest])
+
+    magnitudes = magnitudes[magnitudes[:, -1] != 0].astype(dtype)
+    return expand_signs(magnitudes)
+
+
+def count_signed_tails(total: int, positions: int) -> int:
+    """
+    Counts the integer vectors of the given number of positions whose absolute values
+    sum to total and whose last entry is non-zero. With k non-zero entries there are
+    C(positions - 1, k - 1) ways to place them, C(total - 1, k - 1) ways to split total
+    among them and 2^k sign patterns.
+    """
+    if total == 0 or positions == 0:
+        return 0
+    return sum(
+        2**k * math.comb(positions - 1, k - 1) * math.comb(total - 1, k - 1)
+        for k in range(1, min(positions, total) + 1)
+    )
+
+
+def count_block(length: int, degree: int, constant: Optional[int] = None) -> int:
+    """
+    Returns the number of rows coefficient_block(length, degree, constant) has,
+    without enumerating them.
+    """
+    constants = range(length + 1) if constant is None else [constant]
+    return sum(
+        (1 if c == 0 else 2) * count_signed_tails(length - c, degree)
+        for c in constants
+        if c <= length
+    )
+
+
+def count_polynomials(max_length: int, max_degree: int) -> int:
+    """
+    Returns the number of polynomials enumerate_polynomials(max_length, max_degree)
+    yields, without enumerating them.
+    """
+    return sum(
+        count_block(length, degree)
+        for length in range(max_length + 1)
+        for degree in range(2, max_degree + 1)
+    )
+
+
+def count_completions(total: int, positions: int) -> int:
+    """
+    count_signed_tails, where no positions complete a row only when nothing is left
+    """
+    return int(total == 0) if positions == 0 else count_signed_tails(total, positions)
+
+
+def unrank_row(length: int, degree: int, index: int) -> list[int]:
+    """
+    Returns row index of coefficient_block(length, degree) without building the
+    block. The rows are ordered by their magnitudes, then by their signs, so the
+    magnitudes are picked one coefficient at a time by counting the rows that start
+    with every candidate, and what is left of index numbers the sign pattern.
+    """
+    if not 0 <= index < count_block(length, degree):
+        raise IndexError(f"row {index} of block ({length}, {degree}) doesn't exist")
+
+    row = []
+    remaining = length
+    patterns = 1  # sign patterns of the magnitudes picked so far
+    for position in range(degree + 1):
+        rest = degree - position
+        for magnitude in range(remaining + 1):
+            if rest == 0 and magnitude == 0:
+                # The leading coefficient is never zero
+                continue
+            signs = 2 if magnitude else 1
+            rows = patterns * signs * count_completions(remaining - magnitude, rest)
+            if index < rows:
+                break
+            index -= rows
+        row.append(magnitude)
+        remaining -= magnitude
+        patterns *= signs
+
+    # Every non-zero coefficient is positive then negative, the last varying fastest
+    for position in range(degree + 1):
+        if row[position]:
+            patterns //= 2
+            if index >= patterns:
+                row[position] = -row[position]
+                index -= patterns
+    return row
+
+
+def next_row(row: list[int]) -> bool:
+    """
+    Replaces row by the row that follows it in its coefficient_block, in place.
+    Returns False, leaving row as it is, when row is the last row of its block.
+    """
+    # The sign patterns count in binary over the non-zero coefficients
+    for position in range(len(row) - 1, -1, -1):
+        if row[position] > 0:
+            row[position] = -row[position]
+            return True
+        if row[position] < 0:
+            row[position] = -row[position]
+
+    # Every sign carried over, so move on to the next magnitudes: the rightmost
+    # coefficient that can grow while leaving a non-zero leading coefficient does,
+    # and the rest of its magnitude moves to the leading coefficient
+    suffix = 0
+    for position in range(len(row) - 2, -1, -1):
+        suffix += row[position + 1]
+        if suffix >= 2:
+            row[position] += 1
+            row[position + 1 :] = [0] * (len(row) - position - 1)
+            row[-1] = suffix - 1
+            return True
+
+    # Restore the signs of the last row
+    for position in range(len(row)):
+        row[position] = -row[position]
+    return False
+
+
+def block_rows(length: int, degree: int, start: int, stop: int) -> np.ndarray:
+    """
+    coefficient_block(length, degree)[start:stop], built from row start on rather
+    than from the whole block
+    """
+    stop = min(stop, count_block(length, degree))
+    coefficients = np.empty((max(stop - start, 0), degree + 1), block_dtype(length))
+    if stop <= start:
+        return coefficients
+    row = unrank_row(length, degree, start)
+    coefficients[0] = row
+    for index in range(1, stop - start):
+        next_row(row)
+        coefficients[index] = row
+    return coefficients
+
+
+def enumerate_rows(
+    max_length: int, max_degree: int, start: int = 0, stop: Optional[int] = None
+) -> Generator[tuple[int, list[int]]]:
+    """
+    Yields (length, coefficients) for polynomials start, ..., stop - 1 of
+    enumerate_polynomials(max_length, max_degree), jumping straight to polynomial
+    start with unrank_row and stepping with next_row. coefficients is the same list
+    every time, updated in place; copy it to keep it.
+    """
+    stop = count_polynomials(max_length, max_degree) if stop is None else stop
+    blocks = [
+        (length, degree)
+        for length in range(1, max_length + 1)
+        for degree in range(2, max_degree + 1)
+    ]
+    index = 0
+    for length, degree in blocks:
+        if index >= stop:
+            return
+        rows = count_block(length, degree)
+        if index + rows <= start:
+            index += rows
+            continue
+
+        row = unrank_row(length, degree, max(start - index, 0))
+        index = max(start, index)
+        while index < stop:
+            yield length, row
+            index += 1
+            if not next_row(row):
+                break
+
+
+def enumerate_polynomial_blocks(
+    max_length: int, max_degree: int, start: int = 0, stop: Optional[int] = None
+) -> Generator[PolynomialBlock]:
+    """
+    Array-backed counterpart of enumerate_polynomials, yielding one block of integer
+    coefficients per (length, degree) instead of one ComplexPolynomial per polynomial.
+    Only polynomials start, ..., stop - 1 of the enumeration are included, and the
+    blocks before start are skipped by counting them.
+    """
+    index = 0
+    for length in range(max_length + 1):
+        for degree in range(2, max_degree + 1):
+            if stop is not None and index >= stop:
+                return
+            rows = count_block(length, degree)
+            first = max(start - index, 0)
+            last = rows if stop is None else min(stop - index, rows)
+            index += rows
+            if first >= last:
+                continue
+            if (first, last) == (0, rows):
+                coefficients = coefficient_block(length, degree)
+            else:
+                coefficients = block_rows(length, degree, first, last)
+            yield PolynomialBlock(
+                length=length, degree=degree, coefficients=coefficients
+            )
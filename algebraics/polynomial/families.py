@@ -0,0 +1,375 @@
+import importlib
+import math
+from functools import cache
+from typing import Optional, Protocol
+
+import numpy as np
+
+from algebraics.config import settings
+from algebraics.polynomial.enumeration import (
+    block_dtype,
+    block_rows,
+    coefficient_block,
+    count_block,
+)
+from algebraics.polynomial.models import Shard
+from algebraics.polynomial.reduction import count_irredundant, mobius
+
+
+class PolynomialFamily(Protocol):
+    """
+    A family of integer polynomials, split into shards that are enumerated as blocks
+    of coefficients. The rows of a shard have a fixed order, so any range of them
+    can be built without the others, and are counted exactly without being built,
+    which is all the solvers, the worker processes and the caches need of a family.
+    Families are registered with register_family under their name, which shards
+    carry in Shard.family.
+    """
+
+    name: str
+    title: str  # shown in the GUI
+    # What max_length bounds, e.g. "Length", or None when the family only has degrees
+    parameter: Optional[str]
+
+    def shards(self, max_length: int, max_degree: int) -> list[Shard]:
+        """
+        The shards of the polynomials of degree up to max_degree, and whose
+        parameter is up to max_length, in the order they are solved
+        """
+        ...
+
+    def count(self, shard: Shard) -> int:
+        """
+        The number of rows of the shard
+        """
+        ...
+
+    def count_irredundant(self, shard: Shard) -> int:
+        """
+        The number of rows of the shard that reduction.is_redundant keeps
+        """
+        ...
+
+    def rows(
+        self, shard: Shard, start: int = 0, stop: Optional[int] = None
+    ) -> np.ndarray:
+        """
+        Rows start to stop of the shard, all of them by default, as an
+        (N, shard.degree + 1) integer array of the coefficients a_0, ..., a_n
+        """
+        ...
+
+
+class LengthFamily:
+    """
+    The polynomials of degree 2 and up whose length, the sum of the absolute values
+    of their coefficients, is bounded, in the order enumerate_polynomials yields
+    them. Shards are split by the constant term with SPLIT_BY_CONSTANT.
+    """
+
+    name = "length"
+    title = "Length"
+    parameter = "Length"
+
+    def shards(self, max_length: int, max_degree: int) -> list[Shard]:
+        # Polynomials with a zero constant term are all redundant
+        first_constant = 1 if settings.POLYNOMIAL.SKIP_REDUNDANT else 0
+        shards = []
+        for length in range(max_length + 1):
+            for degree in range(2, max_degree + 1):
+                if settings.GENERATION.SPLIT_BY_CONSTANT:
+                    shards.extend(
+                        Shard(length=length, degree=degree, constant=constant)
+                        for constant in range(first_constant, length + 1)
+                    )
+                else:
+                    shards.append(Shard(length=length, degree=degree))
+        return shards
+
+    def count(self, shard: Shard) -> int:
+        return count_block(shard.length, shard.degree, shard.constant)
+
+    def count_irredundant(self, shard: Shard) -> int:
+        return count_irredundant(shard.length, shard.degree, shard.constant)
+
+    def rows(
+        self, shard: Shard, start: int = 0, stop: Optional[int] = None
+    ) -> np.ndarray:
+        if start == 0 and stop is None:
+            return coefficient_block(shard.length, shard.degree, shard.constant)
+        if stop is None:
+            stop = self.count(shard)
+        # The rows of every constant are contiguous in the block without constant
+        offset = sum(
+            count_block(shard.length, shard.degree, constant)
+            for constant in range(shard.constant or 0)
+        )
+        return block_rows(shard.length, shard.degree, offset + start, offset + stop)
+
+
+class SjbrooksFamily:
+    """
+    The polynomials of degree 1 and up with a positive leading coefficient, by
+    their length plus their degree plus one, which enumerate_polynomials_sjbrooks
+    yields: polynomials and their negatives have the same roots, so only one of
+    them is solved, and higher degrees weigh more. Shards are the blocks of
+    LengthFamily with every other row, the ones with a positive leading
+    coefficient.
+    """
+
+    name = "sjbrooks"
+    title = "Length + degree"
+    parameter = "Length"
+
+    def shards(self, max_length: int, max_degree: int) -> list[Shard]:
+        return [
+            Shard(family=self.name, length=length, degree=degree)
+            for length in range(3, max_length + 1)
+            for degree in range(1, min(max_degree, length - 2) + 1)
+        ]
+
+    def count(self, shard: Shard) -> int:
+        return count_block(shard.length - shard.degree - 1, shard.degree) // 2
+
+    def count_irredundant(self, shard: Shard) -> int:
+        # Negating a polynomial keeps it redundant or not
+        return count_irredundant(shard.length - shard.degree - 1, shard.degree) // 2
+
+    def rows(
+        self, shard: Shard, start: int = 0, stop: Optional[int] = None
+    ) -> np.ndarray:
+        # The sign of the leading coefficient alternates from row to row
+        length = shard.length - shard.degree - 1
+        if start == 0 and stop is None:
+            return coefficient_block(length, shard.degree)[::2]
+        if stop is None:
+            stop = self.count(shard)
+        return block_rows(length, shard.degree, 2 * start, 2 * stop)[::2]
+
+
+def binary_digits(indices: np.ndarray, digits: int) -> np.ndarray:
+    """
+    The digits of every index in base 2, most significant first
+    """
+    return (indices[:, None] >> np.arange(digits - 1, -1, -1)) & 1
+
+
+def index_range(count: int, start: int, stop: Optional[int]) -> np.ndarray:
+    return np.arange(start, count if stop is None else min(stop, count), dtype=np.int64)
+
+
+class LittlewoodFamily:
+    """
+    The Littlewood polynomials of degree 2 and up, whose coefficients are all 1 or
+    -1, one shard per degree. Rows count in binary over the signs, the leading
+    coefficient varying fastest.
+    """
+
+    name = "littlewood"
+    title = "Littlewood (±1)"
+    parameter = None
+
+    def shards(self, max_length: int, max_degree: int) -> list[Shard]:
+        return [
+            Shard(family=self.name, length=0, degree=degree)
+            for degree in range(2, max_degree + 1)
+        ]
+
+    def count(self, shard: Shard) -> int:
+        return 2 ** (shard.degree + 1)
+
+    def count_irredundant(self, shard: Shard) -> int:
+        # Their constant term is never zero and their content is 1
+        return self.count(shard)
+
+    def rows(
+        self, shard: Shard, start: int = 0, stop: Optional[int] = None
+    ) -> np.ndarray:
+        indices = index_range(self.count(shard), start, stop)
+        return (1 - 2 * binary_digits(indices, shard.degree + 1)).astype(np.int8)
+
+
+class ZeroOneFamily:
+    """
+    The polynomials of degree 2 and up whose coefficients are all 0 or 1, one shard
+    per degree. Rows count in binary over a_0, ..., a_(n-1), the leading coefficient
+    being 1.
+    """
+
+    name = "zero-one"
+    title = "{0, 1}"
+    parameter = None
+
+    def shards(self, max_length: int, max_degree: int) -> list[Shard]:
+        return [
+            Shard(family=self.name, length=0, degree=degree)
+            for degree in range(2, max_degree + 1)
+        ]
+
+    def count(self, shard: Shard) -> int:
+        return 2**shard.degree
+
+    def count_irredundant(self, shard: Shard) -> int:
+        # The ones whose constant term is 1, their content being 1
+        return 2 ** (shard.degree - 1)
+
+    def rows(
+        self, shard: Shard, start: int = 0, stop: Optional[int] = None
+    ) -> np.ndarray:
+        indices = index_range(self.count(shard), start, stop)
+        coefficients = np.ones((len(indices), shard.degree + 1), dtype=np.int8)
+        coefficients[:, :-1] = binary_digits(indices, shard.degree)
+        return coefficients
+
+
+class HeightFamily:
+    """
+    The polynomials of degree 2 and up by their height, the largest absolute value
+    of their coefficients, which Shard.length holds. The rows of a shard are split
+    by the first coefficient that reaches the height, and the rows of every part
+    count over the values its coefficients can take, the leading coefficient
+    varying fastest.
+    """
+
+    name = "height"
+    title = "Height"
+    parameter = "Height"
+
+    def shards(self, max_length: int, max_degree: int) -> list[Shard]:
+        return [
+            Shard(family=self.name, length=height, degree=degree)
+            for height in range(1, max_length + 1)
+            for degree in range(2, max_degree + 1)
+        ]
+
+    @staticmethod
+    def bounded(height: int, degree: int, nonzero_constant: bool) -> int:
+        """
+        The number of polynomials of the degree whose height is at most height,
+        only counting the ones with a non-zero constant term when nonzero_constant
+        is set
+        """
+        if nonzero_constant:
+            return (2 * height) ** 2 * (2 * height + 1) ** (degree - 1)
+        return 2 * height * (2 * height + 1) ** degree
+
+    def count(self, shard: Shard) -> int:
+        height, degree = shard.length, shard.degree
+        return self.bounded(height, degree, False) - self.bounded(
+            height - 1, degree, False
+        )
+
+    def count_irredundant(self, shard: Shard) -> int:
+        # The content of a polynomial divides its height, and the ones with content
+        # divisible by g are g times those of height / g
+        height, degree = shard.length, shard.degree
+        return sum(
+            mobius(g)
+            * (
+                self.bounded(height // g, degree, True)
+                - self.bounded(height // g - 1, degree, True)
+            )
+            for g in range(1, height + 1)
+            if height % g == 0
+        )
+
+    def parts(self, shard: Shard) -> list[list[np.ndarray]]:
+        """
+        The values every coefficient takes in the part of the rows whose first
+        coefficient of absolute value height is a_k, for k = 0, ..., n
+        """
+        height, degree = shard.length, shard.degree
+        below = np.arange(-(height - 1), height)
+        reached = np.array([height, -height])
+        nonzero = np.concatenate([np.arange(1, height + 1), -np.arange(1, height + 1)])
+        parts = []
+        for first in range(degree + 1):
+            values = [below] * first + [reached]
+            if first < degree:
+                values += [np.arange(-height, height + 1)] * (degree - first - 1)
+                values.append(nonzero)
+            parts.append(values)
+        return parts
+
+    def rows(
+        self, shard: Shard, start: int = 0, stop: Optional[int] = None
+    ) -> np.ndarray:
+        stop = self.count(shard) if stop is None else min(stop, self.count(shard))
+        dtype = block_dtype(shard.length)
+        blocks = [np.empty((0, shard.degree + 1), dtype=dtype)]
+        offset = 0
+        for values in self.parts(shard):
+            size = math.prod(len(column) for column in values)
+            first, last = max(start - offset, 0), min(stop - offset, size)
+            offset += size
+            if first >= last:
+                continue
+            remaining = np.arange(first, last, dtype=np.int64)
+            block = np.empty((last - first, shard.degree + 1), dtype=dtype)
+            for column in range(shard.degree, -1, -1):
+                remaining, digit = np.divmod(remaining, len(values[column]))
+                block[:, column] = values[column][digit]
+            blocks.append(block)
+        return np.concatenate(blocks)
+
+
+FAMILIES: dict[str, PolynomialFamily] = {
+    family.name: family
+    for family in (
+        LengthFamily(),
+        SjbrooksFamily(),
+        LittlewoodFamily(),
+        ZeroOneFamily(),
+        HeightFamily(),
+    )
+}
+
+
+def register_family(family: PolynomialFamily):
+    """
+    Makes family available to generations and the GUI under family.name
+    """
+    FAMILIES[family.name] = family
+
+
+@cache
+def load_plugins():
+    """
+    Imports the FAMILY_PLUGINS modules, which register their families, once per
+    process
+    """
+    for module in settings.GENERATION.FAMILY_PLUGINS:
+        importlib.import_module(module)
+
+
+def available_families() -> list[PolynomialFamily]:
+    load_plugins()
+    return list(FAMILIES.values())
+
+
+def get_family(name: str) -> PolynomialFamily:
+    load_plugins()
+    if name not in FAMILIES:
+        raise ValueError(f"Unknown polynomial family {name!r}")
+    return FAMILIES[name]
+
+
+def count_shard(shard: Shard) -> int:
+    """
+    The number of polynomials of a shard that are solved, without the redundant
+    ones when SKIP_REDUNDANT is set, without enumerating them
+    """
+    family = get_family(shard.family)
+    if settings.POLYNOMIAL.SKIP_REDUNDANT:
+        return family.count_irredundant(shard)
+    return family.count(shard)
+
+
+def count_family(family: str, max_length: int, max_degree: int) -> int:
+    """
+    The number of polynomials a generation of the parameters solves
+    """
+    return sum(
+        count_shard(shard)
+        for shard in get_family(family).shards(max_length, max_degree)
+    )
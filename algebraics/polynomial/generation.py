@@ -0,0 +1,289 @@
+import os
+import random
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Collection, Generator, Optional, TypeVar
+
+import numpy as np
+
+from algebraics.config import settings
+from algebraics.instrumentation.statistics import PipelineStatistics, stage
+from algebraics.polynomial.batch import root_dtype, solve_block
+from algebraics.polynomial.cache import RootCache
+from algebraics.polynomial.families import get_family
+from algebraics.polynomial.models import Chunk, Shard, SolverStatistics
+from algebraics.polynomial.reduction import is_redundant
+from algebraics.polynomial.symmetry import solve_symmetric_block
+
+S = TypeVar("S")
+T = TypeVar("T")
+
+
+def enumerate_shards(
+    max_length: int, max_degree: int, family: str = "length"
+) -> list[Shard]:
+    """
+    Splits the polynomials of a family up to the parameters into shards that can be
+    solved independently. For the length family, the space of
+    enumerate_polynomials(max_length, max_degree) in the order it visits them.
+    """
+    return get_family(family).shards(max_length, max_degree)
+
+
+def enumerate_chunks(shard: Shard, chunk_rows: Optional[int] = None) -> list[Chunk]:
+    """
+    Splits a shard into chunks of at most chunk_rows rows, or returns it as a single
+    chunk when chunk_rows is None or the shard is small enough
+    """
+    rows = get_family(shard.family).count(shard)
+    if chunk_rows is None or rows <= chunk_rows:
+        return [Chunk(shard=shard)]
+    return [
+        Chunk(shard=shard, start=start, stop=min(start + chunk_rows, rows))
+        for start in range(0, rows, chunk_rows)
+    ]
+
+
+def chunk_coefficients(chunk: Chunk) -> np.ndarray:
+    """
+    The coefficients of the polynomials of a chunk, without the redundant ones when
+    SKIP_REDUNDANT is set, as its family enumerates them
+    """
+    shard = chunk.shard
+    coefficients = get_family(shard.family).rows(shard, chunk.start, chunk.stop)
+    if settings.POLYNOMIAL.SKIP_REDUNDANT:
+        coefficients = coefficients[~is_redundant(coefficients)]
+    return coefficients
+
+
+def shard_coefficients(shard: Shard) -> np.ndarray:
+    """
+    The coefficients of the polynomials of a shard, without the redundant ones when
+    SKIP_REDUNDANT is set
+    """
+    return chunk_coefficients(Chunk(shard=shard))
+
+
+def solve_coefficients(
+    chunk: Chunk,
+    coefficients: np.ndarray,
+    statistics: Optional[SolverStatistics] = None,
+) -> np.ndarray:
+    """
+    Returns an (N, degree) array with the roots of every row of the coefficients of
+    a chunk. The fallback solver is seeded from the chunk itself, so the result
+    doesn't depend on which process solved the chunk or in which order.
+    """
+    shard = chunk.shard
+    if coefficients.shape[0] == 0:
+        return np.empty((0, shard.degree), dtype=root_dtype())
+
+    seed = shard.name()
+    rng = random.Random(f"{seed}:{chunk.start}" if chunk.start else seed)
+    if settings.POLYNOMIAL.SOLVE_SYMMETRIC:
+        return solve_symmetric_block(
+            coefficients, shard.length, shard.constant, rng, statistics
+        )
+    return solve_block(coefficients, shard.length, rng, statistics)
+
+
+def solve_chunk(
+    chunk: Chunk, statistics: Optional[SolverStatistics] = None
+) -> np.ndarray:
+    """
+    Returns an (N, degree) array with the roots of every polynomial in the chunk
+    """
+    return solve_coefficients(chunk, chunk_coefficients(chunk), statistics)
+
+
+def solve_shard(
+    shard: Shard, statistics: Optional[SolverStatistics] = None
+) -> np.ndarray:
+    """
+    Returns an (N, degree) array with the roots of every polynomial in the shard
+    """
+    return solve_chunk(Chunk(shard=shard), statistics)
+
+
+def solve_chunk_instrumented(chunk: Chunk) -> tuple[np.ndarray, PipelineStatistics]:
+    """
+    solve_chunk, also returning the time spent enumerating and solving the chunk and
+    the work of the solvers
+    """
+    statistics = PipelineStatistics()
+    with statistics.stage("enumerate"):
+        coefficients = chunk_coefficients(chunk)
+    with statistics.stage("solve"):
+        roots = solve_coefficients(chunk, coefficients, statistics.solver)
+    statistics.polynomials += coefficients.shape[0]
+    statistics.shards_solved += chunk.start == 0
+    return roots, statistics
+
+
+def call_each(function: Callable[[S], T], items: list[S]) -> list[T]:
+    return [function(item) for item in items]
+
+
+def map_ordered(
+    function: Callable[[S], T], items: list[S], workers: Optional[int] = None
+) -> Generator[T]:
+    """
+    Yields function(item) for every item in order, calling it in-process or in a
+    pool of worker processes. Workers are handed CHUNK_SIZE items at a time and at
+    most two hand-outs per worker are pending, so results never pile up ahead of a
+    slow consumer.
+    """
+    if workers is None:
+        workers = settings.GENERATION.WORKERS
+
+    if workers == 1 or len(items) <= 1:
+        yield from map(function, items)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    size = settings.GENERATION.CHUNK_SIZE
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending: deque[Future[list[T]]] = deque()
+        try:
+            for start in range(0, len(items), size):
+                if len(pending) >= 2 * workers:
+                    yield from pending.popleft().result()
+                pending.append(
+                    executor.submit(call_each, function, items[start : start + size])
+                )
+            while pending:
+                yield from pending.popleft().result()
+        finally:
+            # Drop the items that haven't started when the consumer stops early
+            executor.shutdown(cancel_futures=True)
+
+
+def solve_chunks(
+    chunks: list[Chunk],
+    workers: Optional[int] = None,
+    statistics: Optional[PipelineStatistics] = None,
+) -> Generator[np.ndarray]:
+    """
+    Yields the roots of every chunk in order, whether the chunks are solved
+    in-process or in a pool of worker processes. The work of every chunk is added to
+    statistics when it is given.
+    """
+    if statistics is None:
+        yield from map_ordered(solve_chunk, chunks, workers)
+        return
+
+    for roots, chunk_statistics in map_ordered(
+        solve_chunk_instrumented, chunks, workers
+    ):
+        statistics.add(chunk_statistics)
+        yield roots
+
+
+def solve_shards(
+    shards: list[Shard],
+    workers: Optional[int] = None,
+    statistics: Optional[PipelineStatistics] = None,
+) -> Generator[np.ndarray]:
+    """
+    solve_chunks with every shard as a single chunk
+    """
+    yield from solve_chunks(
+        [Chunk(shard=shard) for shard in shards], workers, statistics
+    )
+
+
+def stream_roots(
+    max_length: int,
+    max_degree: int,
+    chunk_rows: Optional[int] = None,
+    workers: Optional[int] = None,
+    cache: Optional[RootCache] = None,
+    exclude: Collection[Shard] = (),
+    statistics: Optional[PipelineStatistics] = None,
+    family: str = "length",
+) -> Generator[tuple[Shard, np.ndarray]]:
+    """
+    Yields (shard, roots) pairs for every shard of the polynomial family in shard
+    order, skipping the shards in exclude that the caller already holds. Shards with more
+    than chunk_rows rows are yielded in several consecutive chunks of at most that
+    many roots, and every shard is yielded at least once, possibly without roots.
+
+    Only the chunks being solved and the one being yielded are held in memory: the
+    workers never run more than a few chunks ahead of the consumer, shards found in
+    the cache are read from disk when their turn comes, and the others are written
+    back to it chunk by chunk.
+    """
+    shards = [
+        shard
+        for shard in enumerate_shards(max_length, max_degree, family)
+        if shard not in exclude
+    ]
+    with stage(statistics, "cache"):
+        cached = {shard for shard in shards if shard in cache} if cache else set()
+
+    chunks = {
+        shard: enumerate_chunks(shard, chunk_rows)
+        for shard in shards
+        if shard not in cached
+    }
+    solved = solve_chunks(
+        [chunk for shard_chunks in chunks.values() for chunk in shard_chunks],
+        workers,
+        statistics,
+    )
+    for shard in shards:
+        roots = None
+        if shard in cached:
+            with stage(statistics, "cache"):
+                roots = cache.get(shard)
+        if roots is not None:
+            if statistics is not None:
+                statistics.shards_cached += 1
+                statistics.root_sets += roots.shape[0]
+            if chunk_rows is None or roots.shape[0] <= chunk_rows:
+                yield shard, roots
+                continue
+            for start in range(0, roots.shape[0], chunk_rows):
+                yield shard, roots[start : start + chunk_rows]
+            continue
+
+        if shard in cached:
+            # Evicted since, solve it here
+            parts = solve_chunks(enumerate_chunks(shard, chunk_rows), 1, statistics)
+        else:
+            parts = (next(solved) for _ in chunks[shard])
+        writer = cache.writer(shard) if cache else None
+        try:
+            for roots in parts:
+                if writer:
+                    with stage(statistics, "cache"):
+                        writer.write(roots)
+                if statistics is not None:
+                    statistics.root_sets += roots.shape[0]
+                yield shard, roots
+            if writer:
+                with stage(statistics, "cache"):
+                    writer.commit()
+                writer = None
+        finally:
+            if writer:
+                writer.discard()
+
+
+def generate_roots(
+    max_length: int,
+    max_degree: int,
+    workers: Optional[int] = None,
+    cache: Optional[RootCache] = None,
+    exclude: Collection[Shard] = (),
+    statistics: Optional[PipelineStatistics] = None,
+    family: str = "length",
+) -> Generator[tuple[Shard, np.ndarray]]:
+    """
+    Yields (shard, roots) pairs for every shard of the polynomial family in shard
+    order, skipping the shards in exclude that the caller already holds, see
+    stream_roots. Every shard is solved and yielded whole.
+    """
+    yield from stream_roots(
+        max_length, max_degree, None, workers, cache, exclude, statistics, family
+    )
@@ -1,6 +1,7 @@
-from typing import Annotated, Union
+from typing import Annotated, Optional, Union
 
-from pydantic import AfterValidator, BaseModel, computed_field
+import numpy as np
+from pydantic import AfterValidator, BaseModel, ConfigDict, computed_field
 
 
 class RootSet(BaseModel):
@@ -44,3 +45,124 @@ class ComplexPolynomial(BaseModel):
 
         self.coefficients[:degree] = self.coefficients[1 : degree + 1]
         self.coefficients.pop()
+
+
+class PolynomialBlock(BaseModel):
+    """
+    Every polynomial of one length and degree, stored as an (N, degree + 1) integer
+    array of coefficients a_0, ..., a_n rather than as N ComplexPolynomials
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    length: int
+    degree: int
+    coefficients: np.ndarray
+
+
+class Shard(BaseModel):
+    """
+    An independent slice of the enumeration: every polynomial of one length and
+    degree, optionally narrowed down to those whose constant term has the given
+    absolute value. Shards of other polynomial families hold what their family puts
+    in them, length being the parameter of the family, or 0 for families that only
+    have degrees.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    length: int
+    degree: int
+    constant: Optional[int] = None
+    family: str = "length"  # name of its families.PolynomialFamily
+
+    def name(self, separator: str = ":") -> str:
+        """
+        Identifies the shard in file names and seeds, which stay as they were for
+        the length family
+        """
+        parts = [self.length, self.degree, self.constant]
+        if self.family != "length":
+            parts.insert(0, self.family)
+        return separator.join(str(part) for part in parts)
+
+
+class Chunk(BaseModel):
+    """
+    Rows start to stop of the coefficient block of a shard, before redundant rows are
+    left out, stop None meaning the end of the block
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    shard: Shard
+    start: int = 0
+    stop: Optional[int] = None
+
+
+class SolverStatistics(BaseModel):
+    """
+    Counts the work done by the solvers it is passed to, summed over all calls
+    """
+
+    rows: int = 0  # solved, counted once however often they are started
+    iterations: int = 0  # Aberth iterations, summed over rows
+    warm_starts: int = 0
+    cold_starts: int = 0
+    restarts: int = 0  # warm-started rows that were started again cold
+    fallbacks: int = 0  # rows handed to find_roots
+    newton_iterations: int = 0  # Newton iterations of find_roots, summed over roots
+    newton_restarts: int = 0  # starting points find_roots gave up on
+    dropped: int = 0  # polynomials whose roots couldn't be found
+
+    @computed_field  # type: ignore
+    @property
+    def iterations_per_row(self) -> float:
+        return self.iterations / max(self.rows, 1)
+
+    def add(self, other: "SolverStatistics"):
+        for field in type(self).model_fields:
+            setattr(self, field, getattr(self, field) + getattr(other, field))
+
+
+class Job(BaseModel):
+    """
+    A numbered chunk of a sharded generation. Ids are positions in the Plan, so they
+    stay the same wherever and whenever the plan is made from the same parameters.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    id: int
+    chunk: Chunk
+    rows: int  # of the coefficient block, before redundant rows are left out
+
+
+class Plan(BaseModel):
+    """
+    The jobs of a sharded generation and everything they depend on, so that the
+    jobs solved on different machines fit together
+    """
+
+    max_length: int
+    max_degree: int
+    family: str = "length"
+    rows_per_job: int
+    split_by_constant: bool
+    fingerprint: str  # solver_fingerprint() of the machine that made the plan
+    jobs: list[Job]
+
+    def shards(self) -> list[Shard]:
+        return list(dict.fromkeys(job.chunk.shard for job in self.jobs))
+
+
+class JobResult(BaseModel):
+    """
+    Written next to the roots of a job once they are complete
+    """
+
+    id: int
+    fingerprint: str
+    polynomials: int  # solved, after redundant rows are left out
+    dropped: int  # polynomials whose roots couldn't be found
+    sha256: str  # of the .npy file of the roots
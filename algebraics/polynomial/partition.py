@@ -3,19 +3,33 @@ from typing import Generator
 
 
 def enumerate_partitions(n: int, length: int) -> Generator[list[int]]:
-    def enumerate_partitions_recursive(
-        n: int, current_partition: list[int]
-    ) -> Generator[list[int]]:
-        if len(current_partition) == length:
-            if n == 0:
-                yield list(current_partition)
-            return
-        for i in range(1, n + 1):
-            current_partition.append(i)
-            yield from enumerate_partitions_recursive(n - i, current_partition)
-            current_partition.pop()
+    """
+    Yields every way of writing n as an ordered sum of length positive integers, in
+    lexicographic order. Every partition is a new list.
+    """
+    if length == 0:
+        if n == 0:
+            yield []
+        return
+    if n < length:
+        return
 
-    yield from enumerate_partitions_recursive(n, [])
+    # Start from the smallest partition and step to the next one in place: the
+    # rightmost part that can grow while leaving at least 1 for every part after
+    # it does, and the parts after it start over from 1, the last taking the rest
+    partition = [1] * (length - 1) + [n - length + 1]
+    while True:
+        yield list(partition)
+        suffix = 0
+        for position in range(length - 2, -1, -1):
+            suffix += partition[position + 1]
+            if suffix > length - position - 1:
+                partition[position] += 1
+                partition[position + 1 :] = [1] * (length - position - 1)
+                partition[-1] = suffix - (length - position - 1)
+                break
+        else:
+            return
 
 
 def generate_signs(partition: list[int]) -> Generator[list[int]]:
@@ -1,25 +1,36 @@
 import random
-from typing import Generator, Optional
+from typing import Generator, Optional, Sequence
 
-from dynaconf import Dynaconf
+from algebraics.config import settings
+from algebraics.polynomial.enumeration import enumerate_polynomial_blocks
+from algebraics.polynomial.families import get_family
+from algebraics.polynomial.models import ComplexPolynomial, RootSet, SolverStatistics
 
-from algebraics.polynomial.models import ComplexPolynomial, RootSet
-from algebraics.polynomial.partition import enumerate_partitions, generate_signs
 
-settings = Dynaconf(settings_files=["settings.toml"], environments=False)
-
-
-def random_complex(scale=2):
+def random_complex(scale=2, rng=random):
     return complex(
-        random.uniform(-scale / 2, scale / 2), random.uniform(-scale / 2, scale / 2)
+        rng.uniform(-scale / 2, scale / 2), rng.uniform(-scale / 2, scale / 2)
     )
 
 
-def find_roots(polynomial: ComplexPolynomial) -> Optional[RootSet]:
+def find_roots(
+    polynomial: ComplexPolynomial,
+    rng=random,
+    seeds: Sequence[complex] = (),
+    statistics: Optional[SolverStatistics] = None,
+) -> Optional[RootSet]:
     """
     find_roots will take a polynomial of degree N and attempt to find all N roots.
     By the fundamental theorem of algebra, we know that such a polynomial has N roots.
+
+    Starting points are taken from seeds first, typically approximations of the roots
+    from another solver, and drawn from rng once those run out; pass a seeded
+    random.Random for reproducible results.
+
+    The Newton iterations and the starting points given up on are added to
+    statistics when it is given.
     """
+    seeds = list(seeds)[::-1]
     roots: list[complex] = []
     original_length = polynomial.length
 
@@ -30,10 +41,10 @@ def find_roots(polynomial: ComplexPolynomial) -> Optional[RootSet]:
             break
 
         success = False
-        for _ in range(settings.POLYNOMIAL.MAX_ROOT_INITIALIZATIONS):
-            candidate_root = random_complex()
+        for initialization in range(settings.POLYNOMIAL.MAX_ROOT_INITIALIZATIONS):
+            candidate_root = seeds.pop() if seeds else random_complex(rng=rng)
 
-            for _ in range(settings.POLYNOMIAL.MAX_ATTEMPTS_PER_ROOT):
+            for attempt in range(settings.POLYNOMIAL.MAX_ATTEMPTS_PER_ROOT):
                 previous_root = candidate_root
                 polynomial_value, derivative_value, power_term = (
                     complex(0, 0),
@@ -55,9 +66,13 @@ def find_roots(polynomial: ComplexPolynomial) -> Optional[RootSet]:
                     success = True
                     break
 
+            if statistics is not None:
+                statistics.newton_iterations += attempt + 1
             if success:
                 break
 
+        if statistics is not None:
+            statistics.newton_restarts += initialization + (not success)
         if success:
             # The candidate root is an approximate root according to the stopping criteria
             roots.append(candidate_root)
@@ -72,62 +87,31 @@ def find_roots(polynomial: ComplexPolynomial) -> Optional[RootSet]:
 
 
 def enumerate_polynomials_sjbrooks(max_length: int) -> Generator[ComplexPolynomial]:
-    # The length of a polynomial is a sum of the absolute values of its coefficients.
-    # Iterating over integer polynomials of a particular length gives us a way to enumerate
-    # these polynomials, since there are finitely many such polynomials.
-    for length in range(2, max_length + 1):
-        positive_coefficients = [0] * length
-
-        # These bits encode the coefficients of a polynomial in a very specific kind of way.
-        for bits in range((1 << (length - 1)) - 1, -1, -2):
-            positive_coefficients[0] = 0
-            degree = 0
-
-            for shift in range(length - 2, -1, -1):
-                if (bits >> shift) & 1 == 1:
-                    positive_coefficients[degree] += 1
-                else:
-                    degree += 1
-                    positive_coefficients[degree] = 0
-
-                if degree <= 0:
-                    continue
-
-                num_non_zero = sum(
-                    1 for i in range(degree + 1) if positive_coefficients[i] != 0
-                )
-                if num_non_zero == 0:
-                    continue
-
-                for sign_bits in range((1 << (num_non_zero - 1)) - 1, -1, -1):
-                    coefficients = [complex(0, 0)] * (degree + 1)
-                    sign_pointer = 1
-
-                    for c in range(degree, -1, -1):
-                        coef = complex(float(positive_coefficients[c]), 0)
-                        if positive_coefficients[c] == 0 or c == degree:
-                            coefficients[c] = complex(coef, 0)
-                        else:
-                            coefficients[c] = (
-                                complex(coef, 0)
-                                if sign_bits & sign_pointer
-                                else complex(-coef, 0)
-                            )
-                            sign_pointer <<= 1
-                    yield ComplexPolynomial(coefficients=coefficients, length=length)
+    """
+    Yields the polynomials of degree 1 and up with a positive leading coefficient
+    whose length plus degree plus one is 3 to max_length, by that sum then degree,
+    the polynomials of the sjbrooks family.
+    """
+    family = get_family("sjbrooks")
+    for shard in family.shards(max_length, max_length):
+        for coefficients in family.rows(shard).tolist():
+            yield ComplexPolynomial(
+                coefficients=[complex(x, 0) for x in coefficients],
+                length=shard.length,
+            )
 
 
 def enumerate_polynomials(
-    max_length: int, max_degree: int
+    max_length: int, max_degree: int, start: int = 0, stop: Optional[int] = None
 ) -> Generator[ComplexPolynomial]:
-    for length in range(max_length + 1):
-        for degree in range(2, max_degree + 1):
-            for partition in enumerate_partitions(length + degree + 1, degree + 1):
-                coefficients = [x - 1 for x in partition]
-                if coefficients and coefficients[-1] != 0:
-                    yield from map(
-                        lambda coefs: ComplexPolynomial(
-                            coefficients=[complex(x, 0) for x in coefs], length=length
-                        ),
-                        generate_signs(coefficients),
-                    )
+    """
+    Yields every polynomial of degree 2 to max_degree and length up to max_length,
+    by length then degree, or only polynomials start, ..., stop - 1 of them;
+    count_polynomials gives their number.
+    """
+    for block in enumerate_polynomial_blocks(max_length, max_degree, start, stop):
+        for coefficients in block.coefficients.tolist():
+            yield ComplexPolynomial(
+                coefficients=[complex(x, 0) for x in coefficients],
+                length=block.length,
+            )
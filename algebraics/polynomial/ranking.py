@@ -0,0 +1,131 @@
+import numpy as np
+
+from algebraics.config import settings
+from algebraics.polynomial.families import get_family
+from algebraics.polynomial.models import Shard
+from algebraics.polynomial.reduction import is_redundant
+
+# Polynomials are identified by their rank, the index of their row among the rows of
+# their shard as its family enumerates them, which PolynomialFamily.rows turns back
+# into coefficients
+RANK_DTYPE = np.uint32
+
+# Rank of the roots that can't be traced back to their polynomial
+UNKNOWN_RANK = np.iinfo(RANK_DTYPE).max
+
+# Largest relative residual |p(z)| / sum |a_i z^i| of the roots of a polynomial
+RESIDUAL_TOLERANCE = 1e-4
+
+# Rows of roots checked at once when looking for the polynomials dropped by a solver
+ALIGNMENT_WINDOW = 4096
+
+
+def residuals(coefficients: np.ndarray, roots: np.ndarray) -> np.ndarray:
+    """
+    The largest relative residual of the roots of every row at the polynomial of the
+    row, which is tiny when they are its roots and not when they are the roots of
+    another polynomial
+    """
+    z = roots.astype(np.complex128)
+    value = np.zeros_like(z)
+    scale = np.zeros(z.shape)
+    for n in range(coefficients.shape[1] - 1, -1, -1):
+        coefficient = coefficients[:, n, None].astype(np.float64)
+        value = value * z + coefficient
+        scale = scale * np.abs(z) + np.abs(coefficient)
+    # Every term vanishes where the scale does, like at the root 0 of a_0 = 0
+    relative = np.divide(np.abs(value), scale, out=np.zeros(z.shape), where=scale > 0)
+    return relative.max(axis=1)
+
+
+def align_rows(coefficients: np.ndarray, roots: np.ndarray) -> np.ndarray:
+    """
+    The row of coefficients every row of roots belongs to, when the roots are those
+    of the coefficients in order, less the rows a solver dropped. Rows whose
+    polynomial can't be found are marked -1. Polynomials with the same roots, like
+    p and -p, can't be told apart, so a row can get the first of them when the
+    other was dropped.
+    """
+    positions = np.arange(len(roots), dtype=np.int64)
+    dropped = len(coefficients) - len(roots)
+    offset = 0
+    start = 0
+    while start < len(roots):
+        stop = min(start + ALIGNMENT_WINDOW, len(roots))
+        matches = (
+            residuals(coefficients[start + offset : stop + offset], roots[start:stop])
+            <= RESIDUAL_TOLERANCE
+        )
+        if matches.all():
+            positions[start:stop] += offset
+            start = stop
+            continue
+
+        # Rows were dropped before the first mismatch, it belongs to a later one
+        first = start + int(np.argmin(matches))
+        positions[start:first] += offset
+        candidates = coefficients[first + offset + 1 : first + dropped + 1]
+        others = np.broadcast_to(roots[first], (len(candidates), roots.shape[1]))
+        found = np.flatnonzero(residuals(candidates, others) <= RESIDUAL_TOLERANCE)
+        if len(found):
+            offset += int(found[0]) + 1
+            positions[first] += offset
+        else:
+            positions[first] = -1
+        start = first + 1
+    return positions
+
+
+def polynomial_ranks(shard: Shard, roots: np.ndarray) -> np.ndarray:
+    """
+    The rank of the polynomial of every row of the (N, degree) roots of a shard, as
+    the generations solve it, or UNKNOWN_RANK for the rows whose polynomial can't be
+    found. Every polynomial is normally solved, in which case the ranks are those of
+    the rows that are solved, and the polynomials dropped by the solvers are found
+    from the residuals of the roots otherwise.
+    """
+    family = get_family(shard.family)
+    if family.count(shard) >= UNKNOWN_RANK:
+        raise ValueError(f"Shard {shard.name()} has too many polynomials to rank")
+    coefficients = family.rows(shard)
+    ranks = np.arange(len(coefficients), dtype=RANK_DTYPE)
+    if settings.POLYNOMIAL.SKIP_REDUNDANT:
+        kept = ~is_redundant(coefficients)
+        coefficients, ranks = coefficients[kept], ranks[kept]
+    if len(ranks) == len(roots):
+        return ranks
+
+    positions = align_rows(coefficients, roots)
+    return np.where(positions >= 0, ranks[positions], UNKNOWN_RANK).astype(RANK_DTYPE)
+
+
+def decode_polynomial(shard: Shard, rank: int) -> np.ndarray:
+    """
+    The coefficients a_0, ..., a_n of the polynomial of a shard with the rank
+    """
+    return get_family(shard.family).rows(shard, rank, rank + 1)[0]
+
+
+def format_polynomial(coefficients: np.ndarray) -> str:
+    """
+    The polynomial with the coefficients a_0, ..., a_n written out, e.g.
+    x^3 - 2x + 1
+    """
+    terms = []
+    for power in range(len(coefficients) - 1, -1, -1):
+        coefficient = int(coefficients[power])
+        if coefficient == 0:
+            continue
+        sign = "-" if coefficient < 0 else "+"
+        magnitude = abs(coefficient)
+        if power == 0:
+            term = str(magnitude)
+        else:
+            variable = "x" if power == 1 else f"x^{power}"
+            term = variable if magnitude == 1 else f"{magnitude}{variable}"
+        terms.append((sign, term))
+    if not terms:
+        return "0"
+    first_sign, first_term = terms[0]
+    text = ("-" if first_sign == "-" else "") + first_term
+    return text + "".join(f" {sign} {term}" for sign, term in terms[1:])
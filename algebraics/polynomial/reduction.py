@@ -0,0 +1,153 @@
+import math
+from typing import Optional, Sequence
+
+import numpy as np
+
+from algebraics.polynomial.enumeration import count_block
+
+# Polynomials are lists of integer coefficients a_0, ..., a_n without trailing
+# zeros, the zero polynomial being the empty list
+
+
+def trim(polynomial: list[int]) -> list[int]:
+    while polynomial and polynomial[-1] == 0:
+        polynomial = polynomial[:-1]
+    return polynomial
+
+
+def derivative(polynomial: list[int]) -> list[int]:
+    return trim([n * a for n, a in enumerate(polynomial)][1:])
+
+
+def subtract(left: list[int], right: list[int]) -> list[int]:
+    size = max(len(left), len(right))
+    left = left + [0] * (size - len(left))
+    right = right + [0] * (size - len(right))
+    return trim([a - b for a, b in zip(left, right)])
+
+
+def primitive(polynomial: list[int]) -> list[int]:
+    """
+    Divides polynomial by its content, making its leading coefficient positive
+    """
+    divisor = math.gcd(*polynomial) * (1 if polynomial[-1] > 0 else -1)
+    return [a // divisor for a in polynomial]
+
+
+def pseudo_remainder(numerator: list[int], denominator: list[int]) -> list[int]:
+    """
+    The remainder of lead^k numerator divided by denominator, which stays integer
+    """
+    remainder = list(numerator)
+    lead = denominator[-1]
+    while len(remainder) >= len(denominator):
+        shift = len(remainder) - len(denominator)
+        factor = remainder[-1]
+        remainder = [lead * a for a in remainder]
+        for n, a in enumerate(denominator):
+            remainder[shift + n] -= factor * a
+        remainder = trim(remainder[:-1])
+    return remainder
+
+
+def exact_quotient(numerator: list[int], denominator: list[int]) -> list[int]:
+    """
+    numerator / denominator, for a primitive denominator that divides numerator, in
+    which case the quotient has integer coefficients by Gauss's lemma
+    """
+    remainder = list(numerator)
+    quotient = [0] * (len(numerator) - len(denominator) + 1)
+    for shift in range(len(quotient) - 1, -1, -1):
+        factor = remainder[shift + len(denominator) - 1] // denominator[-1]
+        quotient[shift] = factor
+        for n, a in enumerate(denominator):
+            remainder[shift + n] -= factor * a
+    return trim(quotient)
+
+
+def gcd(left: list[int], right: list[int]) -> list[int]:
+    """
+    Primitive greatest common divisor with the primitive remainder sequence
+    """
+    left = primitive(left)
+    while right:
+        left, right = primitive(right), pseudo_remainder(left, primitive(right))
+    return left
+
+
+def square_free_decomposition(
+    coefficients: Sequence[int],
+) -> list[tuple[list[int], int]]:
+    """
+    Splits a polynomial with integer coefficients into square-free factors with
+    Yun's algorithm, returning (factor, multiplicity) pairs where every factor is a
+    primitive integer polynomial of positive degree. The roots of the polynomial are
+    the roots of the factors, each repeated multiplicity times, and all of them are
+    simple roots of their factor.
+    """
+    polynomial = primitive(trim([int(a) for a in coefficients]))
+    common = gcd(polynomial, derivative(polynomial))
+    remaining = exact_quotient(polynomial, common)
+    difference = subtract(
+        exact_quotient(derivative(polynomial), common), derivative(remaining)
+    )
+
+    factors = []
+    multiplicity = 1
+    while len(remaining) > 1:
+        factor = gcd(remaining, difference)
+        remaining = exact_quotient(remaining, factor)
+        difference = subtract(exact_quotient(difference, factor), derivative(remaining))
+        if len(factor) > 1:
+            factors.append((factor, multiplicity))
+        multiplicity += 1
+    return factors
+
+
+def trailing_zeros(coefficients: np.ndarray) -> np.ndarray:
+    """
+    The multiplicity of the root at 0 of every row, the number of leading zero
+    coefficients a_0, a_1, ...
+    """
+    return np.argmax(coefficients != 0, axis=1)
+
+
+def content(coefficients: np.ndarray) -> np.ndarray:
+    return np.gcd.reduce(np.abs(coefficients.astype(np.int64)), axis=1)
+
+
+def is_redundant(coefficients: np.ndarray) -> np.ndarray:
+    """
+    Flags the rows whose roots are those of a simpler polynomial: a zero constant
+    term makes them x q(x) and a content above 1 makes them a multiple of another
+    polynomial of the enumeration.
+    """
+    return (coefficients[:, 0] == 0) | (content(coefficients) > 1)
+
+
+def mobius(n: int) -> int:
+    result = 1
+    for p in range(2, n + 1):
+        if n % p == 0:
+            n //= p
+            if n % p == 0:
+                return 0
+            result = -result
+    return result
+
+
+def count_irredundant(length: int, degree: int, constant: Optional[int] = None) -> int:
+    """
+    The number of rows of coefficient_block(length, degree, constant) that are not
+    redundant. The content of a polynomial divides its length and constant term, and
+    the polynomials with content divisible by g are g times those of length / g,
+    so Möbius inversion counts the primitive ones.
+    """
+    constants = range(1, length + 1) if constant is None else [constant]
+    return sum(
+        mobius(g) * count_block(length // g, degree, c // g)
+        for c in constants
+        if 0 < c <= length
+        for g in range(1, math.gcd(length, c) + 1)
+        if math.gcd(length, c) % g == 0
+    )
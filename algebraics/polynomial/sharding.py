@@ -0,0 +1,232 @@
+import os
+from functools import partial
+from pathlib import Path
+from typing import Generator, Optional
+
+import numpy as np
+
+from algebraics.config import settings
+from algebraics.polynomial.cache import (
+    NpyWriter,
+    file_sha256,
+    shard_filename,
+    solver_fingerprint,
+    temporary_path,
+)
+from algebraics.polynomial.families import get_family
+from algebraics.polynomial.generation import (
+    enumerate_chunks,
+    enumerate_shards,
+    map_ordered,
+    solve_chunk_instrumented,
+)
+from algebraics.polynomial.models import Job, JobResult, Plan
+
+
+def make_plan(
+    max_length: int, max_degree: int, rows_per_job: int, family: str = "length"
+) -> Plan:
+    """
+    Splits the shards of the polynomial family into jobs of at most rows_per_job
+    rows, numbered in the order stream_roots solves them
+    """
+    jobs = []
+    for shard in enumerate_shards(max_length, max_degree, family):
+        for chunk in enumerate_chunks(shard, rows_per_job):
+            stop = chunk.stop
+            if stop is None:
+                stop = get_family(family).count(shard)
+            jobs.append(Job(id=len(jobs), chunk=chunk, rows=stop - chunk.start))
+    return Plan(
+        max_length=max_length,
+        max_degree=max_degree,
+        family=family,
+        rows_per_job=rows_per_job,
+        split_by_constant=settings.GENERATION.SPLIT_BY_CONSTANT,
+        fingerprint=solver_fingerprint(),
+        jobs=jobs,
+    )
+
+
+def write_atomically(path: Path, text: str):
+    temporary = temporary_path(path)
+    temporary.write_text(text)
+    os.replace(temporary, path)
+
+
+def create_plan(directory: str | Path, plan: Plan) -> Plan:
+    """
+    Writes plan to directory, or checks that the plan already there is the same, so
+    that every machine can run this before solving its part
+    """
+    path = Path(directory) / "plan.json"
+    if path.exists():
+        existing = load_plan(directory)
+        if existing != plan:
+            raise ValueError(f"{path} holds another plan")
+        return existing
+    path.parent.mkdir(parents=True, exist_ok=True)
+    (path.parent / "jobs").mkdir(exist_ok=True)
+    write_atomically(path, plan.model_dump_json())
+    return plan
+
+
+def load_plan(directory: str | Path) -> Plan:
+    return Plan.model_validate_json((Path(directory) / "plan.json").read_text())
+
+
+def roots_path(directory: str | Path, id: int) -> Path:
+    return Path(directory) / "jobs" / f"{id:06d}.npy"
+
+
+def result_path(directory: str | Path, id: int) -> Path:
+    return Path(directory) / "jobs" / f"{id:06d}.json"
+
+
+def load_result(directory: str | Path, id: int) -> Optional[JobResult]:
+    try:
+        return JobResult.model_validate_json(result_path(directory, id).read_text())
+    except FileNotFoundError:
+        return None
+
+
+def select_jobs(
+    plan: Plan, ranges: Optional[str] = None, part: Optional[str] = None
+) -> list[Job]:
+    """
+    The jobs of plan picked by ranges, e.g. "0-99,150", and by part, e.g. "2/8" for
+    every eighth job starting with job 2, all jobs when neither is given
+    """
+    jobs = plan.jobs
+    if ranges is not None:
+        ids = set()
+        for item in ranges.split(","):
+            first, _, last = item.partition("-")
+            ids.update(range(int(first), int(last or first) + 1))
+        jobs = [job for job in jobs if job.id in ids]
+    if part is not None:
+        index, count = (int(number) for number in part.split("/"))
+        if not 0 <= index < count:
+            raise ValueError(f"Part {part} is not one of {count} parts")
+        jobs = [job for job in jobs if job.id % count == index]
+    return jobs
+
+
+def solve_job(directory: Path, job: Job) -> JobResult:
+    """
+    Solves job into its .npy file, then writes the JSON result that marks it done.
+    Both are written under names of their own and renamed into place, so a job
+    interrupted or solved twice at once, even by machines whose processes have the
+    same ids, never leaves a partial result, and the roots only depend on the job.
+    """
+    roots, statistics = solve_chunk_instrumented(job.chunk)
+    path = roots_path(directory, job.id)
+    writer = NpyWriter(path, roots.dtype, job.chunk.shard.degree)
+    writer.write(roots)
+    writer.commit()
+    result = JobResult(
+        id=job.id,
+        fingerprint=solver_fingerprint(),
+        polynomials=statistics.polynomials,
+        dropped=statistics.solver.dropped,
+        sha256=file_sha256(path),
+    )
+    write_atomically(result_path(directory, job.id), result.model_dump_json())
+    return result
+
+
+def solve_jobs(
+    directory: str | Path, jobs: list[Job], workers: Optional[int] = None
+) -> Generator[JobResult]:
+    """
+    Solves the jobs of the plan in directory that aren't done yet, yielding their
+    results as they complete. Several machines can solve disjoint jobs of the same
+    directory at once.
+    """
+    directory = Path(directory)
+    plan = load_plan(directory)
+    if plan.fingerprint != solver_fingerprint():
+        raise ValueError(
+            f"The plan in {directory} was made with other [polynomial] settings"
+        )
+    pending = [job for job in jobs if load_result(directory, job.id) is None]
+    yield from map_ordered(partial(solve_job, directory), pending, workers)
+
+
+def job_status(directory: str | Path) -> tuple[int, int]:
+    """
+    The number of jobs done and the number of jobs of the plan in directory
+    """
+    plan = load_plan(directory)
+    done = sum(result_path(directory, job.id).exists() for job in plan.jobs)
+    return done, len(plan.jobs)
+
+
+def verify_job(directory: str | Path, plan: Plan, job: Job) -> Optional[str]:
+    """
+    Why the result of job doesn't belong to plan, None when it does
+    """
+    result = load_result(directory, job.id)
+    if result is None:
+        return "missing"
+    if result.fingerprint != plan.fingerprint:
+        return "solved with other settings"
+    path = roots_path(directory, job.id)
+    if not path.exists() or file_sha256(path) != result.sha256:
+        return "roots don't match their checksum"
+    roots = np.load(path, mmap_mode="r")
+    expected = (result.polynomials - result.dropped, job.chunk.shard.degree)
+    if roots.shape != expected:
+        return f"roots of shape {roots.shape} instead of {expected}"
+    if not np.isfinite(roots).all():
+        return "roots that aren't finite"
+    return None
+
+
+def verify(directory: str | Path) -> dict[int, str]:
+    """
+    The problems of the jobs in directory by job id, empty when all jobs are done
+    and intact
+    """
+    plan = load_plan(directory)
+    problems = {}
+    for job in plan.jobs:
+        problem = verify_job(directory, plan, job)
+        if problem is not None:
+            problems[job.id] = problem
+    return problems
+
+
+def merge(directory: str | Path, output: str | Path) -> Plan:
+    """
+    Concatenates the jobs in directory into one .npy file per shard in output, next
+    to a dataset.json holding the plan, which Dataset opens. Raises ValueError when
+    verify finds problems.
+    """
+    problems = verify(directory)
+    if problems:
+        details = ", ".join(
+            f"job {id} {problem}" for id, problem in list(problems.items())[:10]
+        )
+        raise ValueError(
+            f"{len(problems)} jobs can't be merged, verify lists them all ({details})"
+        )
+
+    plan = load_plan(directory)
+    output = Path(output)
+    output.mkdir(parents=True, exist_ok=True)
+    # The jobs of every shard are consecutive
+    writer = None
+    for job in plan.jobs:
+        shard = job.chunk.shard
+        roots = np.load(roots_path(directory, job.id), mmap_mode="r")
+        if job.chunk.start == 0:
+            if writer is not None:
+                writer.commit()
+            path = output / shard_filename(shard)
+            writer = NpyWriter(path, roots.dtype, shard.degree)
+        writer.write(roots)
+    if writer is not None:
+        writer.commit()
+    write_atomically(output / "dataset.json", plan.model_dump_json())
+    return plan
@@ -0,0 +1,115 @@
+import random
+from typing import Optional
+
+import numpy as np
+
+from algebraics.polynomial.batch import solve_rows
+from algebraics.polynomial.models import SolverStatistics
+
+# Elements of the group generated by p(-x), -p(x) and the reversal x^n p(1/x), as
+# (mirror, negate, reverse) flags. All three are involutions and commute.
+TRANSFORMS = [
+    (mirror, negate, reverse)
+    for mirror in (False, True)
+    for negate in (False, True)
+    for reverse in (False, True)
+]
+
+
+def transform_coefficients(
+    coefficients: np.ndarray, mirror: bool, negate: bool, reverse: bool
+) -> np.ndarray:
+    """
+    Applies p(-x), -p(x) and x^n p(1/x) to every row of an (N, degree + 1) block
+    """
+    degree = coefficients.shape[1] - 1
+    if mirror:
+        coefficients = coefficients * np.where(np.arange(degree + 1) % 2, -1, 1)
+    if negate:
+        coefficients = -coefficients
+    if reverse:
+        coefficients = coefficients[:, ::-1]
+    return coefficients
+
+
+def transform_roots(roots: np.ndarray, mirror: np.ndarray, reverse: np.ndarray):
+    """
+    Maps the roots of p to the roots of its image in place: p(-x) negates them,
+    the reversal inverts them and -p(x) leaves them as they are. The flags are per
+    row.
+    """
+    roots[mirror] *= -1
+    roots[reverse] = 1 / roots[reverse]
+
+
+def canonical_rows(
+    coefficients: np.ndarray, constant: Optional[int] = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Finds the orbit of every row of a block under TRANSFORMS and returns, per row,
+    the index of the canonical row of its orbit (the one that comes first in the
+    block) and the index in TRANSFORMS of the transform that maps one to the other.
+
+    The block has to hold every polynomial of its length and degree, optionally with
+    |a_0| == constant, or a subset closed under these transforms like the one
+    without redundant polynomials. Mirroring and negating keep a polynomial in such
+    a block, the reversal only does when a_0 != 0 and, for a block split by
+    constant, when |a_n| == |a_0|, so the other rows are not reversed. On any other
+    block, such as a chunk of the rows of a shard, the transforms that map a row out
+    of the block are skipped for it.
+    """
+    rows = coefficients.shape[0]
+    reversible = coefficients[:, 0] != 0
+    if constant is not None:
+        reversible &= np.abs(coefficients[:, -1]) == np.abs(coefficients[:, 0])
+
+    # Every image is a row of the block, found by looking its bytes up among the
+    # sorted rows of the block
+    row_bytes = np.dtype((np.void, coefficients.shape[1] * coefficients.itemsize))
+    keys = np.ascontiguousarray(coefficients).view(row_bytes).ravel()
+    order = np.argsort(keys)
+    sorted_keys = keys[order]
+
+    candidates = np.empty((len(TRANSFORMS), rows), dtype=np.int64)
+    for index, (mirror, negate, reverse) in enumerate(TRANSFORMS):
+        image = transform_coefficients(coefficients, mirror, negate, False)
+        if reverse:
+            image = np.where(reversible[:, None], image[:, ::-1], image)
+        image = np.ascontiguousarray(image, dtype=coefficients.dtype)
+        image_keys = image.view(row_bytes).ravel()
+        position = np.minimum(np.searchsorted(sorted_keys, image_keys), rows - 1)
+        found = sorted_keys[position] == image_keys
+        candidates[index] = np.where(found, order[position], np.arange(rows))
+
+    transform = np.argmin(candidates, axis=0)
+    return candidates[transform, np.arange(rows)], transform
+
+
+def solve_symmetric_block(
+    coefficients: np.ndarray,
+    length: int,
+    constant: Optional[int] = None,
+    rng=random,
+    statistics: Optional[SolverStatistics] = None,
+) -> np.ndarray:
+    """
+    Same result as solve_block, up to the order of the roots of every row, but only
+    solves the canonical row of every orbit of canonical_rows and derives the roots of
+    the other rows from it.
+    """
+    canonical, transform = canonical_rows(coefficients, constant)
+    representatives = np.flatnonzero(canonical == np.arange(len(canonical)))
+    solved_roots, solved = solve_rows(
+        coefficients[representatives], length, rng, statistics
+    )
+
+    slot = np.empty(len(canonical), dtype=np.int64)
+    slot[representatives] = np.arange(len(representatives))
+    slot = slot[canonical]
+
+    roots = solved_roots[slot]
+    flags = np.array(TRANSFORMS)[transform]
+    transform_roots(roots, flags[:, 0], flags[:, 2])
+    if statistics is not None:
+        statistics.dropped += int(np.count_nonzero(~solved[slot]))
+    return roots[solved[slot]]
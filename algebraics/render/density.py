@@ -0,0 +1,355 @@
+from pathlib import Path
+from typing import Literal, Optional
+
+import numpy as np
+from pydantic import BaseModel
+
+from algebraics.polynomial.cache import RootCache, solver_fingerprint
+from algebraics.polynomial.models import Shard
+from algebraics.render.headless import (
+    KERNEL_MEAN,
+    TEXTURE_SIZE,
+    View,
+    kernel,
+    pixel_coordinates,
+    write_image,
+)
+from algebraics.render.stream import run_pipeline
+from algebraics.ui.models import CircleColumns
+
+# Ratio between the white energy and the dimmest energy the log tone mapping still
+# tells apart from black at an exposure of 1
+LOG_RANGE = 1000.0
+
+# Percentile of the lit pixels taken as white, so that a few pixels where roots pile
+# up do not darken the rest of the image
+WHITE_PERCENTILE = 99.5
+
+
+class ToneMapping(BaseModel):
+    """
+    Maps accumulated energy to [0, 1]. Energy is divided by the white energy of the
+    image and multiplied by exposure, then compressed logarithmically over
+    LOG_RANGE or raised to 1 / gamma.
+    """
+
+    mode: Literal["log", "gamma"] = "log"
+    exposure: float = 1.0
+    gamma: float = 2.2
+
+
+class HistogramSource(BaseModel):
+    """
+    What the histograms of a DensityGrid were counted from, so that histograms kept
+    in a directory are only read back for the same polynomials and solver
+    """
+
+    view: View
+    max_length: int
+    max_degree: int
+    family: str
+    solver: str
+
+
+class DensityGrid:
+    """
+    Float32 histograms counting the circles of every degree and radius over the
+    pixels of a view, circles being binned by the pixel of their center. Palettes,
+    radius scales and tone mappings are applied to the histograms afterwards without
+    going back to the circles: circles smaller than a pixel leave the energy of a
+    sub-pixel circle, larger ones are convolved with the falloff kernel averaged
+    over their pixel. Circles centered outside the view are left out. It is a
+    CircleSink, and remembers the shards it was given so they can be added
+    incrementally.
+    Radii are the powers of 0.5 generate_circles gives, and histograms are keyed by
+    (degree, exponent).
+    """
+
+    def __init__(self, view: View, directory: Optional[str | Path] = None):
+        self.view = view
+        # Histograms are memory-mapped to files in directory when one is given
+        self.directory = None if directory is None else Path(directory)
+        self.histograms: dict[tuple[int, int], np.ndarray] = {}
+        self.shards: set[Shard] = set()
+
+    def histogram(self, degree: int, exponent: int) -> np.ndarray:
+        key = (degree, exponent)
+        if key not in self.histograms:
+            shape = (self.view.height, self.view.width)
+            if self.directory is None:
+                self.histograms[key] = np.zeros(shape, dtype=np.float32)
+            else:
+                self.histograms[key] = np.lib.format.open_memmap(
+                    self.directory / f"{degree}_{exponent}.npy",
+                    mode="w+",
+                    dtype=np.float32,
+                    shape=shape,
+                )
+        return self.histograms[key]
+
+    def write(self, shard: Shard, circles: CircleColumns):
+        self.add(circles)
+        self.shards.add(shard)
+
+    def add(self, circles: CircleColumns):
+        x, y, _ = pixel_coordinates(circles, self.view, 1.0)
+        column = np.floor(x).astype(np.int64)
+        row = np.floor(y).astype(np.int64)
+        inside = (
+            (column >= 0)
+            & (column < self.view.width)
+            & (row >= 0)
+            & (row < self.view.height)
+        )
+        flat = row[inside] * self.view.width + column[inside]
+        exponents = np.rint(-np.log2(circles.radius[inside])).astype(np.int64)
+        degrees = circles.degree[inside].astype(np.int64)
+        keys = degrees * 256 + exponents
+        for key in np.unique(keys):
+            selected = keys == key
+            # Counts per pixel hit, which needs no full-size temporary
+            pixels, hits = np.unique(flat[selected], return_inverse=True)
+            histogram = self.histogram(int(key) // 256, int(key) % 256).reshape(-1)
+            histogram[pixels] += np.bincount(hits)
+
+    def close(self):
+        for histogram in self.histograms.values():
+            if isinstance(histogram, np.memmap):
+                histogram.flush()
+
+    def energy(
+        self, palette: np.ndarray, radius_scale: float, smoothing: float = 0.0
+    ) -> np.ndarray:
+        """
+        The (height, width, 3) float32 color energy of the histograms mixed with
+        palette and drawn with radius_scale, blurred by a Gaussian of smoothing
+        pixels when it is positive
+        """
+        shape = (self.view.height, self.view.width, 3)
+        energy = np.zeros(shape, dtype=np.float32)
+        exponents = sorted({exponent for _, exponent in self.histograms})
+        for exponent in exponents:
+            colored = np.zeros(shape, dtype=np.float32)
+            for (degree, other), histogram in self.histograms.items():
+                if other == exponent:
+                    colored += histogram[:, :, None] * palette[degree][None, None, :]
+            extent = 0.5**exponent * radius_scale / self.view.pixel_size
+            if extent < 1:
+                energy += KERNEL_MEAN * (2 * extent) ** 2 * colored
+            else:
+                energy += convolve(colored, kernel_weights(extent, shape))
+        return blur(energy, smoothing) if smoothing > 0 else energy
+
+    def save(self, directory: str | Path, source: Optional[HistogramSource] = None):
+        """
+        Writes the histograms and the view to directory, for load to read back, and
+        source when it is given, for load_source to read back
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for (degree, exponent), histogram in self.histograms.items():
+            if self.directory != directory:
+                np.save(directory / f"{degree}_{exponent}.npy", histogram)
+        (directory / "view.json").write_text(self.view.model_dump_json())
+        if source is not None:
+            (directory / "source.json").write_text(source.model_dump_json())
+        self.close()
+
+    @classmethod
+    def load(cls, directory: str | Path) -> "DensityGrid":
+        directory = Path(directory)
+        grid = cls(View.model_validate_json((directory / "view.json").read_text()))
+        for path in directory.glob("*.npy"):
+            degree, exponent = path.stem.split("_")
+            grid.histograms[int(degree), int(exponent)] = np.load(path, mmap_mode="r")
+        return grid
+
+    @staticmethod
+    def load_source(directory: str | Path) -> Optional[HistogramSource]:
+        path = Path(directory) / "source.json"
+        if not path.exists():
+            return None
+        return HistogramSource.model_validate_json(path.read_text())
+
+
+def kernel_weights(extent: float, shape: tuple[int, ...]) -> np.ndarray:
+    """
+    The falloff kernel of a circle of extent pixels averaged over every pixel, what
+    splat_tile leaves on average wherever the center falls in its pixel, cut to what
+    can reach an image of shape. Pixels are sampled finely enough to resolve the
+    texels of the kernel.
+    """
+    reach = min(int(np.ceil(extent + 0.5)), max(shape[:2]))
+    samples = max(1, int(np.ceil(TEXTURE_SIZE / (2 * extent))))
+    jitter = (np.arange(samples) + 0.5) / samples - 0.5
+    offsets = (np.arange(-reach, reach + 1)[:, None] + jitter[None, :]).ravel()
+    u, v = np.meshgrid(offsets / extent, offsets / extent)
+    size = 2 * reach + 1
+    weights = kernel(u, v).reshape(size, samples, size, samples).mean(axis=(1, 3))
+    return weights.astype(np.float32)
+
+
+def fast_length(length: int) -> int:
+    """
+    The smallest product of powers of 2, 3 and 5 at least length, which FFTs are
+    fast on
+    """
+    best = 1 << max(0, length - 1).bit_length()
+    power_of_5 = 1
+    while power_of_5 < best:
+        power_of_3 = power_of_5
+        while power_of_3 < best:
+            candidate = power_of_3
+            while candidate < length:
+                candidate *= 2
+            best = min(best, candidate)
+            power_of_3 *= 3
+        power_of_5 *= 5
+    return best
+
+
+def convolve(image: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """
+    Convolves the first two axes of image with the odd-sized square weights,
+    keeping the size of image. Sparse images are splatted pixel by pixel, small
+    kernels are summed shift by shift and the rest goes through FFTs.
+    """
+    height, width = image.shape[:2]
+    reach = weights.shape[0] // 2
+    lit = np.flatnonzero(image.reshape(height * width, -1).any(axis=1))
+    if len(lit) * weights.size <= height * width:
+        result = np.zeros_like(image)
+        for row, column in zip(*np.divmod(lit, width)):
+            top, left = max(row - reach, 0), max(column - reach, 0)
+            bottom = min(row + reach + 1, height)
+            right = min(column + reach + 1, width)
+            result[top:bottom, left:right] += (
+                weights[
+                    top - row + reach : bottom - row + reach,
+                    left - column + reach : right - column + reach,
+                    None,
+                ]
+                * image[row, column]
+            )
+        return result
+
+    if reach <= 3:
+        padded = np.pad(image, [(reach, reach), (reach, reach), (0, 0)])
+        result = np.zeros_like(image)
+        for dy in range(-reach, reach + 1):
+            for dx in range(-reach, reach + 1):
+                result += (
+                    weights[dy + reach, dx + reach]
+                    * padded[
+                        reach - dy : reach - dy + height,
+                        reach - dx : reach - dx + width,
+                    ]
+                )
+        return result
+
+    shape = (fast_length(height + 2 * reach), fast_length(width + 2 * reach))
+    product = (
+        np.fft.rfft2(image, s=shape, axes=(0, 1))
+        * np.fft.rfft2(weights, s=shape)[:, :, None]
+    )
+    full = np.fft.irfft2(product, s=shape, axes=(0, 1))
+    return full[reach : reach + height, reach : reach + width].astype(np.float32)
+
+
+def blur(image: np.ndarray, sigma: float) -> np.ndarray:
+    """
+    Separable Gaussian blur of the first two axes of image, truncated at 3 sigma
+    """
+    reach = max(1, int(np.ceil(3 * sigma)))
+    weights = np.exp(-0.5 * (np.arange(-reach, reach + 1) / sigma) ** 2)
+    weights /= weights.sum()
+    for axis in (0, 1):
+        padded = np.pad(
+            image,
+            [(reach, reach) if a == axis else (0, 0) for a in range(image.ndim)],
+        )
+        size = image.shape[axis]
+        image = sum(
+            weight * padded.take(np.arange(offset, offset + size), axis=axis)
+            for offset, weight in enumerate(weights)
+        )
+    return image.astype(np.float32)
+
+
+def tone_map(energy: np.ndarray, tone_mapping: ToneMapping) -> np.ndarray:
+    """
+    Maps (height, width, 3) energy to 8-bit RGB with tone_mapping
+    """
+    brightest = energy.max(axis=-1)
+    lit = brightest[brightest > 0]
+    if len(lit) == 0:
+        return np.zeros(energy.shape, dtype=np.uint8)
+
+    white = float(np.percentile(lit, WHITE_PERCENTILE))
+
+    exposed = tone_mapping.exposure * energy / white
+    if tone_mapping.mode == "log":
+        mapped = np.log1p(exposed * LOG_RANGE) / np.log1p(LOG_RANGE)
+    else:
+        mapped = np.clip(exposed, 0, 1) ** (1 / tone_mapping.gamma)
+    return (np.clip(mapped, 0, 1) * 255).round().astype(np.uint8)
+
+
+def render_density_image(
+    max_length: int,
+    max_degree: int,
+    palette: np.ndarray,
+    view: View,
+    output: str | Path,
+    radius_scale: float = 10.0,
+    tone_mapping: ToneMapping = ToneMapping(),
+    smoothing: float = 0.0,
+    histograms: Optional[str | Path] = None,
+    chunk_rows: Optional[int] = None,
+    workers: Optional[int] = None,
+    cache: Optional[RootCache] = None,
+    family: str = "length",
+):
+    """
+    Renders the density of the circles to output. The histograms are streamed from
+    run_pipeline, memory-mapped to the histograms directory when one is given. When
+    that directory already holds the histograms of view they are read back instead,
+    provided they were counted from the same polynomials and solver, so other palettes, radius scales and tone mappings can be tried without solving
+    anything. Unlike the histograms, the energy of the whole image is computed in
+    memory, as the kernels, the blur and the white point of the tone mapping all
+    span it, which takes 12 bytes per pixel and bounds the size of the image.
+    """
+    source = HistogramSource(
+        view=view,
+        max_length=max_length,
+        max_degree=max_degree,
+        family=family,
+        solver=solver_fingerprint(),
+    )
+    if histograms is not None and (Path(histograms) / "view.json").exists():
+        grid = DensityGrid.load(histograms)
+        if grid.view != view:
+            raise ValueError(f"The histograms in {histograms} are of another view")
+        if DensityGrid.load_source(histograms) != source:
+            raise ValueError(
+                f"The histograms in {histograms} are of other polynomials or of "
+                "another solver"
+            )
+    else:
+        if histograms is not None:
+            Path(histograms).mkdir(parents=True, exist_ok=True)
+        grid = DensityGrid(view, histograms)
+        run_pipeline(
+            max_length,
+            max_degree,
+            grid,
+            chunk_rows,
+            workers,
+            cache,
+            family=family,
+        )
+        if histograms is not None:
+            grid.save(histograms, source)
+
+    energy = grid.energy(palette, radius_scale, smoothing)
+    write_image(output, tone_map(energy, tone_mapping))
@@ -0,0 +1,416 @@
+import math
+import os
+import struct
+import tempfile
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Generator, Optional
+
+import imageio.v3 as iio
+import numpy as np
+from pydantic import BaseModel
+
+from algebraics.polynomial.cache import open_root_cache
+from algebraics.polynomial.generation import generate_roots
+from algebraics.ui.circle import COLORS, DEFAULT_COLOR, build_palette, falloff
+from algebraics.ui.circle import generate_circles as generate_shard_circles
+from algebraics.ui.models import CircleColumns
+
+# Resolution of the texture GLWidget draws circles with, which the kernel mimics
+TEXTURE_SIZE = 256
+
+
+def kernel(u: np.ndarray, v: np.ndarray) -> np.ndarray:
+    """
+    The falloff texture sampled at u, v in [-1, 1], in [0, 1]. Values are floored
+    like the 8-bit texture, which makes the kernel vanish outside the inscribed
+    circle instead of leaving a faint square.
+    """
+    texels = falloff(
+        (u + 1) / 2 * TEXTURE_SIZE, (v + 1) / 2 * TEXTURE_SIZE, TEXTURE_SIZE
+    )
+    return np.where((np.abs(u) <= 1) & (np.abs(v) <= 1), np.floor(texels) / 255, 0)
+
+
+# Mean of the kernel over its square, the energy a sub-pixel circle leaves
+KERNEL_MEAN = float(
+    np.mean(kernel(*np.meshgrid(*[np.linspace(-1, 1, TEXTURE_SIZE)] * 2)))
+)
+
+# Upper bound on the number of kernel samples evaluated at once
+MAX_SAMPLES = 1 << 22
+
+# Rows of an image encoded at a time by write_image
+STRIP_ROWS = 256
+
+
+class View(BaseModel):
+    """
+    Maps the complex plane to an image of width x height square pixels, with the
+    top left corner of the image at (x_min, y_max)
+    """
+
+    x_min: float
+    y_max: float
+    pixel_size: float
+    width: int
+    height: int
+
+    @classmethod
+    def centered(
+        cls, center: complex, half_width: float, width: int, height: int
+    ) -> "View":
+        pixel_size = 2 * half_width / width
+        return cls(
+            x_min=center.real - half_width,
+            y_max=center.imag + pixel_size * height / 2,
+            pixel_size=pixel_size,
+            width=width,
+            height=height,
+        )
+
+
+class Tile(BaseModel):
+    column: int
+    row: int
+    x: int
+    y: int
+    width: int
+    height: int
+
+
+def generate_circles(
+    max_length: int, max_degree: int, family: str = "length"
+) -> CircleColumns:
+    """
+    Runs the same enumeration, solver and root cache as GLWidget and returns every
+    circle of the polynomial family as a single batch
+    """
+    return CircleColumns.concatenate(
+        [
+            generate_shard_circles(shard, roots)
+            for shard, roots in generate_roots(
+                max_length, max_degree, cache=open_root_cache(), family=family
+            )
+        ]
+    )
+
+
+def default_palette(max_degree: int) -> np.ndarray:
+    """
+    The palette GLWidget starts with after generating up to max_degree
+    """
+    colors = {k: v for k, v in COLORS.items() if k <= max_degree}
+    return build_palette(colors, DEFAULT_COLOR)
+
+
+def enumerate_tiles(view: View, tile_size: int) -> list[Tile]:
+    return [
+        Tile(
+            column=column,
+            row=row,
+            x=column * tile_size,
+            y=row * tile_size,
+            width=min(tile_size, view.width - column * tile_size),
+            height=min(tile_size, view.height - row * tile_size),
+        )
+        for row in range(math.ceil(view.height / tile_size))
+        for column in range(math.ceil(view.width / tile_size))
+    ]
+
+
+def pixel_coordinates(
+    circles: CircleColumns, view: View, radius_scale: float
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Returns the centers of circles in (fractional) image pixels, and their radii in
+    pixels after scaling by radius_scale
+    """
+    x = (circles.x_center.astype(np.float64) - view.x_min) / view.pixel_size
+    y = (view.y_max - circles.y_center.astype(np.float64)) / view.pixel_size
+    extent = circles.radius.astype(np.float64) * radius_scale / view.pixel_size
+    return x, y, extent
+
+
+def bucket_by_tile(
+    circles: CircleColumns, view: View, tile_size: int, radius_scale: float
+) -> dict[tuple[int, int], np.ndarray]:
+    """
+    Assigns every circle to each tile its square overlaps, in one pass over the
+    circles, and returns the indices of the circles of every non-empty tile
+    """
+    x, y, extent = pixel_coordinates(circles, view, radius_scale)
+    columns = math.ceil(view.width / tile_size)
+    rows = math.ceil(view.height / tile_size)
+
+    first_column = np.floor((x - extent) / tile_size).astype(np.int64)
+    last_column = np.floor((x + extent) / tile_size).astype(np.int64)
+    first_row = np.floor((y - extent) / tile_size).astype(np.int64)
+    last_row = np.floor((y + extent) / tile_size).astype(np.int64)
+    on_image = (
+        (last_column >= 0)
+        & (first_column < columns)
+        & (last_row >= 0)
+        & (first_row < rows)
+    )
+    indices = np.flatnonzero(on_image)
+    first_column = np.clip(first_column[indices], 0, columns - 1)
+    last_column = np.clip(last_column[indices], 0, columns - 1)
+    first_row = np.clip(first_row[indices], 0, rows - 1)
+    last_row = np.clip(last_row[indices], 0, rows - 1)
+
+    # Circles overlapping several tiles are repeated once per tile
+    spans = last_column - first_column + 1
+    counts = spans * (last_row - first_row + 1)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    tile_columns = np.repeat(first_column, counts) + offsets % np.repeat(spans, counts)
+    tile_rows = np.repeat(first_row, counts) + offsets // np.repeat(spans, counts)
+    tile_ids = tile_rows * columns + tile_columns
+    members = np.repeat(indices, counts)
+
+    if len(members) == 0:
+        return {}
+    order = np.argsort(tile_ids, kind="stable")
+    tile_ids, members = tile_ids[order], members[order]
+    boundaries = np.flatnonzero(np.diff(tile_ids)) + 1
+    return {
+        (int(group[0]) % columns, int(group[0]) // columns): members[start:stop]
+        for group, start, stop in zip(
+            np.split(tile_ids, boundaries),
+            np.concatenate([[0], boundaries]),
+            np.concatenate([boundaries, [len(members)]]),
+        )
+    }
+
+
+def splat_tile(
+    circles: CircleColumns,
+    palette: np.ndarray,
+    view: View,
+    tile: Tile,
+    radius_scale: float,
+) -> np.ndarray:
+    """
+    Renders circles into a (height, width, 3) float32 tile by adding up their
+    falloff kernels, like GLWidget does with GL_ONE, GL_ONE blending. Circles smaller
+    than a pixel deposit the energy of their kernel in the pixel of their center.
+    """
+    x, y, extent = pixel_coordinates(circles, view, radius_scale)
+    x, y = x - tile.x, y - tile.y
+    colors = palette[circles.degree].astype(np.float64)
+    pixels = tile.width * tile.height
+    accumulation = np.zeros((pixels, 3))
+
+    def deposit(flat: np.ndarray, weights: np.ndarray, color: np.ndarray):
+        for channel in range(3):
+            accumulation[:, channel] += np.bincount(
+                flat, weights=weights * color[:, channel], minlength=pixels
+            )
+
+    small = extent < 1
+    column = np.floor(x[small]).astype(np.int64)
+    row = np.floor(y[small]).astype(np.int64)
+    inside = (column >= 0) & (column < tile.width) & (row >= 0) & (row < tile.height)
+    deposit(
+        row[inside] * tile.width + column[inside],
+        KERNEL_MEAN * (2 * extent[small][inside]) ** 2,
+        colors[small][inside],
+    )
+
+    def window(centers: np.ndarray, reach: int, size: int) -> np.ndarray:
+        # Kernels wider than the tile are only evaluated on the tile itself
+        if 2 * reach + 1 < size:
+            return np.floor(centers)[:, None] + np.arange(-reach, reach + 1)[None, :]
+        return np.broadcast_to(np.arange(size), (len(centers), size))
+
+    # Circles share their radius shard by shard, so the large ones come in a few
+    # groups whose kernels cover the same number of pixels
+    large = np.flatnonzero(~small)
+    for size in np.unique(extent[large]):
+        group = large[extent[large] == size]
+        reach = int(math.ceil(size))
+        samples = min(2 * reach + 1, tile.width) * min(2 * reach + 1, tile.height)
+        chunk = max(1, MAX_SAMPLES // samples)
+        for start in range(0, len(group), chunk):
+            members = group[start : start + chunk]
+            columns = window(x[members], reach, tile.width)[:, None, :]
+            rows = window(y[members], reach, tile.height)[:, :, None]
+            u = (columns + 0.5 - x[members][:, None, None]) / size
+            v = (rows + 0.5 - y[members][:, None, None]) / size
+            weight = kernel(u, v)
+
+            members_of = np.arange(len(members))[:, None, None]
+            columns, rows, weight, members_of = np.broadcast_arrays(
+                columns, rows, weight, members_of
+            )
+            inside = (
+                (weight > 0)
+                & (columns >= 0)
+                & (columns < tile.width)
+                & (rows >= 0)
+                & (rows < tile.height)
+            )
+            deposit(
+                (rows[inside] * tile.width + columns[inside]).astype(np.int64),
+                weight[inside],
+                colors[members][members_of[inside]],
+            )
+
+    return accumulation.reshape(tile.height, tile.width, 3).astype(np.float32)
+
+
+def render_tile(
+    circles: CircleColumns,
+    palette: np.ndarray,
+    view: View,
+    tile: Tile,
+    radius_scale: float,
+) -> np.ndarray:
+    """
+    splat_tile, saturated to an 8-bit RGB tile like the GL framebuffer
+    """
+    accumulation = splat_tile(circles, palette, view, tile, radius_scale)
+    return (np.clip(accumulation, 0, 1) * 255).round().astype(np.uint8)
+
+
+def render_bucketed_tiles(
+    circles: CircleColumns,
+    buckets: dict[tuple[int, int], np.ndarray],
+    palette: np.ndarray,
+    view: View,
+    tiles: list[Tile],
+    radius_scale: float,
+    workers: Optional[int] = None,
+) -> Generator[tuple[Tile, np.ndarray]]:
+    """
+    Yields each of tiles as soon as it is rendered, in no particular order, given
+    the buckets bucket_by_tile assigned the circles to. At most two tiles per
+    worker are in flight, which bounds memory regardless of the size of the image.
+    """
+    empty = CircleColumns.concatenate([])
+
+    def tile_circles(tile: Tile) -> CircleColumns:
+        members = buckets.get((tile.column, tile.row))
+        return empty if members is None else circles.select(members)
+
+    if workers == 1:
+        for tile in tiles:
+            yield (
+                tile,
+                render_tile(tile_circles(tile), palette, view, tile, radius_scale),
+            )
+        return
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        limit = 2 * workers
+        pending = {}
+        for tile in tiles:
+            if len(pending) >= limit:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield pending.pop(future), future.result()
+            future = executor.submit(
+                render_tile, tile_circles(tile), palette, view, tile, radius_scale
+            )
+            pending[future] = tile
+        for future in list(pending):
+            yield pending.pop(future), future.result()
+
+
+def render_tiles(
+    circles: CircleColumns,
+    palette: np.ndarray,
+    view: View,
+    radius_scale: float,
+    tile_size: int,
+    workers: Optional[int] = None,
+) -> Generator[tuple[Tile, np.ndarray]]:
+    """
+    Yields every tile of the image as soon as it is rendered, see
+    render_bucketed_tiles
+    """
+    yield from render_bucketed_tiles(
+        circles,
+        bucket_by_tile(circles, view, tile_size, radius_scale),
+        palette,
+        view,
+        enumerate_tiles(view, tile_size),
+        radius_scale,
+        workers,
+    )
+
+
+def render_image(
+    circles: CircleColumns,
+    palette: np.ndarray,
+    view: View,
+    output: str | Path,
+    radius_scale: float = 10.0,
+    tile_size: int = 1024,
+    workers: Optional[int] = None,
+):
+    """
+    Renders circles tile by tile into a memory-mapped 8-bit image next to output,
+    so only the tiles in flight are ever held as floats, then writes it with
+    write_image.
+    """
+    output = Path(output)
+    with tempfile.TemporaryDirectory(dir=output.parent) as directory:
+        image = np.lib.format.open_memmap(
+            os.path.join(directory, "image.npy"),
+            mode="w+",
+            dtype=np.uint8,
+            shape=(view.height, view.width, 3),
+        )
+        for tile, pixels in render_tiles(
+            circles, palette, view, radius_scale, tile_size, workers
+        ):
+            image[tile.y : tile.y + tile.height, tile.x : tile.x + tile.width] = pixels
+        image.flush()
+        write_image(output, image)
+        del image
+
+
+def png_chunk(tag: bytes, data: bytes) -> bytes:
+    return (
+        struct.pack(">I", len(data))
+        + tag
+        + data
+        + struct.pack(">I", zlib.crc32(tag + data))
+    )
+
+
+def write_image(output: str | Path, image: np.ndarray):
+    """
+    Writes the (height, width, 3) 8-bit image, typically memory-mapped, in the
+    format given by the extension of output. PNGs are encoded STRIP_ROWS rows at a
+    time, so only a strip of the image is ever in memory. Other formats go through
+    imageio, which holds the whole image.
+    """
+    output = Path(output)
+    if output.suffix.lower() != ".png":
+        iio.imwrite(output, np.asarray(image))
+        return
+
+    height, width, _ = image.shape
+    compressor = zlib.compressobj()
+    with open(output, "wb") as file:
+        file.write(b"\x89PNG\r\n\x1a\n")
+        # 8-bit RGB, not interlaced
+        header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+        file.write(png_chunk(b"IHDR", header))
+        for start in range(0, height, STRIP_ROWS):
+            strip = np.asarray(image[start : start + STRIP_ROWS]).reshape(-1, width * 3)
+            # Every row is stored with the Sub filter, the difference to the pixel
+            # on its left, which compresses smooth images well
+            rows = np.empty((len(strip), 1 + width * 3), dtype=np.uint8)
+            rows[:, 0] = 1
+            rows[:, 1:4] = strip[:, :3]
+            np.subtract(strip[:, 3:], strip[:, :-3], out=rows[:, 4:])
+            data = compressor.compress(rows.tobytes())
+            if data:
+                file.write(png_chunk(b"IDAT", data))
+        file.write(png_chunk(b"IDAT", compressor.flush()))
+        file.write(png_chunk(b"IEND", b""))
@@ -0,0 +1,193 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Optional
+
+import imageio.v3 as iio
+import numpy as np
+from pydantic import BaseModel
+
+from algebraics.polynomial.cache import (
+    open_root_cache,
+    solver_fingerprint,
+    temporary_path,
+)
+from algebraics.polynomial.generation import generate_roots
+from algebraics.polynomial.models import Shard
+from algebraics.render.headless import (
+    View,
+    bucket_by_tile,
+    enumerate_tiles,
+    render_bucketed_tiles,
+)
+from algebraics.ui.circle import generate_circles
+from algebraics.ui.models import CircleColumns
+
+# Number of tiles written between two saves of the manifest of a level
+CHECKPOINT_TILES = 64
+
+
+class ExportSummary(BaseModel):
+    written: int = 0
+    kept: int = 0
+    removed: int = 0
+
+
+def generate_labelled_circles(
+    max_length: int, max_degree: int, family: str = "length"
+) -> tuple[CircleColumns, np.ndarray, list[Shard]]:
+    """
+    Like headless.generate_circles, but also returns the shards and, for every
+    circle, the index of the shard it comes from
+    """
+    shards, batches = [], []
+    for shard, roots in generate_roots(
+        max_length, max_degree, cache=open_root_cache(), family=family
+    ):
+        shards.append(shard)
+        batches.append(generate_circles(shard, roots))
+    labels = np.repeat(
+        np.arange(len(shards), dtype=np.int32), [len(batch) for batch in batches]
+    )
+    return CircleColumns.concatenate(batches), labels, shards
+
+
+def level_view(center: complex, half_width: float, tile_size: int, level: int) -> View:
+    """
+    The square view of a level, 2^level tiles across
+    """
+    size = tile_size << level
+    return View.centered(center, half_width, size, size)
+
+
+def render_key(
+    center: complex,
+    half_width: float,
+    tile_size: int,
+    radius_scale: float,
+    palette: np.ndarray,
+) -> str:
+    """
+    Identifies everything besides the circles that influences the pixels of a tile
+    """
+    config = {
+        "center": [center.real, center.imag],
+        "half_width": half_width,
+        "tile_size": tile_size,
+        "radius_scale": radius_scale,
+        "palette": hashlib.sha256(np.ascontiguousarray(palette)).hexdigest(),
+        "solver": solver_fingerprint(),
+    }
+    return json.dumps(config, sort_keys=True)
+
+
+def tile_digests(
+    labels: np.ndarray,
+    shards: list[Shard],
+    buckets: dict[tuple[int, int], np.ndarray],
+    key: str,
+) -> dict[tuple[int, int], str]:
+    """
+    Digests the content of every non-empty tile as the number of circles each shard
+    contributes to it. Solved shards never change, so a tile whose digest is the
+    same as when it was written doesn't need to be rendered again.
+    """
+    names = [shard.name() for shard in shards]
+    digests = {}
+    for tile, members in buckets.items():
+        ids, counts = np.unique(labels[members], return_counts=True)
+        content = ";".join(f"{names[i]}={n}" for i, n in zip(ids, counts))
+        digests[tile] = hashlib.sha256(f"{key}|{content}".encode()).hexdigest()[:16]
+    return digests
+
+
+def tile_path(output: Path, level: int, column: int, row: int) -> Path:
+    return output / str(level) / str(column) / f"{row}.png"
+
+
+def read_manifest(path: Path) -> dict[str, str]:
+    try:
+        return json.loads(path.read_text())
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def write_manifest(path: Path, manifest: dict[str, str]):
+    temporary = temporary_path(path)
+    temporary.write_text(json.dumps(manifest, sort_keys=True))
+    os.replace(temporary, path)
+
+
+def export_pyramid(
+    circles: CircleColumns,
+    labels: np.ndarray,
+    shards: list[Shard],
+    palette: np.ndarray,
+    output: str | Path,
+    levels: int,
+    center: complex = 0j,
+    half_width: float = 2.0,
+    tile_size: int = 256,
+    radius_scale: float = 10.0,
+    workers: Optional[int] = None,
+) -> ExportSummary:
+    """
+    Writes a z/x/y pyramid of PNG tiles for levels 0 to levels into output, where
+    level z is 2^z tiles across and covers the square of the given half width around
+    center. Empty tiles are not written.
+
+    Every level keeps a manifest with the digest of each tile it holds, so exporting
+    into an existing pyramid, whether it was interrupted or generated with other
+    parameters, only renders the tiles whose content changed and removes the ones
+    that became empty.
+    """
+    output = Path(output)
+    key = render_key(center, half_width, tile_size, radius_scale, palette)
+    summary = ExportSummary()
+
+    for level in range(levels + 1):
+        view = level_view(center, half_width, tile_size, level)
+        buckets = bucket_by_tile(circles, view, tile_size, radius_scale)
+        digests = tile_digests(labels, shards, buckets, key)
+
+        (output / str(level)).mkdir(parents=True, exist_ok=True)
+        manifest_path = output / str(level) / "manifest.json"
+        manifest = read_manifest(manifest_path)
+
+        for name in list(manifest):
+            column, row = map(int, name.split("/"))
+            if (column, row) in digests:
+                continue
+            tile_path(output, level, column, row).unlink(missing_ok=True)
+            del manifest[name]
+            summary.removed += 1
+
+        stale = []
+        for tile in enumerate_tiles(view, tile_size):
+            digest = digests.get((tile.column, tile.row))
+            if digest is None:
+                continue
+            path = tile_path(output, level, tile.column, tile.row)
+            if manifest.get(f"{tile.column}/{tile.row}") == digest and path.exists():
+                summary.kept += 1
+            else:
+                stale.append(tile)
+
+        for tile, pixels in render_bucketed_tiles(
+            circles, buckets, palette, view, stale, radius_scale, workers
+        ):
+            path = tile_path(output, level, tile.column, tile.row)
+            path.parent.mkdir(exist_ok=True)
+            temporary = temporary_path(path)
+            iio.imwrite(temporary, pixels, extension=".png")
+            os.replace(temporary, path)
+
+            manifest[f"{tile.column}/{tile.row}"] = digests[(tile.column, tile.row)]
+            summary.written += 1
+            if summary.written % CHECKPOINT_TILES == 0:
+                write_manifest(manifest_path, manifest)
+
+        write_manifest(manifest_path, manifest)
+
+    return summary
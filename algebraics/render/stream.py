@@ -0,0 +1,259 @@
+import os
+import tempfile
+from pathlib import Path
+from typing import Generator, Optional, Protocol
+
+import numpy as np
+
+from algebraics.config import settings
+from algebraics.instrumentation.statistics import PipelineStatistics, stage
+from algebraics.polynomial.cache import NpyWriter, RootCache
+from algebraics.polynomial.generation import stream_roots
+from algebraics.polynomial.models import Shard
+from algebraics.render.headless import (
+    View,
+    bucket_by_tile,
+    enumerate_tiles,
+    splat_tile,
+    write_image,
+)
+from algebraics.ui.circle import generate_circles
+from algebraics.ui.models import CircleColumns
+from algebraics.ui.store import CircleStore
+
+COLUMNS = {
+    "x_center": np.float32,
+    "y_center": np.float32,
+    "radius": np.float32,
+    "degree": np.uint8,
+}
+
+
+class CircleSink(Protocol):
+    """
+    Receives the circles of a pipeline chunk by chunk, the chunks of a shard coming
+    one after the other. A chunk is released once it is written, so a sink only
+    keeps what it needs of it.
+    """
+
+    def write(self, shard: Shard, circles: CircleColumns): ...
+
+    def close(self): ...
+
+
+class StoreSink:
+    """
+    Adds the circles of every shard to a CircleStore once all of its chunks arrived
+    """
+
+    def __init__(self, store: CircleStore):
+        self.store = store
+        self.shard: Optional[Shard] = None
+        self.batches: list[CircleColumns] = []
+
+    def write(self, shard: Shard, circles: CircleColumns):
+        if shard != self.shard:
+            self.close()
+            self.shard = shard
+        self.batches.append(circles)
+
+    def close(self):
+        if self.shard is not None:
+            self.store.add(self.shard, CircleColumns.concatenate(self.batches))
+        self.shard, self.batches = None, []
+
+
+class CircleFileSink:
+    """
+    Appends the circles to one .npy file per column in directory, which
+    load_circle_file maps back into memory
+    """
+
+    def __init__(self, directory: str | Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.writers = {
+            name: NpyWriter(self.directory / f"{name}.npy", dtype, None)
+            for name, dtype in COLUMNS.items()
+        }
+
+    def write(self, shard: Shard, circles: CircleColumns):
+        for name, writer in self.writers.items():
+            writer.write(getattr(circles, name))
+
+    def close(self):
+        for writer in self.writers.values():
+            writer.commit()
+
+
+def load_circle_file(directory: str | Path) -> CircleColumns:
+    return CircleColumns(
+        **{
+            name: np.load(Path(directory) / f"{name}.npy", mmap_mode="r")
+            for name in COLUMNS
+        }
+    )
+
+
+class AccumulationSink:
+    """
+    Splats every chunk of circles into a float32 accumulation buffer of the view
+    right away, tile by tile, the way render_tile would splat them all at once.
+    The buffer is memory-mapped to a file in directory when one is given.
+    """
+
+    def __init__(
+        self,
+        view: View,
+        palette: np.ndarray,
+        radius_scale: float = 10.0,
+        tile_size: int = 1024,
+        directory: Optional[str | Path] = None,
+    ):
+        self.view = view
+        self.palette = palette
+        self.radius_scale = radius_scale
+        self.tile_size = tile_size
+        self.tiles = {
+            (tile.column, tile.row): tile for tile in enumerate_tiles(view, tile_size)
+        }
+        shape = (view.height, view.width, 3)
+        if directory is None:
+            self.accumulation = np.zeros(shape, dtype=np.float32)
+        else:
+            self.accumulation = np.lib.format.open_memmap(
+                os.path.join(directory, "accumulation.npy"),
+                mode="w+",
+                dtype=np.float32,
+                shape=shape,
+            )
+
+    def write(self, shard: Shard, circles: CircleColumns):
+        buckets = bucket_by_tile(circles, self.view, self.tile_size, self.radius_scale)
+        for key, members in buckets.items():
+            tile = self.tiles[key]
+            self.accumulation[
+                tile.y : tile.y + tile.height, tile.x : tile.x + tile.width
+            ] += splat_tile(
+                circles.select(members),
+                self.palette,
+                self.view,
+                tile,
+                self.radius_scale,
+            )
+
+    def close(self):
+        if isinstance(self.accumulation, np.memmap):
+            self.accumulation.flush()
+
+    def tiles_8bit(self) -> Generator[tuple[slice, slice, np.ndarray]]:
+        """
+        Yields the rows, columns and 8-bit pixels of every tile, saturated like the
+        GL framebuffer
+        """
+        for tile in self.tiles.values():
+            rows = slice(tile.y, tile.y + tile.height)
+            columns = slice(tile.x, tile.x + tile.width)
+            pixels = np.clip(self.accumulation[rows, columns], 0, 1) * 255
+            yield rows, columns, pixels.round().astype(np.uint8)
+
+
+def stream_circles(
+    max_length: int,
+    max_degree: int,
+    chunk_rows: Optional[int] = None,
+    workers: Optional[int] = None,
+    cache: Optional[RootCache] = None,
+    statistics: Optional[PipelineStatistics] = None,
+    family: str = "length",
+) -> Generator[tuple[Shard, CircleColumns]]:
+    """
+    Yields the circles of stream_roots chunk by chunk, STREAM_CHUNK_ROWS polynomials
+    at a time by default
+    """
+    if chunk_rows is None:
+        chunk_rows = settings.GENERATION.STREAM_CHUNK_ROWS
+    for shard, roots in stream_roots(
+        max_length,
+        max_degree,
+        chunk_rows,
+        workers,
+        cache,
+        statistics=statistics,
+        family=family,
+    ):
+        with stage(statistics, "circles"):
+            circles = generate_circles(shard, np.asarray(roots))
+        if statistics is not None:
+            statistics.circles += len(circles)
+        yield shard, circles
+
+
+def run_pipeline(
+    max_length: int,
+    max_degree: int,
+    sink: CircleSink,
+    chunk_rows: Optional[int] = None,
+    workers: Optional[int] = None,
+    cache: Optional[RootCache] = None,
+    statistics: Optional[PipelineStatistics] = None,
+    family: str = "length",
+) -> int:
+    """
+    Enumerates, solves and turns into circles the polynomials of the parameters
+    one chunk at a time, writing every chunk to sink before the next one is made.
+    Besides what sink keeps, memory stays bounded by the chunk size whatever the
+    parameters. Returns the number of circles written.
+    """
+    count = 0
+    for shard, circles in stream_circles(
+        max_length, max_degree, chunk_rows, workers, cache, statistics, family
+    ):
+        sink.write(shard, circles)
+        count += len(circles)
+    sink.close()
+    return count
+
+
+def render_streamed_image(
+    max_length: int,
+    max_degree: int,
+    palette: np.ndarray,
+    view: View,
+    output: str | Path,
+    radius_scale: float = 10.0,
+    tile_size: int = 1024,
+    chunk_rows: Optional[int] = None,
+    workers: Optional[int] = None,
+    cache: Optional[RootCache] = None,
+    family: str = "length",
+):
+    """
+    Counterpart of render_image that never holds all circles: they are splatted
+    into a memory-mapped accumulation buffer next to output as they are generated,
+    which is saturated into a memory-mapped image at the end and written with
+    write_image.
+    """
+    output = Path(output)
+    with tempfile.TemporaryDirectory(dir=output.parent) as directory:
+        sink = AccumulationSink(view, palette, radius_scale, tile_size, directory)
+        run_pipeline(
+            max_length,
+            max_degree,
+            sink,
+            chunk_rows,
+            workers,
+            cache,
+            family=family,
+        )
+        image = np.lib.format.open_memmap(
+            os.path.join(directory, "image.npy"),
+            mode="w+",
+            dtype=np.uint8,
+            shape=(view.height, view.width, 3),
+        )
+        for rows, columns, pixels in sink.tiles_8bit():
+            image[rows, columns] = pixels
+        image.flush()
+        write_image(output, image)
+        del image, sink
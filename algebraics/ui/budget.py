@@ -0,0 +1,51 @@
+import math
+
+
+class FrameBudget:
+    """
+    The number of circles a frame can draw within seconds while the view moves. It
+    starts at circles and is adjusted after every budgeted frame from the time that
+    frame took, moving halfway (geometrically) towards what the frame says fits so
+    that a single slow frame doesn't throw it off.
+    """
+
+    # Never budget fewer circles than this, so a stalled frame can't blank the view
+    MIN_CIRCLES = 1000
+
+    def __init__(self, seconds: float, circles: int):
+        self.seconds = seconds
+        self.circles = circles
+
+    def record(self, seconds: float, drawn: int):
+        if drawn == 0 or seconds <= 0:
+            return
+        fits = drawn * self.seconds / seconds
+        self.circles = max(int(math.sqrt(self.circles * fits)), self.MIN_CIRCLES)
+
+
+def budget_strides(counts: list[int], budget: int, max_stride: int) -> list[int]:
+    """
+    The stride to draw the circles of every shard with, one circle in stride, given
+    the visible circle counts of the shards ordered from the largest circles to the
+    smallest. Shards are drawn whole while they fit in budget, and the shards left
+    share a stride that brings the total close to budget. When that stride would be
+    larger than max_stride, the shards with the smallest circles that don't fit
+    even then get a stride of 0 and aren't drawn.
+    """
+    strides = []
+    remaining = budget
+    for position, count in enumerate(counts):
+        if count <= remaining:
+            strides.append(1)
+            remaining -= count
+            continue
+        rest = counts[position:]
+        stride = math.ceil(sum(rest) / max(remaining, 1))
+        if stride <= max_stride:
+            return strides + [stride] * len(rest)
+        for count in rest:
+            drawn = math.ceil(count / max_stride)
+            strides.append(max_stride if drawn <= remaining else 0)
+            remaining = max(remaining - drawn, 0)
+        break
+    return strides
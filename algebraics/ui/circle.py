@@ -1,40 +1,100 @@
-from typing import Generator
+from typing import Optional
 
-from OpenGL.GL import glColor3f, glTexCoord2f, glVertex2f
+import numpy as np
 
-from algebraics.polynomial.models import RootSet
-from algebraics.ui.models import Circle
+from algebraics.polynomial.models import Shard
+from algebraics.ui.models import CircleColumns
 
+COLORS = {
+    1: [1.0, 0.0, 0.0],
+    2: [0.0, 1.0, 0.0],
+    3: [0.0, 0.0, 1.0],
+    4: [0.7, 0.7, 0.0],
+    5: [1.0, 0.6, 0.0],
+    6: [0.0, 1.0, 1.0],
+    7: [1.0, 0.0, 1.0],
+    8: [0.6, 0.6, 0.6],
+}
 
-def generate_circles(root_set: RootSet) -> Generator[Circle]:
-    for root in root_set.roots:
-        circle = Circle(
-            x_center=root.real,
-            y_center=root.imag,
-            radius=(0.5 ** (root_set.length + 1 + root_set.degree)),
-        )
-        yield circle
+DEFAULT_COLOR = [1.0, 1.0, 1.0]
 
 
-def draw_circle(circle: Circle, radius_scale=10.0):
-    glColor3f(circle.red, circle.green, circle.blue)
-    glTexCoord2f(0, 0)
-    glVertex2f(
-        circle.x_center - circle.radius * radius_scale,
-        circle.y_center - circle.radius * radius_scale,
+def falloff(x: np.ndarray, y: np.ndarray, texture_size: int) -> np.ndarray:
+    """
+    The radial falloff every circle is drawn with, in [0, 255], at texel coordinates
+    x and y of a texture_size x texture_size texture
+    """
+    texture_center = texture_size / 2.0
+    intensity = ((texture_size / 2.0) ** 2) / (
+        1 + (x - texture_center) ** 2 + (y - texture_center) ** 2
     )
-    glTexCoord2f(1, 0)
-    glVertex2f(
-        circle.x_center + circle.radius * radius_scale,
-        circle.y_center - circle.radius * radius_scale,
-    )
-    glTexCoord2f(1, 1)
-    glVertex2f(
-        circle.x_center + circle.radius * radius_scale,
-        circle.y_center + circle.radius * radius_scale,
+    return np.minimum(255, intensity)
+
+
+def generate_circles(
+    shard: Shard, roots: np.ndarray, polynomials: Optional[np.ndarray] = None
+) -> CircleColumns:
+    """
+    Turns the (N, degree) roots of a shard into circles. The circles are keyed by
+    RootSet.degree, one less than the degree of the polynomial, and get a radius of
+    0.5^(length + 1 + RootSet.degree). polynomials optionally holds the rank of the
+    polynomial of every row of roots, from ranking.polynomial_ranks.
+    """
+    root_set_degree = shard.degree - 1
+    count = roots.size
+    return CircleColumns(
+        x_center=roots.real.ravel().astype(np.float32),
+        y_center=roots.imag.ravel().astype(np.float32),
+        radius=np.full(
+            count, 0.5 ** (shard.length + 1 + root_set_degree), dtype=np.float32
+        ),
+        degree=np.full(count, root_set_degree, dtype=np.uint8),
+        polynomial=(
+            None if polynomials is None else np.repeat(polynomials, roots.shape[1])
+        ),
     )
-    glTexCoord2f(0, 1)
-    glVertex2f(
-        circle.x_center - circle.radius * radius_scale,
-        circle.y_center + circle.radius * radius_scale,
+
+
+def build_palette(
+    colors_by_degree: dict[int, list[float]], default_color: list[float], size=256
+) -> np.ndarray:
+    """
+    Returns a (size, 3) float32 lookup table from degree to color, where degrees
+    without a color of their own get default_color.
+    """
+    palette = np.tile(np.array(default_color, dtype=np.float32), (size, 1))
+    for degree, color in colors_by_degree.items():
+        if 0 <= degree < size:
+            palette[degree] = color
+    return palette
+
+
+def circle_instances(circles: CircleColumns) -> np.ndarray:
+    """
+    Interleaves the columns into the (N, 4) float32 x, y, radius, degree layout
+    CircleRenderer uploads.
+    """
+    return np.column_stack(
+        [circles.x_center, circles.y_center, circles.radius, circles.degree]
+    ).astype(np.float32)
+
+
+def circle_quads(
+    circles: CircleColumns, palette: np.ndarray, radius_scale=10.0
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Expands circles into GL_QUADS vertex, texture coordinate and color arrays for the
+    immediate mode fallback. Colors are looked up per degree in palette.
+    """
+    corners = np.array([[-1, -1], [1, -1], [1, 1], [-1, 1]], dtype=np.float32)
+    centers = np.column_stack([circles.x_center, circles.y_center])
+    extents = (circles.radius * radius_scale)[:, None, None]
+
+    vertices = centers[:, None, :] + corners[None, :, :] * extents
+    texture_coordinates = np.broadcast_to((corners + 1) / 2, vertices.shape)
+    colors = np.repeat(palette[circles.degree], 4, axis=0)
+    return (
+        vertices.reshape(-1, 2),
+        np.ascontiguousarray(texture_coordinates.reshape(-1, 2)),
+        colors,
     )
@@ -1,58 +1,159 @@
-from collections import defaultdict
+import math
+import time
+from typing import TYPE_CHECKING, Optional
 
 import numpy as np
 from OpenGL.GL import *
 from OpenGL.GLU import *
+from PyQt6.QtCore import QPointF, Qt, QThread, QTimer, pyqtSignal
+from PyQt6.QtGui import QMouseEvent, QWheelEvent
 from PyQt6.QtOpenGLWidgets import QOpenGLWidget
-
-from algebraics.polynomial.models import RootSet
-from algebraics.polynomial.polynomial import enumerate_polynomials, find_roots
-from algebraics.ui.circle import draw_circle, generate_circles
+from PyQt6.QtWidgets import QToolTip
+
+from algebraics.config import settings
+from algebraics.instrumentation.statistics import PipelineStatistics
+from algebraics.polynomial.models import Shard
+from algebraics.ui.budget import FrameBudget
+from algebraics.ui.circle import (
+    COLORS,
+    DEFAULT_COLOR,
+    build_palette,
+    circle_quads,
+    falloff,
+)
+from algebraics.ui.inspection import describe_roots
+from algebraics.ui.models import CircleColumns
+from algebraics.ui.renderer import CircleRenderer
+from algebraics.ui.spatial import GridIndex, PointIndex, Region, visible_mask
+from algebraics.ui.store import CircleStore
+
+# Density mode and generations import these when they start, which keeps them out of
+# the startup of the application
+if TYPE_CHECKING:
+    from algebraics.render.density import DensityGrid, ToneMapping
+    from algebraics.render.headless import View
+    from algebraics.ui.worker import GenerationWorker
 
 
 class GLWidget(QOpenGLWidget):
-    COLORS = {
-        1: [1.0, 0.0, 0.0],
-        2: [0.0, 1.0, 0.0],
-        3: [0.0, 0.0, 1.0],
-        4: [0.7, 0.7, 0.0],
-        5: [1.0, 0.6, 0.0],
-        6: [0.0, 1.0, 1.0],
-        7: [1.0, 0.0, 1.0],
-        8: [0.6, 0.6, 0.6],
-    }
-
-    DEFAULT_COLOR = [1.0, 1.0, 1.0]
+    generation_started = pyqtSignal()
+    generation_progress = pyqtSignal(object, object)
+    generation_finished = pyqtSignal()
+    # Emitted after every frame with the number of circles it drew
+    frame_drawn = pyqtSignal(int)
+
+    COLORS = COLORS
+
+    DEFAULT_COLOR = DEFAULT_COLOR
 
     def __init__(self):
         super().__init__()
         self.zoom = 1.0
         self.radius_scale = 10.0
         self.texture = None
+        self.root_cache = None  # opened by the first generation
+        self.circles = CircleStore()
+        self.renderer: Optional[CircleRenderer] = None
+        self.shards: set[Shard] = set()
+        self.worker: Optional["GenerationWorker"] = None
+        # Recorded by the generations and frames while instrumentation is enabled
+        self.statistics: Optional[PipelineStatistics] = None
+        self.instrumented = settings.INSTRUMENTATION.ENABLED
+        # Density mode draws histograms of the circles instead of the circles
+        self.density_mode = False
+        self.tone_mapping: Optional["ToneMapping"] = None  # the default until set
+        self.smoothing = 0.0
+        self.density: Optional["DensityGrid"] = None
+        self.density_energy: Optional[np.ndarray] = None
+        self.density_energy_key = None
+        self.density_texture = None
+        self.density_image_key = None
 
         self.max_degree = 5
         self.max_length = 5
-
-        self.generate_circles_by_degree(self.max_length, self.max_degree)
+        self.family = "length"  # name of the PolynomialFamily generated
+        self.colors_by_degree = {
+            k: v for k, v in GLWidget.COLORS.copy().items() if k <= self.max_degree
+        }
+        # The window is shown and painted before anything is solved
+        self.frameSwapped.connect(
+            self._start_first_generation, Qt.ConnectionType.SingleShotConnection
+        )
+        self.first_generation_timer = QTimer(self)
+        self.first_generation_timer.setSingleShot(True)
+        self.first_generation_timer.setInterval(settings.RENDERING.FIRST_GENERATION_MS)
+        self.first_generation_timer.timeout.connect(self._start_first_generation)
         self.default_color = GLWidget.DEFAULT_COLOR.copy()
 
         self.translate_x = 0.0
         self.translate_y = 0.0
 
-    def generate_circles_by_degree(self, max_length: int, max_degree: int):
-        polynomials = [
-            polynomial for polynomial in enumerate_polynomials(max_length, max_degree)
-        ]
-        root_sets: list[RootSet] = []
-        for polynomial in polynomials:
-            root_set = find_roots(polynomial)
-            if root_set:
-                root_sets.append(root_set)
-
-        self.circles_by_degree = defaultdict(list)
-        for root_set in root_sets:
-            for circle in generate_circles(root_set):
-                self.circles_by_degree[root_set.degree].append(circle)
+        # While the view moves, frames draw as many circles as fit in the frame
+        # budget, and the view is drawn in full once it has been still for a while
+        self.moving = False
+        self.frame_budget = FrameBudget(
+            settings.RENDERING.FRAME_BUDGET_MS / 1000,
+            settings.RENDERING.MOTION_CIRCLES,
+        )
+        self.settle_timer = QTimer(self)
+        self.settle_timer.setSingleShot(True)
+        self.settle_timer.setInterval(settings.RENDERING.SETTLE_MS)
+        self.settle_timer.timeout.connect(self._settle)
+        self.drag_position: Optional[QPointF] = None
+        self.press_position: Optional[QPointF] = None
+
+        # The roots under the cursor are shown once it rests on the view, or right
+        # away on a click
+        self.setMouseTracking(True)
+        self.hover_position: Optional[QPointF] = None
+        self.hover_timer = QTimer(self)
+        self.hover_timer.setSingleShot(True)
+        self.hover_timer.setInterval(settings.INSPECTION.HOVER_MS)
+        self.hover_timer.timeout.connect(self._inspect_hover)
+        # Zoom and translate the density texture was drawn for
+        self.density_texture_view: Optional[tuple[float, float, float]] = None
+
+    def generate_circles_by_degree(
+        self, max_length: int, max_degree: int, family: str = "length"
+    ):
+        """
+        Starts generating the circles of the polynomial family for the new
+        parameters in the background, cancelling any generation that is still
+        running. Shards that are still part of the enumeration are kept as they are,
+        so only the shells added by growing the parameters are solved.
+        """
+        from algebraics.polynomial.cache import open_root_cache
+        from algebraics.polynomial.generation import enumerate_shards
+        from algebraics.ui.worker import GenerationWorker
+
+        self.cancel_generation()
+        if self.root_cache is None:
+            self.root_cache = open_root_cache()
+
+        self.shards = set(enumerate_shards(max_length, max_degree, family))
+        self.circles.retain(self.shards)
+        if self.instrumented:
+            self.statistics = PipelineStatistics()
+
+        # The worker records into statistics of its own, whose copies it emits
+        self.worker = GenerationWorker(
+            max_length,
+            max_degree,
+            self.root_cache,
+            self.circles.shards(),
+            PipelineStatistics() if self.instrumented else None,
+            self,
+            family,
+            dict(self.circles.items()),
+        )
+        self.worker.shard_generated.connect(self._add_shard_circles)
+        self.worker.point_index_built.connect(self._set_point_index)
+        self.worker.statistics_recorded.connect(self._record_generation)
+        self.worker.progress.connect(self.generation_progress)
+        self.worker.finished.connect(self._generation_done)
+        self.worker.finished.connect(self.worker.deleteLater)
+        self.generation_started.emit()
+        self.worker.start()
 
         self.colors_by_degree = {
             k: v for k, v in GLWidget.COLORS.copy().items() if k <= max_degree
@@ -60,6 +161,87 @@ class GLWidget(QOpenGLWidget):
 
         self.max_degree = max_degree
         self.max_length = max_length
+        self.family = family
+
+    def cancel_generation(self):
+        """
+        Stops the running generation without waiting for the shard in flight, the
+        worker discards it and cleans up after itself.
+        """
+        if self.worker is not None:
+            self.worker.shard_generated.disconnect()
+            self.worker.progress.disconnect()
+            self.worker.point_index_built.disconnect()
+            self.worker.statistics_recorded.disconnect()
+            self.worker.finished.disconnect(self._generation_done)
+            self.worker.requestInterruption()
+            self.worker = None
+            self.generation_finished.emit()
+
+    def set_instrumented(self, instrumented: bool):
+        """
+        Starts recording statistics of the frames and of the next generations, or
+        stops recording them altogether
+        """
+        self.instrumented = instrumented
+        self.statistics = PipelineStatistics() if instrumented else None
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self.shards:
+            self.first_generation_timer.start()
+
+    def _start_first_generation(self):
+        # Whichever of the first frame and the timer comes first starts it
+        self.first_generation_timer.stop()
+        if self.worker is None and not self.shards:
+            self.generate_circles_by_degree(
+                self.max_length, self.max_degree, self.family
+            )
+
+    def wait_for_workers(self):
+        for worker in self.findChildren(QThread):
+            worker.requestInterruption()
+            worker.wait()
+
+    def _generation_done(self):
+        self.worker = None
+        self.generation_finished.emit()
+
+    def _add_shard_circles(
+        self, shard: Shard, circles: CircleColumns, index: GridIndex
+    ):
+        # Results of a cancelled generation may still be queued
+        if shard not in self.shards or shard in self.circles:
+            return
+
+        self.circles.add(shard, circles, index)
+        self.update()
+
+    def _record_generation(self, statistics: PipelineStatistics):
+        if self.statistics is not None:
+            self.statistics.replace_generation(statistics)
+
+    def _set_point_index(self, point_index: PointIndex):
+        self.circles.set_point_index(point_index)
+
+    def visible_region(self) -> Region:
+        """
+        The part of the plane on screen, undoing the translate and zoom of paintGL
+        """
+        return (
+            (-1 - self.translate_x) / self.zoom,
+            (-1 - self.translate_y) / self.zoom,
+            (1 - self.translate_x) / self.zoom,
+            (1 - self.translate_y) / self.zoom,
+        )
+
+    def min_visible_radius(self) -> float:
+        """
+        The radius in plane units below which circles are too small to be drawn
+        """
+        pixels_per_unit = self.zoom * max(self.width(), self.height()) / 2
+        return settings.RENDERING.MIN_CIRCLE_PIXELS / max(pixels_per_unit, 1e-9)
 
     def create_texture(self, texture_size: int) -> int:
         texture_id = glGenTextures(1)
@@ -74,12 +256,7 @@ class GLWidget(QOpenGLWidget):
             np.arange(width), np.arange(height - 1, -1, -1), indexing="xy"
         )
 
-        texture_center = texture_size / 2.0
-
-        intensity = ((texture_size / 2.0) ** 2) / (
-            1 + (x_coords - texture_center) ** 2 + (y_coords - texture_center) ** 2
-        )
-        intensity = np.minimum(255, intensity).astype(np.uint8)
+        intensity = falloff(x_coords, y_coords, texture_size).astype(np.uint8)
 
         texture_data = np.stack((intensity, intensity, intensity), axis=-1)
 
@@ -92,8 +269,26 @@ class GLWidget(QOpenGLWidget):
         glEnable(GL_TEXTURE_2D)
         glClearColor(0, 0, 0, 1.0)
         self.texture = self.create_texture(256)
+        if CircleRenderer.is_supported():
+            self.renderer = CircleRenderer()
 
     def paintGL(self):
+        draw = self.draw_density if self.density_mode else self.draw_circles
+        if self.statistics is None:
+            self.frame_drawn.emit(draw())
+            return
+
+        start = time.perf_counter()
+        drawn = draw()
+        # Wait for the frame to be drawn rather than only submitted
+        glFinish()
+        self.statistics.record_frame(time.perf_counter() - start, drawn)
+        self.frame_drawn.emit(drawn)
+
+    def draw_circles(self) -> int:
+        """
+        Draws the visible circles and returns how many were drawn
+        """
         glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
         glLoadIdentity()
 
@@ -106,39 +301,314 @@ class GLWidget(QOpenGLWidget):
         glEnable(GL_TEXTURE_2D)
         glBindTexture(GL_TEXTURE_2D, self.texture)
 
+        budget = self.frame_budget.circles if self.moving else None
+        start = time.perf_counter()
+        if self.renderer is not None:
+            drawn = self.renderer.draw(
+                self.circles,
+                self.texture,
+                self.colors_by_degree,
+                self.default_color,
+                self.zoom,
+                (self.translate_x, self.translate_y),
+                self.radius_scale,
+                self.visible_region(),
+                self.min_visible_radius(),
+                budget,
+            )
+        else:
+            drawn = self.draw_circles_immediate(budget)
+        if budget is not None:
+            # Wait for the frame to be drawn rather than only submitted
+            glFinish()
+            self.frame_budget.record(time.perf_counter() - start, drawn)
+        return drawn
+
+    def draw_circles_immediate(self, budget: Optional[int]) -> int:
+        """
+        Immediate mode fallback of draw_circles for contexts without instanced
+        drawing, which draws every few visible circles when there are more than
+        budget. Their colors are clamped to 1, so unlike the renderer it can't
+        brighten them to make up for the others.
+        """
+        palette = build_palette(self.colors_by_degree, self.default_color)
+        circles = self.circles.columns()
+        visible = np.flatnonzero(
+            visible_mask(
+                circles,
+                self.visible_region(),
+                self.radius_scale,
+                self.min_visible_radius(),
+            )
+        )
+        stride = 1 if budget is None else max(math.ceil(len(visible) / budget), 1)
+        vertices, texture_coordinates, colors = circle_quads(
+            circles.select(visible[::stride]), palette, self.radius_scale
+        )
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_TEXTURE_COORD_ARRAY)
+        glEnableClientState(GL_COLOR_ARRAY)
+        glVertexPointer(2, GL_FLOAT, 0, vertices)
+        glTexCoordPointer(2, GL_FLOAT, 0, texture_coordinates)
+        glColorPointer(3, GL_FLOAT, 0, colors)
+        glDrawArrays(GL_QUADS, 0, vertices.shape[0])
+        glDisableClientState(GL_COLOR_ARRAY)
+        glDisableClientState(GL_TEXTURE_COORD_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        return vertices.shape[0] // 4
+
+    def density_view(self) -> "View":
+        """
+        Square pixels over the visible region, as many across as the widget is wide
+        or high, whichever is larger
+        """
+        from algebraics.render.headless import View
+
+        x_min, _, x_max, y_max = self.visible_region()
+        size = max(self.width(), self.height(), 1)
+        return View(
+            x_min=x_min,
+            y_max=y_max,
+            pixel_size=(x_max - x_min) / size,
+            width=size,
+            height=size,
+        )
+
+    def update_density(self) -> "DensityGrid":
+        """
+        Adds the shards that arrived since the last frame to the density histograms,
+        starting over when the view changed or shards were dropped
+        """
+        from algebraics.render.density import DensityGrid
+
+        view = self.density_view()
+        if (
+            self.density is None
+            or self.density.view != view
+            or not self.density.shards <= self.circles.shards()
+        ):
+            self.density = DensityGrid(view)
+        for shard, circles in self.circles.items():
+            if shard not in self.density.shards:
+                self.density.write(shard, circles)
+        return self.density
+
+    def draw_density(self) -> int:
+        """
+        Draws the tone-mapped density of the circles over the whole widget and
+        returns how many circles it holds. The energy is only mixed again when the
+        histograms, colors, radius scale or smoothing changed, and only tone-mapped
+        again when it or the tone mapping changed.
+        """
+        from algebraics.render.density import ToneMapping, tone_map
+
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        glLoadIdentity()
+        glDisable(GL_BLEND)
+        glEnable(GL_TEXTURE_2D)
+        count = sum(len(circles) for _, circles in self.circles.items())
+
+        # Histograms restart whenever the view changes, so while it moves the last
+        # image is moved along with it instead
+        if self.moving and self.density_texture_view is not None:
+            glBindTexture(GL_TEXTURE_2D, self.density_texture)
+            self._draw_density_quad(*self.density_texture_view)
+            return count
+
+        density = self.update_density()
+        palette = build_palette(self.colors_by_degree, self.default_color)
+        energy_key = (
+            id(density),
+            frozenset(density.shards),
+            palette.tobytes(),
+            self.radius_scale,
+            self.smoothing,
+        )
+        if energy_key != self.density_energy_key:
+            self.density_energy = density.energy(
+                palette, self.radius_scale, self.smoothing
+            )
+            self.density_energy_key = energy_key
+
+        if self.density_texture is None:
+            self.density_texture = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, self.density_texture)
+        tone_mapping = self.tone_mapping or ToneMapping()
+        image_key = (energy_key, tone_mapping)
+        if image_key != self.density_image_key:
+            image = tone_map(self.density_energy, tone_mapping)
+            view = density.view
+            glTexParameterf(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+            glTexParameterf(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+            glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+            # Image rows go down while texture rows go up
+            glTexImage2D(
+                GL_TEXTURE_2D,
+                0,
+                GL_RGB,
+                view.width,
+                view.height,
+                0,
+                GL_RGB,
+                GL_UNSIGNED_BYTE,
+                np.ascontiguousarray(image[::-1]),
+            )
+            self.density_image_key = image_key
+        self.density_texture_view = (self.zoom, self.translate_x, self.translate_y)
+
+        self._draw_density_quad(*self.density_texture_view)
+        return count
+
+    def _draw_density_quad(self, zoom: float, translate_x: float, translate_y: float):
+        """
+        Draws the density texture, which covers the widget at the zoom and translate
+        it was drawn for, where that part of the plane is now
+        """
+        scale = self.zoom / zoom
+        glColor3f(1.0, 1.0, 1.0)
         glBegin(GL_QUADS)
-        for degree in self.circles_by_degree.keys():
-            for circle in self.circles_by_degree[degree]:
-                if degree in self.colors_by_degree:
-                    circle.set_color(self.colors_by_degree[degree])
-                else:
-                    circle.set_color(self.default_color)
-                draw_circle(circle, self.radius_scale)
+        for x, y in ((0, 0), (1, 0), (1, 1), (0, 1)):
+            glTexCoord2f(x, y)
+            glVertex2f(
+                (2 * x - 1 - translate_x) * scale + self.translate_x,
+                (2 * y - 1 - translate_y) * scale + self.translate_y,
+            )
         glEnd()
 
-    def zoom_in(self):
-        self.zoom *= 1.1
+    def set_density_mode(self, density_mode: bool):
+        self.density_mode = density_mode
+        if not density_mode:
+            # Histograms are rebuilt from the circles when density mode is back on
+            self.density = None
+            self.density_energy = None
+            self.density_energy_key = None
+            self.density_texture_view = None
         self.update()
 
-    def zoom_out(self):
-        self.zoom /= 1.1
+    def set_tone_mapping(self, tone_mapping: "ToneMapping"):
+        self.tone_mapping = tone_mapping
         self.update()
 
+    def set_smoothing(self, smoothing: float):
+        self.smoothing = smoothing
+        self.update()
+
+    def _moved(self):
+        """
+        Redraws the view after it moved, within the frame budget until it stops
+        moving. Input arriving before the frame is drawn only changes the view that
+        frame draws.
+        """
+        self.moving = True
+        self.settle_timer.start()
+        self.update()
+
+    def _settle(self):
+        self.moving = False
+        self.update()
+
+    def zoom_at(self, factor: float, x: float, y: float):
+        """
+        Zooms by factor, keeping the point at x, y in normalized device coordinates
+        where it is on screen
+        """
+        self.translate_x = x - (x - self.translate_x) * factor
+        self.translate_y = y - (y - self.translate_y) * factor
+        self.zoom *= factor
+        self._moved()
+
+    def to_device(self, position: QPointF) -> tuple[float, float]:
+        """
+        A position in the widget in normalized device coordinates
+        """
+        return (
+            2 * position.x() / max(self.width(), 1) - 1,
+            1 - 2 * position.y() / max(self.height(), 1),
+        )
+
+    def wheelEvent(self, event: QWheelEvent):
+        # Angles are in eighths of a degree, and a notch of the wheel is 15 degrees
+        notches = event.angleDelta().y() / 120
+        if notches:
+            self.zoom_at(1.1**notches, *self.to_device(event.position()))
+        event.accept()
+
+    def mousePressEvent(self, event: QMouseEvent):
+        if event.button() == Qt.MouseButton.LeftButton:
+            self.drag_position = self.press_position = event.position()
+            self.hover_timer.stop()
+            QToolTip.hideText()
+        event.accept()
+
+    def mouseMoveEvent(self, event: QMouseEvent):
+        if self.drag_position is None:
+            self.hover_position = event.position()
+            self.hover_timer.start()
+            return
+        x, y = self.to_device(event.position())
+        last_x, last_y = self.to_device(self.drag_position)
+        self.drag_position = event.position()
+        self.translate_x += x - last_x
+        self.translate_y += y - last_y
+        self._moved()
+
+    def mouseReleaseEvent(self, event: QMouseEvent):
+        if event.button() == Qt.MouseButton.LeftButton:
+            self.drag_position = None
+            if event.position() == self.press_position:
+                self.show_roots(event.position())
+
+    def leaveEvent(self, event):
+        self.hover_timer.stop()
+        super().leaveEvent(event)
+
+    def _inspect_hover(self):
+        # Inspecting waits for the view to stop moving as well
+        if self.hover_position is not None and not self.moving:
+            self.show_roots(self.hover_position)
+
+    def roots_at(self, position: QPointF) -> str:
+        """
+        Describes the roots nearest to a position in the widget, one per line
+        """
+        x, y = self.to_device(position)
+        pixels_per_unit = self.zoom * max(self.width(), self.height()) / 2
+        return describe_roots(
+            self.circles,
+            (x - self.translate_x) / self.zoom,
+            (y - self.translate_y) / self.zoom,
+            settings.INSPECTION.PICK_PIXELS / max(pixels_per_unit, 1e-9),
+            settings.INSPECTION.ROOTS,
+        )
+
+    def show_roots(self, position: QPointF):
+        text = self.roots_at(position)
+        if text:
+            QToolTip.showText(self.mapToGlobal(position.toPoint()), text, self)
+        else:
+            QToolTip.hideText()
+
+    def zoom_in(self):
+        self.zoom_at(1.1, self.translate_x, self.translate_y)
+
+    def zoom_out(self):
+        self.zoom_at(1 / 1.1, self.translate_x, self.translate_y)
+
     def move_left(self):
         self.translate_x -= 0.1
-        self.update()
+        self._moved()
 
     def move_right(self):
         self.translate_x += 0.1
-        self.update()
+        self._moved()
 
     def move_up(self):
         self.translate_y += 0.1
-        self.update()
+        self._moved()
 
     def move_down(self):
         self.translate_y -= 0.1
-        self.update()
+        self._moved()
 
     def update_radius_scale(self, radius_scale: float):
         self.radius_scale = radius_scale
@@ -0,0 +1,40 @@
+from algebraics.ui.store import CircleStore
+
+
+def format_root(root: complex) -> str:
+    return f"{root.real:.6g} {'-' if root.imag < 0 else '+'} {abs(root.imag):.6g}i"
+
+
+def describe_roots(
+    store: CircleStore, x: float, y: float, distance: float, count: int
+) -> str:
+    """
+    One line per root of store within distance of x, y, up to count of them nearest
+    first, with the polynomial it is a root of, its degree and its length
+    """
+    # The solver modules ranking needs are left out of the startup of the
+    # application
+    from algebraics.polynomial.ranking import (
+        UNKNOWN_RANK,
+        decode_polynomial,
+        format_polynomial,
+    )
+
+    lines = []
+    for shard, position, _ in store.nearest(x, y, distance, count):
+        circles = store.batches[shard]
+        root = complex(circles.x_center[position], circles.y_center[position])
+        rank = None if circles.polynomial is None else int(circles.polynomial[position])
+        if rank is None or rank == UNKNOWN_RANK:
+            lines.append(
+                f"{format_root(root)}: root of an unknown polynomial of degree "
+                f"{shard.degree}"
+            )
+            continue
+        coefficients = decode_polynomial(shard, rank)
+        length = int(abs(coefficients.astype(int)).sum())
+        lines.append(
+            f"{format_root(root)}: root of {format_polynomial(coefficients)} "
+            f"(degree {shard.degree}, length {length})"
+        )
+    return "\n".join(lines)
@@ -1,10 +1,17 @@
-from PyQt6.QtCore import Qt
+import time
+
+from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtGui import QFontDatabase
 from PyQt6.QtWidgets import (
+    QCheckBox,
     QColorDialog,
+    QComboBox,
+    QFileDialog,
     QFrame,
     QGridLayout,
     QHBoxLayout,
     QLabel,
+    QProgressBar,
     QPushButton,
     QSlider,
     QSpinBox,
@@ -12,8 +19,20 @@ from PyQt6.QtWidgets import (
     QWidget,
 )
 
+from algebraics.instrumentation.statistics import format_statistics
+from algebraics.polynomial.families import (
+    available_families,
+    count_family,
+    get_family,
+)
 from algebraics.ui.gl_widget import GLWidget
 
+# Milliseconds between refreshes of the statistics panel
+STATISTICS_INTERVAL = 500
+
+# Steps of the exposure slider per doubling of the exposure
+EXPOSURE_STEPS = 4
+
 
 class MainWindow(QWidget):
     def __init__(self):
@@ -21,6 +40,7 @@ class MainWindow(QWidget):
         self.setWindowTitle("Algebraic numbers")
         self.gl_widget = GLWidget()
         self.max_degree = len(self.gl_widget.colors_by_degree)
+        self.generation_start = time.monotonic()
 
         main = QHBoxLayout(self)
         main.addWidget(self._create_control_panel())
@@ -38,11 +58,17 @@ class MainWindow(QWidget):
         v.addLayout(self._create_translate_controls())
         v.addWidget(QLabel("Radius Length"))
         v.addWidget(self._create_radius_slider())
+        v.addLayout(self._create_density_controls())
 
         v.addWidget(self._create_separator())
 
         v.addLayout(self._create_parameter_controls())
         v.addWidget(self._create_generate_button())
+        v.addLayout(self._create_progress_controls())
+
+        v.addWidget(self._create_separator())
+
+        v.addLayout(self._create_statistics_controls())
         v.addStretch()
         return container
 
@@ -108,29 +134,164 @@ class MainWindow(QWidget):
             grid.addWidget(btn, *positions[name])
         return grid
 
-    def _create_parameter_controls(self) -> QHBoxLayout:
+    def _create_parameter_controls(self) -> QVBoxLayout:
+        self.family_combo = QComboBox()
+        for family in available_families():
+            self.family_combo.addItem(family.title, family.name)
+        self.family_combo.setCurrentIndex(
+            self.family_combo.findData(self.gl_widget.family)
+        )
+        self.family_combo.currentIndexChanged.connect(self._update_family)
+
         h = QHBoxLayout()
         self.degree_spin = QSpinBox()
         self.degree_spin.setValue(self.gl_widget.max_degree)
+        self.degree_spin.valueChanged.connect(self._update_count)
         self.length_spin = QSpinBox()
         self.length_spin.setValue(self.gl_widget.max_length)
-        for label, widget in [
-            ("Degree", self.degree_spin),
-            ("Length", self.length_spin),
-        ]:
-            h.addWidget(QLabel(label))
-            h.addWidget(widget)
-        return h
+        self.length_spin.valueChanged.connect(self._update_count)
+        self.length_label = QLabel()
+        h.addWidget(QLabel("Degree"))
+        h.addWidget(self.degree_spin)
+        h.addWidget(self.length_label)
+        h.addWidget(self.length_spin)
+
+        self.count_label = QLabel()
+        v = QVBoxLayout()
+        v.addWidget(self.family_combo)
+        v.addLayout(h)
+        v.addWidget(self.count_label)
+        self._update_family()
+        return v
+
+    def _update_family(self):
+        """
+        Shows the parameter of the selected family, if it has one, and its count
+        """
+        parameter = get_family(self.family_combo.currentData()).parameter
+        self.length_label.setText(parameter or "Length")
+        self.length_spin.setEnabled(parameter is not None)
+        self._update_count()
+
+    def _update_count(self):
+        count = count_family(
+            self.family_combo.currentData(),
+            self.length_spin.value(),
+            self.degree_spin.value() + 1,
+        )
+        self.count_label.setText(f"{count:,} polynomials")
 
     def _create_generate_button(self) -> QPushButton:
         btn = QPushButton("Generate")
         btn.clicked.connect(
             lambda: self._update_circles(
-                self.length_spin.value(), self.degree_spin.value()
+                self.length_spin.value(),
+                self.degree_spin.value(),
+                self.family_combo.currentData(),
             )
         )
         return btn
 
+    def _create_progress_controls(self) -> QVBoxLayout:
+        v = QVBoxLayout()
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 1000)
+        self.progress_bar.setTextVisible(False)
+        self.progress_label = QLabel()
+        self.cancel_btn = QPushButton("Cancel")
+        self.cancel_btn.clicked.connect(self.gl_widget.cancel_generation)
+        for widget in [self.progress_bar, self.progress_label, self.cancel_btn]:
+            v.addWidget(widget)
+
+        self.gl_widget.generation_started.connect(self._generation_started)
+        self.gl_widget.generation_progress.connect(self._generation_progress)
+        self.gl_widget.generation_finished.connect(self._generation_finished)
+        self._generation_started()
+        return v
+
+    def _generation_started(self):
+        self.generation_start = time.monotonic()
+        self.progress_bar.setValue(0)
+        self.progress_label.setText("Counting polynomials...")
+        for widget in [self.progress_bar, self.progress_label, self.cancel_btn]:
+            widget.setVisible(True)
+
+    def _generation_progress(self, done: int, total: int):
+        if total == 0:
+            return
+
+        self.progress_bar.setValue(int(1000 * done / total))
+        elapsed = time.monotonic() - self.generation_start
+        if done == 0:
+            self.progress_label.setText(f"0 / {total:,} polynomials")
+            return
+
+        remaining = int(elapsed * (total - done) / done)
+        self.progress_label.setText(
+            f"{done:,} / {total:,} polynomials, "
+            f"ETA {remaining // 60}:{remaining % 60:02d}"
+        )
+
+    def _generation_finished(self):
+        for widget in [self.progress_bar, self.progress_label, self.cancel_btn]:
+            widget.setVisible(False)
+
+    def _create_statistics_controls(self) -> QVBoxLayout:
+        v = QVBoxLayout()
+        self.statistics_check = QCheckBox("Collect statistics")
+        self.statistics_check.setChecked(self.gl_widget.instrumented)
+        self.statistics_check.toggled.connect(self._toggle_statistics)
+        self.statistics_label = QLabel()
+        self.statistics_label.setFont(
+            QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont)
+        )
+        self.statistics_label.setTextInteractionFlags(
+            Qt.TextInteractionFlag.TextSelectableByMouse
+        )
+        self.export_statistics_btn = QPushButton("Export statistics")
+        self.export_statistics_btn.clicked.connect(self._export_statistics)
+        for widget in [
+            self.statistics_check,
+            self.statistics_label,
+            self.export_statistics_btn,
+        ]:
+            v.addWidget(widget)
+
+        # The panel is only refreshed while statistics are collected
+        self.statistics_timer = QTimer(self)
+        self.statistics_timer.setInterval(STATISTICS_INTERVAL)
+        self.statistics_timer.timeout.connect(self._refresh_statistics)
+        self._show_statistics(self.gl_widget.instrumented)
+        return v
+
+    def _toggle_statistics(self, checked: bool):
+        self.gl_widget.set_instrumented(checked)
+        self._show_statistics(checked)
+        self.gl_widget.update()
+
+    def _show_statistics(self, visible: bool):
+        self.statistics_label.setVisible(visible)
+        self.export_statistics_btn.setVisible(visible)
+        if visible:
+            self._refresh_statistics()
+            self.statistics_timer.start()
+        else:
+            self.statistics_timer.stop()
+
+    def _refresh_statistics(self):
+        if self.gl_widget.statistics is not None:
+            self.statistics_label.setText(format_statistics(self.gl_widget.statistics))
+
+    def _export_statistics(self):
+        statistics = self.gl_widget.statistics
+        if statistics is None:
+            return
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Export statistics", "statistics.json", "JSON (*.json)"
+        )
+        if path:
+            statistics.save(path)
+
     def _create_separator(self) -> QFrame:
         separator = QFrame()
         separator.setFrameShape(QFrame.Shape.HLine)
@@ -138,8 +299,8 @@ class MainWindow(QWidget):
 
         return separator
 
-    def _update_circles(self, max_length: int, max_degree: int):
-        self.gl_widget.generate_circles_by_degree(max_length, max_degree + 1)
+    def _update_circles(self, max_length: int, max_degree: int, family: str):
+        self.gl_widget.generate_circles_by_degree(max_length, max_degree + 1, family)
         self.gl_widget.update()
 
         self._remove_all_color_buttons()
@@ -223,6 +384,57 @@ class MainWindow(QWidget):
 
         return slider
 
+    def _create_density_controls(self) -> QVBoxLayout:
+        self.density_check = QCheckBox("Density mode")
+        self.density_check.toggled.connect(self._toggle_density)
+        self.tone_mapping_combo = QComboBox()
+        self.tone_mapping_combo.addItems(["log", "gamma"])
+        self.tone_mapping_combo.currentTextChanged.connect(self._update_tone_mapping)
+        self.exposure_slider = QSlider(Qt.Orientation.Horizontal)
+        self.exposure_slider.setRange(-4 * EXPOSURE_STEPS, 4 * EXPOSURE_STEPS)
+        self.exposure_slider.setValue(0)
+        self.exposure_slider.valueChanged.connect(self._update_tone_mapping)
+        self.smoothing_slider = QSlider(Qt.Orientation.Horizontal)
+        self.smoothing_slider.setRange(0, 10)
+        self.smoothing_slider.setValue(0)
+        self.smoothing_slider.valueChanged.connect(
+            lambda value: self.gl_widget.set_smoothing(value / 2)
+        )
+
+        self.density_controls = QWidget()
+        controls = QVBoxLayout(self.density_controls)
+        controls.setContentsMargins(0, 0, 0, 0)
+        controls.addWidget(self.tone_mapping_combo)
+        controls.addWidget(QLabel("Exposure"))
+        controls.addWidget(self.exposure_slider)
+        controls.addWidget(QLabel("Smoothing"))
+        controls.addWidget(self.smoothing_slider)
+        self.density_controls.setVisible(False)
+
+        v = QVBoxLayout()
+        v.addWidget(self.density_check)
+        v.addWidget(self.density_controls)
+        return v
+
+    def _toggle_density(self, checked: bool):
+        self.gl_widget.set_density_mode(checked)
+        self.density_controls.setVisible(checked)
+
+    def _update_tone_mapping(self):
+        from algebraics.render.density import ToneMapping
+
+        self.gl_widget.set_tone_mapping(
+            ToneMapping(
+                mode=self.tone_mapping_combo.currentText(),
+                exposure=2 ** (self.exposure_slider.value() / EXPOSURE_STEPS),
+            )
+        )
+
+    def closeEvent(self, event):
+        self.gl_widget.cancel_generation()
+        self.gl_widget.wait_for_workers()
+        super().closeEvent(event)
+
     def zoom_in(self):
         self.gl_widget.zoom_in()
 
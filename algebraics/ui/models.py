@@ -1,18 +1,69 @@
-from pydantic import BaseModel
+from typing import Optional
 
+import numpy as np
+from pydantic import BaseModel, ConfigDict
 
-class Circle(BaseModel):
-    x_center: float
-    y_center: float
-    radius: float
-    red: float = 1.0
-    green: float = 1.0
-    blue: float = 1.0
 
-    def set_color(self, color: list[float] | tuple[float, float, float]):
-        if len(color) != 3:
-            raise ValueError("Incorrect number of elements in color vector")
+class CircleColumns(BaseModel):
+    """
+    A batch of circles stored column by column: float32 centers and radii, the
+    uint8 degree that selects the color of a circle at draw time and, when known,
+    the rank in its shard of the polynomial the root of every circle belongs to
+    (see polynomial.ranking)
+    """
 
-        self.red = color[0]
-        self.green = color[1]
-        self.blue = color[2]
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    x_center: np.ndarray
+    y_center: np.ndarray
+    radius: np.ndarray
+    degree: np.ndarray
+    polynomial: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return self.x_center.shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(
+            column.nbytes
+            for column in [
+                self.x_center,
+                self.y_center,
+                self.radius,
+                self.degree,
+                self.polynomial,
+            ]
+            if column is not None
+        )
+
+    def select(self, selection: np.ndarray) -> "CircleColumns":
+        """
+        Returns the circles picked by an index or boolean mask array
+        """
+        return CircleColumns(
+            x_center=self.x_center[selection],
+            y_center=self.y_center[selection],
+            radius=self.radius[selection],
+            degree=self.degree[selection],
+            polynomial=None if self.polynomial is None else self.polynomial[selection],
+        )
+
+    @classmethod
+    def concatenate(cls, batches: list["CircleColumns"]) -> "CircleColumns":
+        def column(name: str, dtype) -> np.ndarray:
+            arrays = [getattr(batch, name) for batch in batches]
+            return np.concatenate(arrays) if arrays else np.empty(0, dtype=dtype)
+
+        return cls(
+            x_center=column("x_center", np.float32),
+            y_center=column("y_center", np.float32),
+            radius=column("radius", np.float32),
+            degree=column("degree", np.uint8),
+            # Only kept when every batch has it
+            polynomial=(
+                column("polynomial", np.uint32)
+                if all(batch.polynomial is not None for batch in batches)
+                else None
+            ),
+        )
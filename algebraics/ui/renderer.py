@@ -0,0 +1,217 @@
+import ctypes
+import math
+from typing import Optional
+
+import numpy as np
+from OpenGL.GL import *
+from OpenGL.GL import shaders
+
+from algebraics.polynomial.models import Shard
+from algebraics.ui.budget import budget_strides
+from algebraics.ui.circle import build_palette, circle_instances
+from algebraics.ui.spatial import GridIndex, Region
+from algebraics.ui.store import CircleStore
+
+VERTEX_SHADER = """
+#version 120
+
+attribute vec2 corner;
+attribute vec4 instance;  // x, y, radius, degree
+
+uniform vec2 translate;
+uniform float zoom;
+uniform float radius_scale;
+
+varying vec2 texture_coordinate;
+varying float degree;
+
+void main() {
+    vec2 position = instance.xy + corner * instance.z * radius_scale;
+    gl_Position = vec4(position * zoom + translate, 0.0, 1.0);
+    texture_coordinate = corner * 0.5 + 0.5;
+    degree = instance.w;
+}
+"""
+
+FRAGMENT_SHADER = """
+#version 120
+
+uniform sampler2D falloff;
+uniform sampler2D palette;
+uniform float palette_size;
+uniform float weight;
+
+varying vec2 texture_coordinate;
+varying float degree;
+
+void main() {
+    vec3 color = texture2D(palette, vec2((degree + 0.5) / palette_size, 0.5)).rgb;
+    vec3 intensity = texture2D(falloff, texture_coordinate).rgb * weight;
+    gl_FragColor = vec4(color * intensity, 1.0);
+}
+"""
+
+# Corners of the unit quad every circle is drawn with, as a triangle strip
+CORNERS = np.array([[-1, -1], [1, -1], [-1, 1], [1, 1]], dtype=np.float32)
+
+# x, y, radius and degree as float32
+INSTANCE_BYTES = 16
+
+# Budgeted frames draw every few circles of a buffer by striding over it, and GL
+# only guarantees strides up to 2048 bytes
+MAX_STRIDE = 2048 // INSTANCE_BYTES
+
+
+class CircleRenderer:
+    """
+    Draws circles as instanced quads. The circles of every shard in a CircleStore are
+    uploaded to their own vertex buffer once, interleaved as float32, so a frame
+    only sets a few uniforms and issues one draw call per shard. Colors are looked
+    up per degree in a palette texture, which is the only thing that changes when
+    the palette does.
+
+    The buffers are synchronized with the shards passed to draw, uploading the new
+    ones and deleting the ones that are gone, since that's the only time the GL
+    context is guaranteed to be current.
+    """
+
+    PALETTE_SIZE = 256
+
+    def __init__(self):
+        self.program = shaders.compileProgram(
+            shaders.compileShader(VERTEX_SHADER, GL_VERTEX_SHADER),
+            shaders.compileShader(FRAGMENT_SHADER, GL_FRAGMENT_SHADER),
+        )
+        self.corner_location = glGetAttribLocation(self.program, "corner")
+        self.instance_location = glGetAttribLocation(self.program, "instance")
+
+        self.corner_buffer = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self.corner_buffer)
+        glBufferData(GL_ARRAY_BUFFER, CORNERS.nbytes, CORNERS, GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+        self.palette_texture = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, self.palette_texture)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+        self.palette = None
+
+        self.buffers: dict[Shard, tuple[int, GridIndex, float]] = {}
+
+    @staticmethod
+    def is_supported() -> bool:
+        return bool(glDrawArraysInstanced) and bool(glVertexAttribDivisor)
+
+    def _sync_buffers(self, store: CircleStore):
+        for shard in [shard for shard in self.buffers if shard not in store]:
+            glDeleteBuffers(1, [self.buffers.pop(shard)[0]])
+
+        for shard, circles in store.items():
+            if shard in self.buffers or len(circles) == 0:
+                continue
+            instances = circle_instances(circles)
+            buffer = glGenBuffers(1)
+            glBindBuffer(GL_ARRAY_BUFFER, buffer)
+            glBufferData(GL_ARRAY_BUFFER, instances.nbytes, instances, GL_STATIC_DRAW)
+            self.buffers[shard] = (buffer, store.index(shard), float(circles.radius[0]))
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def _upload_palette(
+        self, colors_by_degree: dict[int, list[float]], default_color: list[float]
+    ):
+        palette = build_palette(colors_by_degree, default_color, self.PALETTE_SIZE)
+        if self.palette is not None and np.array_equal(palette, self.palette):
+            return
+        self.palette = palette
+        glBindTexture(GL_TEXTURE_2D, self.palette_texture)
+        glTexImage2D(
+            GL_TEXTURE_2D, 0, GL_RGB, self.PALETTE_SIZE, 1, 0, GL_RGB, GL_FLOAT, palette
+        )
+
+    def draw(
+        self,
+        store: CircleStore,
+        falloff_texture: int,
+        colors_by_degree: dict[int, list[float]],
+        default_color: list[float],
+        zoom: float,
+        translate: tuple[float, float],
+        radius_scale: float,
+        region: Region,
+        min_radius: float,
+        budget: Optional[int] = None,
+    ) -> int:
+        """
+        Draws the circles of store that overlap region, the part of the plane on
+        screen, and returns how many were drawn. Every shard shares one radius, so
+        shards whose circles would be smaller than min_radius (in the units of
+        region) are skipped as a whole.
+
+        With a budget, about that many circles are drawn: the shards with the
+        largest circles whole, and every few circles of the others, brightened to
+        make up for the ones left out.
+        """
+        self._sync_buffers(store)
+
+        glActiveTexture(GL_TEXTURE1)
+        self._upload_palette(colors_by_degree, default_color)
+        glActiveTexture(GL_TEXTURE0)
+        glBindTexture(GL_TEXTURE_2D, falloff_texture)
+
+        glUseProgram(self.program)
+        glUniform1i(glGetUniformLocation(self.program, "falloff"), 0)
+        glUniform1i(glGetUniformLocation(self.program, "palette"), 1)
+        glUniform1f(
+            glGetUniformLocation(self.program, "palette_size"), self.PALETTE_SIZE
+        )
+        glUniform2f(glGetUniformLocation(self.program, "translate"), *translate)
+        glUniform1f(glGetUniformLocation(self.program, "zoom"), zoom)
+        glUniform1f(glGetUniformLocation(self.program, "radius_scale"), radius_scale)
+
+        glBindBuffer(GL_ARRAY_BUFFER, self.corner_buffer)
+        glEnableVertexAttribArray(self.corner_location)
+        glVertexAttribPointer(self.corner_location, 2, GL_FLOAT, GL_FALSE, 0, None)
+
+        glEnableVertexAttribArray(self.instance_location)
+        glVertexAttribDivisor(self.instance_location, 1)
+        # Largest circles first, which a budget draws whole
+        visible = []
+        for buffer, index, radius in sorted(
+            self.buffers.values(), key=lambda entry: entry[2], reverse=True
+        ):
+            extent = radius * radius_scale
+            if extent >= min_radius:
+                visible.append((buffer, index.ranges(region, extent)))
+        counts = [sum(stop - start for start, stop in ranges) for _, ranges in visible]
+        if budget is None:
+            strides = [1] * len(visible)
+        else:
+            strides = budget_strides(counts, budget, MAX_STRIDE)
+
+        weight_location = glGetUniformLocation(self.program, "weight")
+        drawn = 0
+        for (buffer, ranges), stride in zip(visible, strides):
+            if stride == 0:
+                continue
+            glUniform1f(weight_location, stride)
+            glBindBuffer(GL_ARRAY_BUFFER, buffer)
+            for start, stop in ranges:
+                glVertexAttribPointer(
+                    self.instance_location,
+                    4,
+                    GL_FLOAT,
+                    GL_FALSE,
+                    stride * INSTANCE_BYTES,
+                    ctypes.c_void_p(start * INSTANCE_BYTES),
+                )
+                instances = math.ceil((stop - start) / stride)
+                glDrawArraysInstanced(GL_TRIANGLE_STRIP, 0, 4, instances)
+                drawn += instances
+
+        glVertexAttribDivisor(self.instance_location, 0)
+        glDisableVertexAttribArray(self.instance_location)
+        glDisableVertexAttribArray(self.corner_location)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glUseProgram(0)
+        return drawn
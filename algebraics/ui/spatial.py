@@ -0,0 +1,346 @@
+import math
+from typing import Optional
+
+import numpy as np
+from pydantic import BaseModel, ConfigDict
+
+from algebraics.polynomial.models import Shard
+from algebraics.ui.models import CircleColumns
+
+# (x_min, y_min, x_max, y_max) of a region of the complex plane
+Region = tuple[float, float, float, float]
+
+# Circles within a subcell are sorted by their x coordinate rounded to this many steps
+# per subcell, which sorts them along with the subcells in a single pass
+SUBCELL_STEPS = 2**16
+
+# nearest_circles narrows its search down while it would go through more circles
+NEAREST_CANDIDATES = 4096
+
+
+class GridIndex(BaseModel):
+    """
+    Uniform grid over the bounding box of a batch of circle centers. The batch is
+    sorted by cell in row-major order, so the circles of a rectangle of cells are one
+    slice per grid row.
+
+    Every cell is split further into subcells x subcells subcells, by which the
+    circles of a cell are sorted in row-major order in turn, and the circles of a
+    subcell are sorted by x, so nearest_circles can find the circles around a point
+    without going through whole cells. starts holds the first circle of every
+    subcell in that order, cell by cell, and one past the last circle.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    x_min: float
+    y_min: float
+    cell_width: float
+    cell_height: float
+    cells: int
+    subcells: int = 1
+    starts: np.ndarray
+
+    def ranges(self, region: Region, margin: float) -> list[tuple[int, int]]:
+        """
+        Returns the slices of the sorted batch holding every circle whose center
+        lies within margin of region, merging slices that touch.
+        """
+        x_min, y_min, x_max, y_max = region
+        columns = self._cell_span(
+            x_min - margin, x_max + margin, self.x_min, self.cell_width
+        )
+        rows = self._cell_span(
+            y_min - margin, y_max + margin, self.y_min, self.cell_height
+        )
+        if columns is None or rows is None:
+            return []
+
+        ranges: list[tuple[int, int]] = []
+        first = self.subcells**2
+        for row in range(rows[0], rows[1] + 1):
+            start = int(self.starts[(row * self.cells + columns[0]) * first])
+            stop = int(self.starts[(row * self.cells + columns[1] + 1) * first])
+            if start == stop:
+                continue
+            if ranges and ranges[-1][1] == start:
+                ranges[-1] = (ranges[-1][0], stop)
+            else:
+                ranges.append((start, stop))
+        return ranges
+
+    @property
+    def step(self) -> float:
+        """
+        The width of the steps circles within a subcell are sorted by
+        """
+        return self.cell_width / self.subcells / SUBCELL_STEPS
+
+    def nearby(self, x: float, y: float, distance: float) -> list[tuple[int, int]]:
+        """
+        Returns the slices of the sorted batch holding every circle whose center
+        lies within distance of x, y along both axes, going through subcells rather
+        than cells. The circles of every slice are sorted by x, up to a step.
+        """
+        size = self.subcells
+        columns = self._cell_span(
+            x - distance, x + distance, self.x_min, self.cell_width / size, size
+        )
+        rows = self._cell_span(
+            y - distance, y + distance, self.y_min, self.cell_height / size, size
+        )
+        if columns is None or rows is None:
+            return []
+
+        ranges: list[tuple[int, int]] = []
+        for row in range(rows[0], rows[1] + 1):
+            cell_row, subrow = divmod(row, size)
+            # The subcells of the row are contiguous within every cell
+            for column in range(columns[0] // size, columns[1] // size + 1):
+                first = max(columns[0] - column * size, 0)
+                last = min(columns[1] - column * size, size - 1)
+                offset = ((cell_row * self.cells + column) * size + subrow) * size
+                start = int(self.starts[offset + first])
+                stop = int(self.starts[offset + last + 1])
+                if start < stop:
+                    ranges.append((start, stop))
+        return ranges
+
+    def _cell_span(
+        self, low: float, high: float, origin: float, size: float, subcells: int = 1
+    ) -> tuple[int, int] | None:
+        count = self.cells * subcells
+        first = math.floor((low - origin) / size)
+        last = math.floor((high - origin) / size)
+        if last < 0 or first >= count:
+            return None
+        return max(first, 0), min(last, count - 1)
+
+
+def build_grid_index(
+    circles: CircleColumns, cells: int, points_per_cell: Optional[int] = None
+) -> tuple[CircleColumns, GridIndex]:
+    """
+    Sorts circles by grid cell and returns them along with the index over them. With
+    points_per_cell, cells are split into subcells holding about that many circles
+    on average, for GridIndex.nearby.
+    """
+    order, index = grid_order(
+        circles.x_center, circles.y_center, cells, points_per_cell
+    )
+    return circles.select(order), index
+
+
+def grid_order(
+    x: np.ndarray, y: np.ndarray, cells: int, points_per_cell: Optional[int] = None
+) -> tuple[np.ndarray, GridIndex]:
+    """
+    The order that sorts the points x, y by grid cell, and the index over them in
+    that order, as build_grid_index makes them
+    """
+    x_min, x_max = (float(x.min()), float(x.max())) if len(x) else (0.0, 0.0)
+    y_min, y_max = (float(y.min()), float(y.max())) if len(y) else (0.0, 0.0)
+    # Pad the box a little so the largest coordinates still fall in the last cell
+    cell_width = max(x_max - x_min, 1e-9) * (1 + 1e-6) / cells
+    cell_height = max(y_max - y_min, 1e-9) * (1 + 1e-6) / cells
+    subcells = 1
+    if points_per_cell is not None:
+        subcells = max(math.ceil(math.sqrt(len(x) / points_per_cell) / cells), 1)
+
+    count = cells * subcells
+    # In double precision, as there can be more steps than float32 resolves, and in
+    # place, as there can be tens of millions of points
+    steps = np.subtract(x, x_min, dtype=np.float64)
+    steps /= cell_width / subcells / SUBCELL_STEPS
+    steps = np.clip(steps.astype(np.int64), 0, count * SUBCELL_STEPS - 1)
+    column = steps // SUBCELL_STEPS
+    steps %= SUBCELL_STEPS
+    row = np.subtract(y, y_min, dtype=np.float64)
+    row /= cell_height / subcells
+    row = np.clip(row.astype(np.int64), 0, count - 1)
+    subcell = row // subcells * cells + column // subcells
+    subcell *= subcells
+    subcell += row % subcells
+    subcell *= subcells
+    subcell += column % subcells
+    del row, column
+    key = subcell * SUBCELL_STEPS
+    key += steps
+    del steps
+    order = np.argsort(key)
+    del key
+    starts = np.zeros(count * count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(subcell, minlength=count * count), out=starts[1:])
+    index = GridIndex(
+        x_min=x_min,
+        y_min=y_min,
+        cell_width=cell_width,
+        cell_height=cell_height,
+        cells=cells,
+        subcells=subcells,
+        starts=starts,
+    )
+    return order, index
+
+
+class PointIndex(BaseModel):
+    """
+    The centers of the circles of several shards indexed together, so the circles
+    around a point are found in one search whatever the number of shards. The
+    centers are sorted by grid, which indexes them, and positions holds the
+    position of every center among the batches of the shards one after another,
+    which start at offsets.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    shards: list[Shard]
+    offsets: np.ndarray
+    x_center: np.ndarray
+    y_center: np.ndarray
+    positions: np.ndarray
+    grid: GridIndex
+
+    def locate(self, found: np.ndarray) -> list[tuple[Shard, int]]:
+        """
+        The shard and position in its batch of the centers at positions found of
+        this index
+        """
+        positions = self.positions[found].astype(np.int64)
+        numbers = np.searchsorted(self.offsets, positions, side="right") - 1
+        return [
+            (self.shards[number], int(position - self.offsets[number]))
+            for number, position in zip(numbers, positions)
+        ]
+
+
+def build_point_index(
+    batches: dict[Shard, CircleColumns], cells: int, points_per_cell: int
+) -> PointIndex:
+    """
+    Indexes the circles of every shard in batches together, see PointIndex
+    """
+    offsets = np.zeros(len(batches) + 1, dtype=np.int64)
+    np.cumsum([len(circles) for circles in batches.values()], out=offsets[1:])
+
+    def column(name: str) -> np.ndarray:
+        arrays = [getattr(circles, name) for circles in batches.values()]
+        return np.concatenate(arrays) if arrays else np.empty(0, dtype=np.float32)
+
+    x, y = column("x_center"), column("y_center")
+    order, grid = grid_order(x, y, cells, points_per_cell)
+    dtype = np.uint32 if offsets[-1] <= np.iinfo(np.uint32).max else np.int64
+    return PointIndex(
+        shards=list(batches),
+        offsets=offsets,
+        x_center=x[order],
+        y_center=y[order],
+        positions=order.astype(dtype),
+        grid=grid,
+    )
+
+
+def candidate_ranges(
+    circles: CircleColumns | PointIndex,
+    index: GridIndex,
+    x: float,
+    y: float,
+    distance: float,
+) -> list[tuple[int, int]]:
+    """
+    The parts of the slices of GridIndex.nearby whose circles are within distance of
+    x, y along the x axis as well, found by bisecting the slices
+    """
+    ranges = []
+    for start, stop in index.nearby(x, y, distance):
+        # Circles a step off x may be out of order
+        first, last = np.searchsorted(
+            circles.x_center[start:stop],
+            [x - distance - index.step, x + distance + index.step],
+        )
+        if first < last:
+            ranges.append((start + int(first), start + int(last)))
+    return ranges
+
+
+def nearest_circles(
+    circles: CircleColumns | PointIndex,
+    index: GridIndex,
+    x: float,
+    y: float,
+    distance: float,
+    count: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the positions in circles, sorted by and carrying index, of up to count
+    circles whose centers are nearest x, y and within distance of it, nearest
+    first, and their distances. circles can also be a PointIndex, with its grid as
+    index. Where more than NEAREST_CANDIDATES circles are that close, the search is
+    narrowed down first, so dense areas are searched just as fast.
+    """
+    radius = distance
+    ranges = candidate_ranges(circles, index, x, y, radius)
+    if not ranges:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    wider = []  # the searches narrowed down, to widen again when too few are left
+    candidates = sum(stop - start for start, stop in ranges)
+    while candidates > NEAREST_CANDIDATES and radius > index.step:
+        narrower = candidate_ranges(circles, index, x, y, radius / 4)
+        # Circles that coincide don't get any fewer
+        if sum(stop - start for start, stop in narrower) == candidates:
+            break
+        wider.append((radius, ranges))
+        radius, ranges = radius / 4, narrower
+        candidates = sum(stop - start for start, stop in ranges)
+
+    while True:
+        # Slices are copied rather than gathered, and distances compared squared,
+        # which is faster for large piles
+        squared = np.concatenate(
+            [
+                np.square(circles.x_center[start:stop] - x)
+                + np.square(circles.y_center[start:stop] - y)
+                for start, stop in ranges
+            ]
+            or [np.empty(0)]
+        )
+        within = np.flatnonzero(squared <= radius * radius)
+        if len(within) >= count or not wider:
+            break
+        radius, ranges = wider.pop()
+
+    if len(within) > count:
+        kept = squared[within]
+        # Many roots coincide exactly, like 1 and -1 for many polynomials, where
+        # partitioning the ties would be slow and any of them will do
+        closest = within[kept == kept.min()]
+        if len(closest) >= count:
+            within = closest[:count]
+        else:
+            within = within[np.argpartition(kept, count - 1)[:count]]
+    within = within[np.argsort(squared[within], kind="stable")]
+    distances = np.sqrt(squared[within].astype(np.float64))
+
+    # The positions in circles of the distances kept
+    starts = np.array([start for start, _ in ranges], dtype=np.int64)
+    firsts = np.cumsum([0] + [stop - start for start, stop in ranges[:-1]])
+    slices = np.searchsorted(firsts, within, side="right") - 1
+    return starts[slices] + within - firsts[slices], distances
+
+
+def visible_mask(
+    circles: CircleColumns, region: Region, radius_scale: float, min_radius: float
+) -> np.ndarray:
+    """
+    Flags the circles that overlap region and whose scaled radius is at least
+    min_radius, in the same units as region.
+    """
+    extent = circles.radius * radius_scale
+    x_min, y_min, x_max, y_max = region
+    return (
+        (extent >= min_radius)
+        & (circles.x_center + extent >= x_min)
+        & (circles.x_center - extent <= x_max)
+        & (circles.y_center + extent >= y_min)
+        & (circles.y_center - extent <= y_max)
+    )
@@ -0,0 +1,54 @@
+import time
+from pathlib import Path
+from typing import Optional
+
+from pydantic import BaseModel
+from PyQt6.QtCore import QObject, QTimer
+from PyQt6.QtWidgets import QApplication
+
+from algebraics.ui.gl_widget import GLWidget
+
+
+class StartupTimes(BaseModel):
+    """
+    Seconds from the launch of the application to every step of its startup. Steps
+    that weren't reached are None, frames in particular on platforms without OpenGL.
+    """
+
+    imported: float = 0.0  # modules imported
+    window_shown: float = 0.0
+    first_frame: Optional[float] = None
+    first_circles: Optional[float] = None  # first frame drawing circles
+
+    def save(self, path: str | Path):
+        Path(path).write_text(self.model_dump_json(indent=2))
+
+
+class StartupProbe(QObject):
+    """
+    Records the StartupTimes of the application launched at launched and done
+    importing at imported (time.perf_counter values), and quits it once it drew
+    circles, or after timeout seconds
+    """
+
+    def __init__(
+        self, launched: float, imported: float, widget: GLWidget, timeout: float
+    ):
+        super().__init__(widget)
+        self.launched = launched
+        self.times = StartupTimes(imported=imported - launched)
+        widget.frame_drawn.connect(self._frame_drawn)
+        QTimer.singleShot(int(timeout * 1000), QApplication.quit)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.launched
+
+    def window_shown(self):
+        self.times.window_shown = self.elapsed()
+
+    def _frame_drawn(self, circles: int):
+        if self.times.first_frame is None:
+            self.times.first_frame = self.elapsed()
+        if circles and self.times.first_circles is None:
+            self.times.first_circles = self.elapsed()
+            QApplication.quit()
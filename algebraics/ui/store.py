@@ -0,0 +1,138 @@
+from typing import Collection, ItemsView, Optional
+
+from algebraics.config import settings
+from algebraics.polynomial.models import Shard
+from algebraics.ui.models import CircleColumns
+from algebraics.ui.spatial import (
+    GridIndex,
+    PointIndex,
+    build_grid_index,
+    nearest_circles,
+)
+
+
+class CircleStore:
+    """
+    Columnar storage of every circle GLWidget draws, kept as one CircleColumns batch
+    per shard so shards can be added and dropped without touching the others. Every
+    batch is sorted by and carries a GridIndex, so the renderer can cull it.
+
+    The circles around a point are found through a PointIndex over the shards,
+    built off the GUI thread once they are generated, and through the GridIndex of
+    every shard added since.
+    """
+
+    def __init__(self):
+        self.batches: dict[Shard, CircleColumns] = {}
+        self.indexes: dict[Shard, GridIndex] = {}
+        self._columns: Optional[CircleColumns] = None
+        self.point_index: Optional[PointIndex] = None
+        self.indexed: set[Shard] = set()  # the shards of point_index
+
+    def __contains__(self, shard: Shard) -> bool:
+        return shard in self.batches
+
+    def __len__(self) -> int:
+        return sum(len(batch) for batch in self.batches.values())
+
+    @property
+    def nbytes(self) -> int:
+        return sum(batch.nbytes for batch in self.batches.values())
+
+    def shards(self) -> set[Shard]:
+        return set(self.batches)
+
+    def items(self) -> ItemsView[Shard, CircleColumns]:
+        return self.batches.items()
+
+    def index(self, shard: Shard) -> GridIndex:
+        return self.indexes[shard]
+
+    def add(
+        self, shard: Shard, circles: CircleColumns, index: Optional[GridIndex] = None
+    ):
+        """
+        Adds the circles of a shard, which must already be sorted by index when one
+        is given. Indexing can be expensive, so callers off the GUI thread should
+        build it with build_grid_index beforehand.
+        """
+        if index is None:
+            circles, index = build_grid_index(
+                circles,
+                settings.RENDERING.GRID_CELLS,
+                settings.INSPECTION.POINTS_PER_CELL,
+            )
+        if shard in self.indexed:
+            self.set_point_index(None)
+        self.batches[shard] = circles
+        self.indexes[shard] = index
+        self._columns = None
+
+    def retain(self, shards: Collection[Shard]):
+        for shard in [shard for shard in self.batches if shard not in shards]:
+            if shard in self.indexed:
+                self.set_point_index(None)
+            del self.batches[shard]
+            del self.indexes[shard]
+            self._columns = None
+
+    def columns(self) -> CircleColumns:
+        """
+        All circles as a single batch, concatenated on first use after a change
+        """
+        if self._columns is None:
+            self._columns = CircleColumns.concatenate(list(self.batches.values()))
+        return self._columns
+
+    def set_point_index(self, point_index: Optional[PointIndex]):
+        """
+        Finds circles through point_index, built with build_point_index over
+        batches of the store, from now on. It is dropped again when any of its
+        shards is replaced or removed.
+        """
+        if point_index is not None and not set(point_index.shards) <= set(self.batches):
+            raise ValueError("The point index covers shards the store doesn't hold")
+        self.point_index = point_index
+        self.indexed = set() if point_index is None else set(point_index.shards)
+
+    def nearest(
+        self, x: float, y: float, distance: float, count: int
+    ) -> list[tuple[Shard, int, float]]:
+        """
+        The shard, position in its batch and distance of up to count circles whose
+        centers are nearest x, y and within distance of it, nearest first
+        """
+        found = []
+        if self.point_index is not None:
+            positions, distances = nearest_circles(
+                self.point_index, self.point_index.grid, x, y, distance, count
+            )
+            found = [
+                (shard, position, found_distance)
+                for (shard, position), found_distance in zip(
+                    self.point_index.locate(positions), distances
+                )
+            ]
+            if len(found) == count:
+                distance = found[-1][2]
+
+        # Normally every shard is indexed, and there are no others to search
+        others = self.batches.items() if len(self.indexed) < len(self.batches) else []
+        for shard, circles in others:
+            if shard in self.indexed:
+                continue
+            positions, distances = nearest_circles(
+                circles, self.indexes[shard], x, y, distance, count
+            )
+            if len(positions) == 0:
+                continue
+            found.extend(zip([shard] * len(positions), positions, distances))
+            found.sort(key=lambda entry: entry[2])
+            # The other shards only need to be searched up to the last one kept
+            del found[count:]
+            if len(found) == count:
+                distance = found[-1][2]
+        return [
+            (shard, int(position), float(distance))
+            for shard, position, distance in found[:count]
+        ]
@@ -0,0 +1,120 @@
+import contextlib
+import itertools
+from operator import itemgetter
+from typing import Optional
+
+import numpy as np
+from PyQt6.QtCore import QObject, QThread, pyqtSignal
+
+from algebraics.config import settings
+from algebraics.instrumentation.statistics import PipelineStatistics, stage
+from algebraics.polynomial.cache import RootCache
+from algebraics.polynomial.families import count_shard
+from algebraics.polynomial.generation import enumerate_shards, stream_roots
+from algebraics.polynomial.models import Shard
+from algebraics.polynomial.ranking import polynomial_ranks
+from algebraics.ui.circle import generate_circles
+from algebraics.ui.models import CircleColumns
+from algebraics.ui.spatial import build_grid_index, build_point_index
+
+
+class GenerationWorker(QThread):
+    """
+    Solves the shards GLWidget doesn't hold yet off the GUI thread, emitting the
+    circles of every shard, with the ranks of their polynomials, and their spatial
+    index as soon as the shard is done so they can be drawn right away. Once every
+    shard is done, the circles of all of them and of held, the circles GLWidget
+    already holds, are indexed together for finding the roots under the cursor.
+    Progress is reported as (polynomials done, polynomials total), and every stage
+    is recorded into statistics when it is given. Only the worker touches them, so
+    a copy is emitted after every shard for the GUI thread to read.
+    """
+
+    shard_generated = pyqtSignal(object, object, object)
+    progress = pyqtSignal(object, object)
+    point_index_built = pyqtSignal(object)
+    statistics_recorded = pyqtSignal(object)
+
+    def __init__(
+        self,
+        max_length: int,
+        max_degree: int,
+        cache: Optional[RootCache],
+        exclude: set[Shard],
+        statistics: Optional[PipelineStatistics] = None,
+        parent: Optional[QObject] = None,
+        family: str = "length",
+        held: Optional[dict[Shard, CircleColumns]] = None,
+    ):
+        super().__init__(parent)
+        self.max_length = max_length
+        self.max_degree = max_degree
+        self.family = family
+        self.cache = cache
+        self.exclude = exclude
+        self.statistics = statistics
+        self.held = held or {}
+
+    def run(self):
+        with stage(self.statistics, "count"):
+            total = sum(
+                count_shard(shard)
+                for shard in enumerate_shards(
+                    self.max_length, self.max_degree, self.family
+                )
+                if shard not in self.exclude
+            )
+        done = 0
+        self.progress.emit(done, total)
+
+        roots_by_shard = stream_roots(
+            self.max_length,
+            self.max_degree,
+            settings.GENERATION.STREAM_CHUNK_ROWS,
+            cache=self.cache,
+            exclude=self.exclude,
+            statistics=self.statistics,
+            family=self.family,
+        )
+        generated: dict[Shard, CircleColumns] = {}
+        # Closing the generator as soon as we're cancelled stops the pending shards
+        with contextlib.closing(roots_by_shard):
+            # Large shards come in consecutive chunks, which are reported as they
+            # are solved and drawn once the shard is complete
+            for shard, chunks in itertools.groupby(roots_by_shard, key=itemgetter(0)):
+                batches, rows = [], 0
+                for _, roots in chunks:
+                    if self.isInterruptionRequested():
+                        return
+                    batches.append(roots)
+                    rows += roots.shape[0]
+                    self.progress.emit(done + rows, total)
+
+                with stage(self.statistics, "circles"):
+                    roots = batches[0] if len(batches) == 1 else np.concatenate(batches)
+                    circles, index = build_grid_index(
+                        generate_circles(shard, roots, polynomial_ranks(shard, roots)),
+                        settings.RENDERING.GRID_CELLS,
+                        settings.INSPECTION.POINTS_PER_CELL,
+                    )
+                if self.statistics is not None:
+                    self.statistics.circles += len(circles)
+                generated[shard] = circles
+                self.shard_generated.emit(shard, circles, index)
+                self.report_statistics()
+                done += count_shard(shard)
+                self.progress.emit(done, total)
+
+        with stage(self.statistics, "circles"):
+            point_index = build_point_index(
+                {**self.held, **generated},
+                settings.RENDERING.GRID_CELLS,
+                settings.INSPECTION.POINTS_PER_CELL,
+            )
+        if not self.isInterruptionRequested():
+            self.point_index_built.emit(point_index)
+            self.report_statistics()
+
+    def report_statistics(self):
+        if self.statistics is not None:
+            self.statistics_recorded.emit(self.statistics.model_copy(deep=True))
@@ -1,14 +1,63 @@
+import time
+
+# Taken before anything else is imported, so that startup times include the imports
+LAUNCHED = time.perf_counter()
+
+import argparse
+import multiprocessing
 import sys
 
 from PyQt6.QtWidgets import (
     QApplication,
 )
 
+from algebraics.config import settings
 from algebraics.ui.main_widget import MainWindow
+from algebraics.ui.startup import StartupProbe
+
+IMPORTED = time.perf_counter()
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Explore the algebraic numbers")
+    parser.add_argument(
+        "--measure-startup",
+        metavar="FILE",
+        help="write the time taken to show the window, draw the first frame and "
+        "draw the first circles to FILE as JSON, then quit",
+    )
+    parser.add_argument(
+        "--startup-timeout",
+        type=float,
+        default=30.0,
+        help="seconds to wait for circles with --measure-startup",
+    )
+    parser.add_argument(
+        "--dataset",
+        help="directory of a dataset merged by generate.py to read the roots from",
+    )
+    # Qt reads its own options, such as -platform, from the rest
+    return parser.parse_known_args()[0]
+
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    arguments = parse_arguments()
+    if arguments.dataset:
+        settings.DATASET.DIRECTORY = arguments.dataset
     app = QApplication(sys.argv)
     window = MainWindow()
+    probe = None
+    if arguments.measure_startup:
+        probe = StartupProbe(
+            LAUNCHED, IMPORTED, window.gl_widget, arguments.startup_timeout
+        )
     window.resize(1200, 1000)
     window.show()
-    sys.exit(app.exec())
+    if probe is None:
+        sys.exit(app.exec())
+
+    probe.window_shown()
+    app.exec()
+    window.close()
+    probe.times.save(arguments.measure_startup)
@@ -0,0 +1,73 @@
+import argparse
+import multiprocessing
+import sys
+
+from algebraics.benchmark.suite import Measurement, Report, compare, run_suite
+
+
+def parse_size(text: str) -> tuple[int, int]:
+    length, degree = text.lower().split("x")
+    return int(length), int(degree)
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Time enumeration, root finding, circle generation and drawing"
+    )
+    parser.add_argument(
+        "--sizes",
+        type=lambda text: [parse_size(size) for size in text.split(",")],
+        default=[(4, 3), (6, 4), (8, 5)],
+        help="comma separated LENGTHxDEGREE sizes, e.g. 4x3,6x4 (default 4x3,6x4,8x5)",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--only", nargs="*", help="only run the cases starting with these names"
+    )
+    parser.add_argument("--output", help="JSON file to write the results to")
+    parser.add_argument("--baseline", help="JSON results of an earlier run")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="relative slowdown or memory growth flagged as a regression",
+    )
+    return parser.parse_args()
+
+
+def print_measurement(measurement: Measurement):
+    name = f"{measurement.name} {measurement.max_length}x{measurement.max_degree}"
+    if measurement.skipped:
+        print(f"{name:<36} skipped: {measurement.skipped}")
+        return
+    print(
+        f"{name:<36} {measurement.seconds * 1000:>10.2f} ms "
+        f"{measurement.throughput:>14,.0f} items/s "
+        f"{measurement.peak_bytes / 2**20:>9.1f} MiB"
+    )
+
+
+def main() -> int:
+    arguments = parse_arguments()
+    report = run_suite(
+        arguments.sizes, arguments.repeat, arguments.only, print_measurement
+    )
+    if arguments.output:
+        report.save(arguments.output)
+
+    if not arguments.baseline:
+        return 0
+    regressions = compare(report, Report.load(arguments.baseline), arguments.threshold)
+    for regression in regressions:
+        print(
+            f"REGRESSION {regression.name} "
+            f"{regression.max_length}x{regression.max_degree} {regression.metric}: "
+            f"{regression.baseline:.4g} -> {regression.current:.4g} "
+            f"({regression.ratio:.2f}x)"
+        )
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,127 @@
+import argparse
+import multiprocessing
+import sys
+
+from algebraics.polynomial.families import available_families
+from algebraics.polynomial.sharding import (
+    create_plan,
+    job_status,
+    load_plan,
+    make_plan,
+    merge,
+    select_jobs,
+    solve_jobs,
+    verify,
+)
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Solve the polynomials in numbered jobs that any number of "
+        "processes and machines sharing a directory can work through, then merge "
+        "them into a dataset the viewer and render.py load with --dataset"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    plan = commands.add_parser(
+        "plan",
+        help="split the enumeration into jobs, which gives the same jobs with the "
+        "same ids every time",
+    )
+    plan.add_argument("directory")
+    plan.add_argument("--length", type=int, default=5)
+    plan.add_argument("--degree", type=int, default=5)
+    plan.add_argument(
+        "--family",
+        choices=[family.name for family in available_families()],
+        default="length",
+        help="polynomial family to enumerate, whose parameter --length bounds",
+    )
+    plan.add_argument(
+        "--rows-per-job",
+        type=int,
+        default=2**20,
+        help="polynomials of a job at most, before redundant ones are left out",
+    )
+
+    solve = commands.add_parser(
+        "solve",
+        help="solve jobs that aren't done yet, which can be interrupted and resumed",
+    )
+    solve.add_argument("directory")
+    solve.add_argument("--jobs", help="ids to solve, e.g. 0-99,150 (default all)")
+    solve.add_argument(
+        "--part",
+        help="I/N solves every Nth job starting with job I, so N machines each "
+        "running one of the parts 0/N to N-1/N solve all jobs",
+    )
+    solve.add_argument(
+        "--workers", type=int, default=0, help="0 uses one process per core"
+    )
+
+    status = commands.add_parser("status", help="count the jobs done")
+    status.add_argument("directory")
+
+    check = commands.add_parser(
+        "verify", help="check that every job is done and intact"
+    )
+    check.add_argument("directory")
+
+    combine = commands.add_parser(
+        "merge", help="verify the jobs, then merge them into one file per shard"
+    )
+    combine.add_argument("directory")
+    combine.add_argument("output", help="dataset directory to write")
+    return parser.parse_args()
+
+
+def main():
+    arguments = parse_arguments()
+    if arguments.command == "plan":
+        # Like the Generate button, the degree counts one less than the degree of
+        # the enumerated polynomials
+        plan = create_plan(
+            arguments.directory,
+            make_plan(
+                arguments.length,
+                arguments.degree + 1,
+                arguments.rows_per_job,
+                arguments.family,
+            ),
+        )
+        print(f"{len(plan.jobs)} jobs in {len(plan.shards())} shards")
+    elif arguments.command == "solve":
+        jobs = select_jobs(
+            load_plan(arguments.directory), arguments.jobs, arguments.part
+        )
+        polynomials = dropped = solved = 0
+        for result in solve_jobs(arguments.directory, jobs, arguments.workers):
+            polynomials += result.polynomials
+            dropped += result.dropped
+            solved += 1
+            print(f"job {result.id} done, {result.polynomials:,} polynomials")
+        print(
+            f"{solved} of {len(jobs)} jobs solved, the others were done already; "
+            f"{polynomials:,} polynomials, {dropped:,} dropped"
+        )
+    elif arguments.command == "status":
+        done, total = job_status(arguments.directory)
+        print(f"{done} of {total} jobs done")
+    elif arguments.command == "verify":
+        problems = verify(arguments.directory)
+        for id, problem in problems.items():
+            print(f"job {id}: {problem}")
+        if problems:
+            sys.exit(1)
+        print("all jobs are done and intact")
+    else:
+        try:
+            plan = merge(arguments.directory, arguments.output)
+        except ValueError as error:
+            sys.exit(str(error))
+        print(f"{len(plan.shards())} shards merged into {arguments.output}")
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    main()
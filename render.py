@@ -0,0 +1,187 @@
+import argparse
+import multiprocessing
+
+from algebraics.config import settings
+from algebraics.polynomial.cache import open_root_cache
+from algebraics.polynomial.families import available_families
+from algebraics.render.density import ToneMapping, render_density_image
+from algebraics.render.headless import (
+    View,
+    default_palette,
+    generate_circles,
+    render_image,
+)
+from algebraics.render.pyramid import export_pyramid, generate_labelled_circles
+from algebraics.render.stream import render_streamed_image
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Render the algebraic numbers to an image without a display"
+    )
+    parser.add_argument(
+        "output",
+        help="image file to write, e.g. poster.png, or directory with --levels",
+    )
+    parser.add_argument("--length", type=int, default=5)
+    parser.add_argument("--degree", type=int, default=5)
+    parser.add_argument(
+        "--family",
+        choices=[family.name for family in available_families()],
+        default="length",
+        help="polynomial family to enumerate, whose parameter --length bounds",
+    )
+    parser.add_argument("--width", type=int, default=4096)
+    parser.add_argument("--height", type=int, default=4096)
+    parser.add_argument("--center-x", type=float, default=0.0)
+    parser.add_argument("--center-y", type=float, default=0.0)
+    parser.add_argument(
+        "--half-width",
+        type=float,
+        default=1.0,
+        help="distance from the center to the left and right edges of the image",
+    )
+    parser.add_argument("--radius-scale", type=float, default=10.0)
+    parser.add_argument("--tile-size", type=int, default=1024)
+    parser.add_argument(
+        "--workers", type=int, default=0, help="0 uses one process per core"
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="splat the circles into the image as they are generated instead of "
+        "generating them all first, which keeps memory bounded for large lengths",
+    )
+    parser.add_argument(
+        "--chunk-rows",
+        type=int,
+        help="polynomials solved at a time with --stream (default STREAM_CHUNK_ROWS)",
+    )
+    parser.add_argument(
+        "--density",
+        action="store_true",
+        help="render tone-mapped histograms of the circles instead of the circles, "
+        "streaming them like --stream",
+    )
+    parser.add_argument("--tone-mapping", choices=["log", "gamma"], default="log")
+    parser.add_argument("--exposure", type=float, default=1.0)
+    parser.add_argument("--gamma", type=float, default=2.2)
+    parser.add_argument(
+        "--smoothing",
+        type=float,
+        default=0.0,
+        help="standard deviation in pixels of a Gaussian blur of the density",
+    )
+    parser.add_argument(
+        "--histograms",
+        help="directory keeping the density histograms: they are computed into it "
+        "the first time and read back afterwards, so only the tone mapping is redone",
+    )
+    parser.add_argument(
+        "--dataset",
+        help="directory of a dataset merged by generate.py to read the roots from",
+    )
+    parser.add_argument(
+        "--levels",
+        type=int,
+        help="write a z/x/y pyramid of tiles for zoom levels 0 to LEVELS into the "
+        "output directory instead of one image, only rendering the tiles that "
+        "changed since the last export; --width and --height are ignored",
+    )
+    return parser.parse_args()
+
+
+def main():
+    arguments = parse_arguments()
+    if arguments.dataset:
+        settings.DATASET.DIRECTORY = arguments.dataset
+
+    # Like the Generate button, the degree spin box counts one less than the degree
+    # of the enumerated polynomials
+    max_degree = arguments.degree + 1
+    if arguments.levels is not None:
+        export(arguments, max_degree)
+        return
+
+    view = View.centered(
+        complex(arguments.center_x, arguments.center_y),
+        arguments.half_width,
+        arguments.width,
+        arguments.height,
+    )
+    if arguments.density:
+        render_density_image(
+            arguments.length,
+            max_degree,
+            default_palette(max_degree),
+            view,
+            arguments.output,
+            radius_scale=arguments.radius_scale,
+            tone_mapping=ToneMapping(
+                mode=arguments.tone_mapping,
+                exposure=arguments.exposure,
+                gamma=arguments.gamma,
+            ),
+            smoothing=arguments.smoothing,
+            histograms=arguments.histograms,
+            chunk_rows=arguments.chunk_rows,
+            workers=arguments.workers,
+            cache=open_root_cache(),
+            family=arguments.family,
+        )
+        return
+
+    if arguments.stream:
+        render_streamed_image(
+            arguments.length,
+            max_degree,
+            default_palette(max_degree),
+            view,
+            arguments.output,
+            radius_scale=arguments.radius_scale,
+            tile_size=arguments.tile_size,
+            chunk_rows=arguments.chunk_rows,
+            workers=arguments.workers,
+            cache=open_root_cache(),
+            family=arguments.family,
+        )
+        return
+
+    circles = generate_circles(arguments.length, max_degree, arguments.family)
+    render_image(
+        circles,
+        default_palette(max_degree),
+        view,
+        arguments.output,
+        radius_scale=arguments.radius_scale,
+        tile_size=arguments.tile_size,
+        workers=arguments.workers,
+    )
+
+
+def export(arguments: argparse.Namespace, max_degree: int):
+    circles, labels, shards = generate_labelled_circles(
+        arguments.length, max_degree, arguments.family
+    )
+    summary = export_pyramid(
+        circles,
+        labels,
+        shards,
+        default_palette(max_degree),
+        arguments.output,
+        arguments.levels,
+        center=complex(arguments.center_x, arguments.center_y),
+        half_width=arguments.half_width,
+        tile_size=arguments.tile_size,
+        radius_scale=arguments.radius_scale,
+        workers=arguments.workers,
+    )
+    print(
+        f"{summary.written} tiles written, {summary.kept} unchanged, "
+        f"{summary.removed} removed"
+    )
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    main()
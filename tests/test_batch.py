@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from algebraics.config import settings
+from algebraics.polynomial.batch import (
+    find_root_sets,
+    find_roots_batch,
+    find_roots_continuation,
+)
+from algebraics.polynomial.enumeration import coefficient_block
+from algebraics.polynomial.models import SolverStatistics
+from algebraics.polynomial.polynomial import enumerate_polynomials
+
+
+def test_batch_cubic():
+    coefficients = np.array([[-6, 11, -6, 1], [6, 11, 6, 1]])
+    roots, converged = find_roots_batch(coefficients)
+    assert converged.all()
+    assert np.sort(roots[0].real) == pytest.approx([1.0, 2.0, 3.0])
+    assert np.sort(roots[1].real) == pytest.approx([-3.0, -2.0, -1.0])
+    assert np.abs(roots.imag).max() == pytest.approx(0.0, abs=1e-8)
+
+
+def test_find_root_sets_covers_enumeration():
+    polynomials = list(enumerate_polynomials(4, 4))
+    root_sets = list(find_root_sets(polynomials))
+    assert len(root_sets) == len(polynomials)
+    for root_set in root_sets:
+        assert len(root_set.roots) == root_set.degree + 1
+
+
+def test_continuation_matches_batch(monkeypatch):
+    monkeypatch.setattr(settings.POLYNOMIAL, "WARM_START_LANES", 16)
+    coefficients = coefficient_block(6, 4, 2)
+    cold = SolverStatistics()
+    roots, converged = find_roots_batch(coefficients, cold)
+    warm = SolverStatistics()
+    warm_roots, warm_converged = find_roots_continuation(coefficients, warm)
+
+    assert converged.all() and warm_converged.all()
+    distances = np.abs(roots[:, :, None] - warm_roots[:, None, :]).min(axis=2)
+    assert distances.max() < 1e-8
+    assert cold.cold_starts == len(coefficients) and cold.iterations > 0
+    assert warm.warm_starts + warm.cold_starts == len(coefficients) + warm.restarts
+    assert cold.rows == warm.rows == len(coefficients)
+
+
+def test_single_precision(monkeypatch):
+    coefficients = coefficient_block(6, 4, 2)
+    roots, converged = find_roots_batch(coefficients)
+
+    monkeypatch.setattr(settings.POLYNOMIAL, "PRECISION", "single")
+    single_roots, single_converged = find_roots_batch(coefficients)
+    assert single_roots.dtype == np.complex64
+    assert single_converged.all()
+    distances = np.abs(roots[:, :, None] - single_roots[:, None, :]).min(axis=2)
+    assert distances.max() < 1e-4
+
+    monkeypatch.setattr(settings.POLYNOMIAL, "POLISH", True)
+    polished_roots, polished_converged = find_roots_batch(coefficients)
+    assert polished_roots.dtype == np.complex128
+    assert polished_converged.all()
+    distances = np.abs(roots[:, :, None] - polished_roots[:, None, :]).min(axis=2)
+    assert distances.max() < 1e-8
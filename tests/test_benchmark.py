@@ -0,0 +1,55 @@
+from algebraics.benchmark.suite import (
+    BenchmarkSkipped,
+    Measurement,
+    Report,
+    compare,
+    measure,
+)
+
+
+def report(seconds: float, peak_bytes: int) -> Report:
+    return Report(
+        metadata={},
+        measurements=[
+            Measurement(
+                name="case",
+                max_length=4,
+                max_degree=3,
+                seconds=seconds,
+                peak_bytes=peak_bytes,
+            )
+        ],
+    )
+
+
+def test_measure_counts_items_and_memory():
+    def setup():
+        return lambda: (len(bytearray(2**20)), {"kind": "bytes"})
+
+    measurement = measure("case", 4, 3, setup, repeat=3)
+    assert measurement.items == 2**20
+    assert measurement.peak_bytes >= 2**20
+    assert measurement.details == {"kind": "bytes"}
+    assert 0 < measurement.min_seconds <= measurement.seconds
+
+
+def test_measure_records_skips():
+    def setup():
+        raise BenchmarkSkipped("no display")
+
+    assert measure("case", 4, 3, setup, repeat=3).skipped == "no display"
+
+
+def test_compare_flags_regressions_above_noise():
+    baseline = report(seconds=1.0, peak_bytes=10 * 2**20)
+    assert compare(report(1.1, 10 * 2**20), baseline) == []
+
+    regressions = compare(report(1.5, 20 * 2**20), baseline)
+    assert [regression.metric for regression in regressions] == [
+        "seconds",
+        "peak_bytes",
+    ]
+    assert regressions[0].ratio == 1.5
+
+    # Tiny timings and allocations are noise
+    assert compare(report(0.0009, 2**19), report(0.0001, 1)) == []
@@ -0,0 +1,90 @@
+import numpy as np
+
+from algebraics.config import settings
+from algebraics.polynomial.cache import RootCache
+from algebraics.polynomial.generation import generate_roots, stream_roots
+from algebraics.polynomial.models import Shard
+
+
+def test_round_trip_is_memory_mapped(tmp_path):
+    cache = RootCache(tmp_path, 2**20)
+    shard = Shard(length=3, degree=2)
+    roots = np.array([[1 + 2j, 3 - 4j]])
+    assert cache.get(shard) is None
+
+    cache.put(shard, roots)
+    loaded = cache.get(shard)
+    assert isinstance(loaded, np.memmap)
+    assert np.array_equal(loaded, roots)
+
+
+def test_evicts_least_recently_used(tmp_path):
+    roots = np.zeros((64, 2), dtype=np.complex128)
+    cache = RootCache(tmp_path, 3.5 * roots.nbytes)
+    shards = [Shard(length=length, degree=2) for length in range(4)]
+    for shard in shards[:3]:
+        cache.put(shard, roots)
+
+    cache.get(shards[0])
+    cache.put(shards[3], roots)
+    assert cache.get(shards[0]) is not None
+    assert cache.get(shards[1]) is None
+
+
+def test_writers_of_the_same_shard_are_independent(tmp_path):
+    cache = RootCache(tmp_path, 2**20)
+    shard = Shard(length=4, degree=3)
+    roots = np.arange(6, dtype=np.complex128).reshape(2, 3)
+    old, new = cache.writer(shard), cache.writer(shard)
+    old.write(roots[::-1])
+    new.write(roots)
+    old.discard()
+    new.commit()
+    assert np.array_equal(cache.get(shard), roots)
+    assert [path.name for path in cache.directory.iterdir()] == ["4-3-None.npy"]
+
+
+def test_other_fingerprints_share_the_size_cap(tmp_path):
+    roots = np.zeros((64, 2), dtype=np.complex128)
+    other = RootCache(tmp_path, 2**20)
+    other.put(Shard(length=3, degree=2), roots)
+    other_directory = tmp_path / "0123456789abcdef"
+    other.directory.rename(other_directory)
+    unrelated = tmp_path / "photos"
+    unrelated.mkdir()
+    (unrelated / "holiday.npy").write_bytes(b"")
+
+    # Kept while everything fits, evicted first once it is the oldest
+    cache = RootCache(tmp_path, 2.5 * roots.nbytes)
+    assert (other_directory / "3-2-None.npy").exists()
+    cache.put(Shard(length=4, degree=2), roots)
+    cache.put(Shard(length=5, degree=2), roots)
+    assert not other_directory.exists()
+    assert cache.get(Shard(length=4, degree=2)) is not None
+    assert (unrelated / "holiday.npy").exists()
+
+
+def test_generate_roots_reads_back_cache(tmp_path):
+    cache = RootCache(tmp_path, 2**30)
+    solved = list(generate_roots(4, 3, workers=1, cache=cache))
+    cached = list(generate_roots(4, 3, workers=1, cache=cache))
+    for (_, solved_roots), (_, cached_roots) in zip(solved, cached):
+        assert isinstance(cached_roots, np.memmap)
+        assert np.array_equal(solved_roots, cached_roots)
+
+
+def test_single_precision_halves_entries(tmp_path, monkeypatch):
+    def cached_bytes(cache: RootCache) -> int:
+        list(stream_roots(5, 4, 50, workers=1, cache=cache))
+        return sum(path.stat().st_size for path in cache.directory.glob("*.npy"))
+
+    double = RootCache(tmp_path / "double", 2**30)
+    monkeypatch.setattr(settings.POLYNOMIAL, "PRECISION", "single")
+    single = RootCache(tmp_path / "single", 2**30)
+    assert single.directory.name != double.directory.name
+
+    single_bytes = cached_bytes(single)
+    for _, roots in generate_roots(5, 4, workers=1, cache=single):
+        assert roots.dtype == np.complex64
+    monkeypatch.setattr(settings.POLYNOMIAL, "PRECISION", "double")
+    assert single_bytes < 0.6 * cached_bytes(double)
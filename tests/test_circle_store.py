@@ -0,0 +1,33 @@
+import numpy as np
+
+from algebraics.polynomial.generation import generate_roots
+from algebraics.ui.circle import build_palette, generate_circles
+from algebraics.ui.store import CircleStore
+
+
+def test_circles_are_compact_columns():
+    store = CircleStore()
+    for shard, roots in generate_roots(4, 4, workers=1):
+        store.add(shard, generate_circles(shard, roots))
+    columns = store.columns()
+    assert len(columns) == len(store) > 0
+    assert store.nbytes / len(store) <= 20
+    assert set(np.unique(columns.degree).tolist()) == {1, 2, 3}
+    # Matches the 0.5^(length + 1 + RootSet.degree) radius of the original circles
+    assert columns.radius.max() == 0.5 ** (1 + 1 + 1)
+
+
+def test_retain_drops_shards():
+    store = CircleStore()
+    results = dict(generate_roots(4, 3, workers=1))
+    for shard, roots in results.items():
+        store.add(shard, generate_circles(shard, roots))
+    kept = {shard for shard in results if shard.length < 3}
+    store.retain(kept)
+    assert store.shards() == kept
+    assert len(store.columns()) == sum(results[shard].size for shard in kept)
+
+
+def test_palette_falls_back_to_default_color():
+    palette = build_palette({1: [1.0, 0.0, 0.0]}, [0.5, 0.5, 0.5], size=4)
+    assert palette.tolist() == [[0.5] * 3, [1.0, 0.0, 0.0], [0.5] * 3, [0.5] * 3]
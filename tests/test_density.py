@@ -0,0 +1,145 @@
+import imageio.v3 as iio
+import numpy as np
+import pytest
+
+from algebraics.render.density import (
+    DensityGrid,
+    ToneMapping,
+    render_density_image,
+    tone_map,
+)
+from algebraics.render.headless import (
+    Tile,
+    View,
+    default_palette,
+    generate_circles,
+    splat_tile,
+)
+from algebraics.ui.models import CircleColumns
+
+
+def splat(circles, palette, view, radius_scale) -> np.ndarray:
+    tile = Tile(column=0, row=0, x=0, y=0, width=view.width, height=view.height)
+    return splat_tile(circles, palette, view, tile, radius_scale)
+
+
+def random_circles(count: int) -> CircleColumns:
+    rng = np.random.default_rng(0)
+    return CircleColumns(
+        x_center=rng.uniform(-2, 2, count).astype(np.float32),
+        y_center=rng.uniform(-1.5, 1.5, count).astype(np.float32),
+        radius=(0.5 ** rng.integers(3, 9, count)).astype(np.float32),
+        degree=rng.integers(1, 4, count).astype(np.uint8),
+    )
+
+
+@pytest.mark.parametrize("radius_scale", [0.05, 1.0, 10.0])
+def test_energy_matches_splatted_circles(radius_scale):
+    circles = random_circles(2000)
+    view = View.centered(0j, 2.0, 128, 96)
+    palette = default_palette(4)
+    grid = DensityGrid(view)
+    grid.add(circles)
+
+    energy = grid.energy(palette, radius_scale)
+    expected = splat(circles, palette, view, radius_scale)
+    if radius_scale < 0.1:
+        # Every circle is smaller than a pixel and lands where splat_tile puts it
+        assert np.allclose(energy, expected, rtol=1e-4, atol=1e-7)
+    else:
+        # Larger circles are drawn as averaged over the positions in their pixel,
+        # which is only true of splat_tile on average over many circles
+        assert energy.sum() == pytest.approx(expected.sum(), rel=0.05)
+
+
+def test_palette_and_radius_scale_do_not_need_circles(tmp_path):
+    circles = generate_circles(5, 4)
+    view = View.centered(0.5 + 0.5j, 1.0, 64, 64)
+    grid = DensityGrid(view, tmp_path)
+    grid.add(circles)
+    grid.save(tmp_path)
+
+    loaded = DensityGrid.load(tmp_path)
+    palette = default_palette(4)
+    palette[1:3] = palette[1:3][::-1]
+    assert loaded.view == view
+    for radius_scale in (0.5, 4.0):
+        assert np.allclose(
+            loaded.energy(palette, radius_scale),
+            grid.energy(palette, radius_scale),
+        )
+    red = np.zeros_like(palette)
+    red[:, 0] = 1
+    assert not loaded.energy(red, 4.0)[:, :, 1:].any()
+
+
+def test_tone_map():
+    energy = np.zeros((4, 4, 3), dtype=np.float32)
+    assert not tone_map(energy, ToneMapping()).any()
+
+    energy[0, 0] = 1
+    energy[1, 1] = 0.001
+    for tone_mapping in (ToneMapping(), ToneMapping(mode="gamma")):
+        image = tone_map(energy, tone_mapping)
+        assert image.dtype == np.uint8
+        assert image[0, 0].tolist() == [255, 255, 255]
+        assert 0 < image[1, 1, 0] < 255
+    darker = tone_map(energy, ToneMapping(exposure=0.1))
+    assert darker[1, 1, 0] < tone_map(energy, ToneMapping())[1, 1, 0]
+
+
+def test_render_density_image_reuses_histograms(tmp_path, monkeypatch):
+    view = View.centered(0j, 2.0, 48, 32)
+    histograms = tmp_path / "histograms"
+    render_density_image(
+        5,
+        4,
+        default_palette(4),
+        view,
+        tmp_path / "first.png",
+        histograms=histograms,
+        workers=1,
+    )
+
+    def run_pipeline(*arguments):
+        raise AssertionError("the histograms should be read back")
+
+    monkeypatch.setattr("algebraics.render.density.run_pipeline", run_pipeline)
+    render_density_image(
+        5,
+        4,
+        default_palette(4),
+        view,
+        tmp_path / "second.png",
+        tone_mapping=ToneMapping(mode="gamma"),
+        histograms=histograms,
+    )
+    first = iio.imread(tmp_path / "first.png")
+    second = iio.imread(tmp_path / "second.png")
+    assert first.shape == second.shape == (32, 48, 3)
+    assert first.any() and second.any()
+
+
+def test_render_density_image_checks_histogram_source(tmp_path):
+    view = View.centered(0j, 2.0, 48, 32)
+    histograms = tmp_path / "histograms"
+    render_density_image(
+        5,
+        3,
+        default_palette(4),
+        view,
+        tmp_path / "first.png",
+        histograms=histograms,
+        workers=1,
+    )
+    with pytest.raises(ValueError, match="other polynomials"):
+        render_density_image(
+            5,
+            4,
+            default_palette(4),
+            view,
+            tmp_path / "second.png",
+            histograms=histograms,
+            workers=1,
+        )
+    assert not (tmp_path / "second.png").exists()
@@ -0,0 +1,106 @@
+import itertools
+
+import numpy as np
+
+from algebraics.polynomial.enumeration import (
+    block_dtype,
+    block_rows,
+    coefficient_block,
+    count_block,
+    count_polynomials,
+    enumerate_polynomial_blocks,
+    enumerate_rows,
+    next_row,
+    unrank_row,
+)
+from algebraics.polynomial.partition import enumerate_partitions, generate_signs
+from algebraics.polynomial.polynomial import enumerate_polynomials
+
+
+def test_block_matches_partitions():
+    length, degree = 6, 4
+    expected = [
+        list(signs)
+        for partition in enumerate_partitions(length + degree + 1, degree + 1)
+        if partition[-1] > 1
+        for signs in generate_signs([x - 1 for x in partition])
+    ]
+    assert coefficient_block(length, degree).tolist() == expected
+
+
+def test_blocks_are_compact():
+    for block in enumerate_polynomial_blocks(6, 5):
+        assert block.coefficients.dtype.itemsize == 1
+        assert block.coefficients.shape[1] == block.degree + 1
+        assert (abs(block.coefficients).sum(axis=1) == block.length).all()
+        assert (block.coefficients[:, -1] != 0).all()
+
+
+def test_constant_split_partitions_block():
+    block = coefficient_block(5, 3)
+    split = list(
+        itertools.chain.from_iterable(
+            coefficient_block(5, 3, constant).tolist() for constant in range(6)
+        )
+    )
+    assert split == block.tolist()
+
+
+def test_count_block_matches_enumeration():
+    for length in range(8):
+        for degree in range(2, 6):
+            assert count_block(length, degree) == len(coefficient_block(length, degree))
+            for constant in range(length + 1):
+                assert count_block(length, degree, constant) == len(
+                    coefficient_block(length, degree, constant)
+                )
+
+
+def test_partitions_are_every_composition():
+    for n in range(9):
+        for length in range(5):
+            expected = [
+                list(parts)
+                for parts in itertools.product(range(1, n + 1), repeat=length)
+                if sum(parts) == n
+            ]
+            assert list(enumerate_partitions(n, length)) == expected
+
+
+def test_rows_are_unranked_and_stepped_in_block_order():
+    for length in range(1, 7):
+        for degree in range(2, 5):
+            block = coefficient_block(length, degree).tolist()
+            assert [unrank_row(length, degree, i) for i in range(len(block))] == block
+
+            row, rows = list(block[0]), [list(block[0])]
+            while next_row(row):
+                rows.append(list(row))
+            assert rows == block
+            assert block_rows(length, degree, 3, 9).tolist() == block[3:9]
+
+
+def test_count_polynomials_matches_enumeration():
+    rows = [
+        (block.length, row)
+        for block in enumerate_polynomial_blocks(6, 4)
+        for row in block.coefficients.tolist()
+    ]
+    assert count_polynomials(6, 4) == len(rows)
+    assert [(length, list(row)) for length, row in enumerate_rows(6, 4)] == rows
+
+
+def test_enumeration_jumps_to_any_polynomial():
+    polynomials = list(enumerate_polynomials(5, 4))
+    for start, stop in [(0, 10), (7, 1000), (len(polynomials) - 2, None)]:
+        assert list(enumerate_polynomials(5, 4, start, stop)) == polynomials[start:stop]
+        assert [
+            [complex(c) for c in row] for _, row in enumerate_rows(5, 4, start, stop)
+        ] == [polynomial.coefficients for polynomial in polynomials[start:stop]]
+
+
+def test_block_dtype_holds_both_signs():
+    for length in [1, 127, 128, 129, 32767, 32768]:
+        info = np.iinfo(block_dtype(length))
+        assert info.min <= -length and length <= info.max
+    assert block_dtype(127) == np.int8 and block_dtype(128) == np.int16
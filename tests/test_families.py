@@ -0,0 +1,127 @@
+import itertools
+from typing import Optional
+
+import numpy as np
+import pytest
+
+from algebraics.polynomial.enumeration import coefficient_block
+from algebraics.polynomial.families import (
+    FAMILIES,
+    count_family,
+    get_family,
+)
+from algebraics.polynomial.generation import generate_roots, stream_roots
+from algebraics.polynomial.models import Shard
+from algebraics.polynomial.polynomial import enumerate_polynomials_sjbrooks
+from algebraics.polynomial.reduction import is_redundant
+
+
+def members(shard: Shard) -> set[tuple[int, ...]]:
+    """
+    The coefficients of the polynomials of shard, from their definition
+    """
+    degree = shard.degree
+    if shard.family == "littlewood":
+        return set(itertools.product([-1, 1], repeat=degree + 1))
+    if shard.family == "zero-one":
+        return {row + (1,) for row in itertools.product([0, 1], repeat=degree)}
+    if shard.family == "height":
+        height = shard.length
+        return {
+            row
+            for row in itertools.product(range(-height, height + 1), repeat=degree + 1)
+            if row[-1] != 0 and max(map(abs, row)) == height
+        }
+    block = coefficient_block(shard.length - degree - 1, degree)
+    return {tuple(row) for row in block.tolist() if row[-1] > 0}
+
+
+SHARDS = [
+    shard
+    for name, max_length in [
+        ("littlewood", 0),
+        ("zero-one", 0),
+        ("height", 3),
+        ("sjbrooks", 7),
+    ]
+    for shard in get_family(name).shards(max_length, 4)
+]
+
+
+@pytest.mark.parametrize("shard", SHARDS, ids=lambda shard: shard.name())
+def test_rows_are_counted_and_unranked_exactly(shard):
+    family = get_family(shard.family)
+    rows = family.rows(shard)
+    assert rows.shape == (family.count(shard), shard.degree + 1)
+    assert {tuple(row) for row in rows.tolist()} == members(shard)
+    assert family.count_irredundant(shard) == np.count_nonzero(~is_redundant(rows))
+    for start, stop in [(0, 1), (3, 17), (len(rows) // 2, None)]:
+        assert np.array_equal(family.rows(shard, start, stop), rows[start:stop])
+
+
+def test_sjbrooks_enumerator_yields_the_family():
+    polynomials = list(enumerate_polynomials_sjbrooks(7))
+    assert len(polynomials) == count_family("sjbrooks", 7, 7)
+    coefficients = {tuple(polynomial.coefficients) for polynomial in polynomials}
+    assert len(coefficients) == len(polynomials)
+    for polynomial in polynomials:
+        assert polynomial.degree >= 1 and polynomial.coefficients[-1].real > 0
+        weight = sum(abs(c) for c in polynomial.coefficients) + polynomial.degree + 1
+        assert weight == polynomial.length
+
+
+def test_chunks_of_a_family_match_its_shards():
+    shards = get_family("littlewood").shards(0, 6)
+    whole = dict(generate_roots(0, 6, workers=1, family="littlewood"))
+    chunked = {}
+    for shard, roots in stream_roots(0, 6, 40, workers=2, family="littlewood"):
+        chunked.setdefault(shard, []).append(roots)
+    assert list(whole) == list(chunked) == shards
+    for shard in shards:
+        roots = np.concatenate(chunked[shard])
+        assert roots.shape == whole[shard].shape
+        # The roots of every row, up to their order
+        distances = np.abs(roots[:, :, None] - whole[shard][:, None, :])
+        assert distances.min(axis=2).max() < 1e-6
+
+
+class QuadraticFamily:
+    """
+    x^2 + b x + c for 1 <= b, c <= parameter, one shard per b
+    """
+
+    name = "quadratic"
+    title = "Quadratics"
+    parameter = "Bound"
+
+    def shards(self, max_length: int, max_degree: int) -> list[Shard]:
+        return [
+            Shard(family=self.name, length=b, degree=2)
+            for b in range(1, max_length + 1)
+        ]
+
+    def count(self, shard: Shard) -> int:
+        return shard.length
+
+    def count_irredundant(self, shard: Shard) -> int:
+        return shard.length
+
+    def rows(
+        self, shard: Shard, start: int = 0, stop: Optional[int] = None
+    ) -> np.ndarray:
+        c = np.arange(1, shard.length + 1)[start:stop]
+        return np.column_stack(
+            [c, np.full_like(c, shard.length), np.ones_like(c)]
+        ).astype(np.int8)
+
+
+def test_registered_families_are_generated(monkeypatch):
+    monkeypatch.setitem(FAMILIES, "quadratic", QuadraticFamily())
+    assert count_family("quadratic", 4, 2) == 10
+    for shard, roots in generate_roots(4, 2, workers=1, family="quadratic"):
+        b = shard.length
+        c = np.arange(1, b + 1)
+        assert np.allclose(roots.sum(axis=1), -b)
+        assert np.allclose(roots.prod(axis=1), c)
+    with pytest.raises(ValueError):
+        get_family("unknown")
@@ -0,0 +1,39 @@
+import math
+
+from algebraics.ui.budget import FrameBudget, budget_strides
+
+
+def test_shards_are_drawn_whole_while_they_fit():
+    assert budget_strides([10, 20, 30], 100, 128) == [1, 1, 1]
+    assert budget_strides([10, 20, 30], 60, 128) == [1, 1, 1]
+    # 30 circles are left for the 700 of the last two shards
+    assert budget_strides([10, 20, 300, 400], 60, 128) == [1, 1, 24, 24]
+    assert budget_strides([], 60, 128) == []
+
+
+def test_the_smallest_circles_are_left_out_past_the_largest_stride():
+    assert budget_strides([10, 400, 4000, 40000], 100, 8) == [1, 8, 0, 0]
+    assert budget_strides([10, 400, 400, 40000], 200, 8) == [1, 8, 8, 0]
+    counts = [1000, 2000, 4000, 8000, 16000]
+    for budget in [100, 1000, 5000, 20000]:
+        strides = budget_strides(counts, budget, 16)
+        drawn = sum(
+            math.ceil(count / stride)
+            for count, stride in zip(counts, strides)
+            if stride
+        )
+        assert drawn <= budget + len(counts)
+
+
+def test_frame_budget_follows_frame_times():
+    budget = FrameBudget(0.016, 100_000)
+    # A frame twice as slow as the budget moves it halfway to what fits, geometrically
+    budget.record(0.032, 100_000)
+    assert budget.circles == int(math.sqrt(100_000 * 50_000))
+    budget.record(0.004, budget.circles)
+    assert budget.circles > 100_000
+    circles = budget.circles
+    budget.record(0.0, 0)
+    assert budget.circles == circles
+    budget.record(100.0, 1)
+    assert budget.circles == FrameBudget.MIN_CIRCLES
@@ -0,0 +1,36 @@
+import numpy as np
+
+from algebraics.polynomial.enumeration import coefficient_block
+from algebraics.polynomial.generation import (
+    enumerate_shards,
+    generate_roots,
+)
+from algebraics.polynomial.polynomial import enumerate_polynomials
+
+
+def test_shards_cover_enumeration():
+    polynomials = list(enumerate_polynomials(5, 4))
+    rows = [
+        tuple(row)
+        for shard in enumerate_shards(5, 4)
+        for row in coefficient_block(
+            shard.length, shard.degree, shard.constant
+        ).tolist()
+    ]
+    expected = [tuple(int(c.real) for c in p.coefficients) for p in polynomials]
+    assert sorted(rows) == sorted(expected)
+
+
+def test_parallel_matches_serial():
+    serial = list(generate_roots(5, 4, workers=1))
+    parallel = list(generate_roots(5, 4, workers=2))
+    assert [shard for shard, _ in serial] == [shard for shard, _ in parallel]
+    for (_, serial_roots), (_, parallel_roots) in zip(serial, parallel):
+        assert np.array_equal(serial_roots, parallel_roots)
+
+
+def test_generate_roots_skips_excluded_shards():
+    held = dict(generate_roots(4, 3, workers=1))
+    grown = dict(generate_roots(5, 3, workers=1, exclude=held.keys()))
+    assert grown.keys() == set(enumerate_shards(5, 3)) - held.keys()
+    assert all(shard.length == 5 for shard in grown)
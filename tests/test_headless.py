@@ -0,0 +1,76 @@
+import imageio.v3 as iio
+import numpy as np
+
+from algebraics.render.headless import (
+    KERNEL_MEAN,
+    Tile,
+    View,
+    bucket_by_tile,
+    enumerate_tiles,
+    splat_tile,
+    write_image,
+)
+from algebraics.ui.models import CircleColumns
+
+
+def random_circles(count: int, radius: float) -> CircleColumns:
+    rng = np.random.default_rng(0)
+    return CircleColumns(
+        x_center=rng.uniform(-1, 1, count).astype(np.float32),
+        y_center=rng.uniform(-1, 1, count).astype(np.float32),
+        radius=np.full(count, radius, dtype=np.float32),
+        degree=rng.integers(1, 5, count).astype(np.uint8),
+    )
+
+
+def test_tiles_cover_image():
+    view = View.centered(0j, 1.0, 300, 200)
+    coverage = np.zeros((200, 300), dtype=int)
+    for tile in enumerate_tiles(view, 64):
+        coverage[tile.y : tile.y + tile.height, tile.x : tile.x + tile.width] += 1
+    assert (coverage == 1).all()
+
+
+def test_buckets_hold_every_overlapping_circle():
+    view = View.centered(0j, 1.0, 256, 256)
+    circles = random_circles(2000, 0.005)
+    buckets = bucket_by_tile(circles, view, 64, 10.0)
+    whole = Tile(column=0, row=0, x=0, y=0, width=256, height=256)
+    expected = splat_tile(circles, np.ones((256, 3)), view, whole, 10.0)
+
+    for tile in enumerate_tiles(view, 64):
+        members = buckets.get((tile.column, tile.row), np.array([], dtype=int))
+        splatted = splat_tile(
+            circles.select(members), np.ones((256, 3)), view, tile, 10.0
+        )
+        np.testing.assert_allclose(
+            splatted,
+            expected[tile.y : tile.y + tile.height, tile.x : tile.x + tile.width],
+            atol=1e-4,
+        )
+
+
+def test_small_circles_keep_their_energy():
+    view = View.centered(0j, 1.0, 128, 128)
+    tile = Tile(column=0, row=0, x=0, y=0, width=128, height=128)
+    circles = random_circles(500, 0.0001)
+    circles = circles.select(
+        (np.abs(circles.x_center) < 0.9) & (np.abs(circles.y_center) < 0.9)
+    )
+    palette = np.ones((256, 3))
+    splatted = splat_tile(circles, palette, view, tile, 10.0)
+
+    extent = 0.0001 * 10.0 / view.pixel_size
+    expected = len(circles) * KERNEL_MEAN * (2 * extent) ** 2
+    np.testing.assert_allclose(splatted[..., 0].sum(), expected, rtol=1e-4)
+
+
+def test_png_is_written_strip_by_strip(tmp_path):
+    rng = np.random.default_rng(0)
+    image = np.lib.format.open_memmap(
+        tmp_path / "image.npy", mode="w+", dtype=np.uint8, shape=(600, 37, 3)
+    )
+    image[:] = rng.integers(0, 256, image.shape, dtype=np.uint8)
+    image[:300] = np.arange(37, dtype=np.uint8)[None, :, None] * 7
+    write_image(tmp_path / "image.png", image)
+    assert np.array_equal(iio.imread(tmp_path / "image.png"), image)
@@ -0,0 +1,134 @@
+import numpy as np
+import pytest
+
+from algebraics.polynomial.families import get_family
+from algebraics.polynomial.generation import (
+    generate_roots,
+    shard_coefficients,
+    solve_shard,
+)
+from algebraics.polynomial.models import Shard
+from algebraics.polynomial.ranking import (
+    UNKNOWN_RANK,
+    decode_polynomial,
+    format_polynomial,
+    polynomial_ranks,
+    residuals,
+)
+from algebraics.ui.circle import generate_circles
+from algebraics.ui.inspection import describe_roots
+from algebraics.ui.models import CircleColumns
+from algebraics.ui.spatial import build_grid_index, build_point_index, nearest_circles
+from algebraics.ui.store import CircleStore
+
+SHARD = Shard(length=8, degree=5, constant=2)
+
+
+def test_ranks_decode_to_the_polynomials_of_the_roots():
+    roots = solve_shard(SHARD)
+    ranks = polynomial_ranks(SHARD, roots)
+    rows = get_family(SHARD.family).rows(SHARD)
+    assert np.array_equal(rows[ranks], shard_coefficients(SHARD))
+    assert np.array_equal(decode_polynomial(SHARD, int(ranks[7])), rows[ranks[7]])
+
+    # Rows a solver dropped are skipped, up to polynomials with the same roots
+    kept = np.delete(np.arange(len(roots)), [0, 5, 6, 300, len(roots) - 1])
+    dropped = polynomial_ranks(SHARD, roots[kept])
+    assert UNKNOWN_RANK not in dropped and np.all(np.diff(dropped.astype(int)) > 0)
+    assert residuals(rows[dropped], roots[kept]).max() < 1e-6
+    assert np.count_nonzero(dropped != ranks[kept]) < 5
+
+
+def test_format_polynomial():
+    assert format_polynomial(np.array([1, 0, -2, 1])) == "x^3 - 2x^2 + 1"
+    assert format_polynomial(np.array([-3, 1, 0, -1])) == "-x^3 + x - 3"
+    assert format_polynomial(np.array([0, 2])) == "2x"
+
+
+def test_nearest_circles_match_a_full_search():
+    rng = np.random.default_rng(0)
+    count = 50000
+    angles = rng.uniform(0, 2 * np.pi, count)
+    x = np.cos(angles).astype(np.float32)
+    y = np.sin(angles).astype(np.float32)
+    # A dense pile of real roots, and roots that coincide
+    y[: count // 4] = 0
+    x[-5000:], y[-5000:] = 0.25, 0.5
+    circles, index = build_grid_index(
+        CircleColumns(
+            x_center=x,
+            y_center=y,
+            radius=np.full(count, 0.01, dtype=np.float32),
+            degree=np.zeros(count, dtype=np.uint8),
+        ),
+        cells=4,
+        points_per_cell=16,
+    )
+    assert index.subcells > 1
+    for point_x, point_y in [(0.5, 0.001), (0.25, 0.5), (0.0, 0.99), (3.0, 3.0)]:
+        for distance in [0.001, 0.05, 0.5]:
+            positions, distances = nearest_circles(
+                circles, index, point_x, point_y, distance, 3
+            )
+            expected = np.sort(
+                np.hypot(circles.x_center - point_x, circles.y_center - point_y)
+            )[:3]
+            assert np.allclose(distances, expected[expected <= distance])
+            assert np.allclose(
+                np.hypot(
+                    circles.x_center[positions] - point_x,
+                    circles.y_center[positions] - point_y,
+                ),
+                distances,
+            )
+
+
+def test_roots_are_described_by_their_polynomial():
+    roots = solve_shard(SHARD)
+    circles = generate_circles(SHARD, roots, polynomial_ranks(SHARD, roots))
+    store = CircleStore()
+    store.add(SHARD, circles)
+    # Circles generated without ranks
+    unranked = Shard(length=3, degree=2)
+    unranked_roots = solve_shard(unranked)
+    store.add(unranked, generate_circles(unranked, unranked_roots))
+
+    root = roots[10, 0]
+    polynomial = format_polynomial(shard_coefficients(SHARD)[10])
+    lines = describe_roots(store, root.real, root.imag, 1e-6, 3).splitlines()
+    assert any(polynomial in line for line in lines)
+    assert all("degree 5" in line and "length 8" in line for line in lines)
+    assert describe_roots(store, 50.0, 50.0, 0.1, 3) == ""
+
+    root = unranked_roots[0, 0]
+    description = describe_roots(store, root.real, root.imag, 1e-6, 1)
+    assert "unknown polynomial of degree 2" in description
+    nearest = store.nearest(0.0, 1.0, 1.0, 2)
+    assert len(nearest) == 2 and nearest[0][2] <= nearest[1][2]
+
+
+def test_point_index_finds_the_roots_of_every_shard():
+    store = CircleStore()
+    results = dict(generate_roots(6, 4, workers=1))
+    for shard, roots in results.items():
+        store.add(shard, generate_circles(shard, roots))
+    points = [(0.0, 1.0), (-1.0, 0.0), (0.3, -0.7), (0.5, 0.0)]
+    expected = [store.nearest(x, y, 0.05, 5) for x, y in points]
+
+    # Indexing all shards but the last leaves that one to its own index
+    indexed = dict(list(store.items())[:-1])
+    store.set_point_index(build_point_index(indexed, 4, 2))
+    assert store.indexed == set(indexed)
+    for (x, y), nearest in zip(points, expected):
+        found = store.nearest(x, y, 0.05, 5)
+        assert [distance for *_, distance in found] == pytest.approx(
+            [distance for *_, distance in nearest]
+        )
+        for shard, position, distance in found:
+            circles = store.batches[shard]
+            assert np.hypot(
+                circles.x_center[position] - x, circles.y_center[position] - y
+            ) == pytest.approx(distance)
+
+    store.retain(set(list(indexed)[1:]))
+    assert store.point_index is None and not store.indexed
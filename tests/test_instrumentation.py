@@ -0,0 +1,68 @@
+import random
+
+from algebraics.instrumentation.statistics import PipelineStatistics, stage
+from algebraics.polynomial.families import count_shard
+from algebraics.polynomial.generation import (
+    enumerate_shards,
+    generate_roots,
+)
+from algebraics.polynomial.models import ComplexPolynomial, SolverStatistics
+from algebraics.polynomial.polynomial import find_roots
+from algebraics.ui.worker import GenerationWorker
+
+
+def test_generate_roots_records_every_stage():
+    statistics = PipelineStatistics()
+    roots_by_shard = dict(generate_roots(5, 4, workers=1, statistics=statistics))
+
+    shards = enumerate_shards(5, 4)
+    assert statistics.shards_solved == len(shards)
+    assert statistics.polynomials == sum(count_shard(shard) for shard in shards)
+    assert statistics.root_sets == sum(
+        roots.shape[0] for roots in roots_by_shard.values()
+    )
+    assert statistics.root_sets + statistics.solver.dropped == statistics.polynomials
+    assert statistics.solver.iterations > 0
+    assert statistics.stages["solve"].calls == len(shards)
+
+
+def test_worker_processes_report_their_statistics():
+    serial, parallel = PipelineStatistics(), PipelineStatistics()
+    list(generate_roots(5, 4, workers=1, statistics=serial))
+    list(generate_roots(5, 4, workers=2, statistics=parallel))
+    assert parallel.solver == serial.solver
+    assert parallel.polynomials == serial.polynomials
+
+
+def test_find_roots_counts_newton_iterations():
+    statistics = SolverStatistics()
+    polynomial = ComplexPolynomial(coefficients=[1, 0, 1], length=2)
+    assert find_roots(polynomial, random.Random(0), statistics=statistics) is not None
+    assert statistics.newton_iterations > 0
+
+
+def test_statistics_round_trip_through_json():
+    statistics = PipelineStatistics()
+    with stage(statistics, "solve"):
+        pass
+    with stage(None, "solve"):
+        pass
+    statistics.record_frame(0.02, 10)
+    loaded = PipelineStatistics.model_validate_json(statistics.model_dump_json())
+    assert loaded.stages["solve"].calls == 1
+    assert loaded.frames == 1 and loaded.circles_drawn == 10
+
+
+def test_generations_are_recorded_into_copies():
+    worker = GenerationWorker(4, 3, None, set(), PipelineStatistics())
+    snapshots = []
+    worker.statistics_recorded.connect(snapshots.append)
+    worker.run()
+    assert snapshots and all(copy is not worker.statistics for copy in snapshots)
+    assert snapshots[-1] == worker.statistics
+
+    statistics = PipelineStatistics()
+    statistics.record_frame(0.02, 10)
+    statistics.replace_generation(snapshots[-1])
+    assert statistics.circles == worker.statistics.circles > 0
+    assert statistics.frames == 1
@@ -0,0 +1,53 @@
+import numpy as np
+
+from algebraics.polynomial.models import Shard
+from algebraics.render.pyramid import export_pyramid
+from algebraics.ui.models import CircleColumns
+
+
+def circles_at(x: float, y: float, count: int) -> CircleColumns:
+    rng = np.random.default_rng(count)
+    return CircleColumns(
+        x_center=(x + rng.uniform(-0.05, 0.05, count)).astype(np.float32),
+        y_center=(y + rng.uniform(-0.05, 0.05, count)).astype(np.float32),
+        radius=np.full(count, 0.001, dtype=np.float32),
+        degree=np.full(count, 1, dtype=np.uint8),
+    )
+
+
+def export(directory, batches: dict[Shard, CircleColumns]):
+    shards = list(batches)
+    labels = np.repeat(
+        np.arange(len(shards)), [len(batch) for batch in batches.values()]
+    )
+    return export_pyramid(
+        CircleColumns.concatenate(list(batches.values())),
+        labels,
+        shards,
+        np.ones((256, 3)),
+        directory,
+        levels=2,
+        half_width=1.0,
+        tile_size=32,
+        workers=1,
+    )
+
+
+def test_export_only_rewrites_changed_tiles(tmp_path):
+    first = {Shard(length=1, degree=2): circles_at(-0.75, 0.75, 200)}
+    second = {Shard(length=2, degree=2): circles_at(0.75, -0.75, 100)}
+
+    summary = export(tmp_path, first)
+    assert (summary.written, summary.kept) == (3, 0)
+    assert (tmp_path / "2" / "0" / "0.png").exists()
+
+    assert export(tmp_path, first).written == 0
+
+    # The new shard shares the tile of level 0 but none of the deeper ones
+    summary = export(tmp_path, first | second)
+    assert (summary.written, summary.kept, summary.removed) == (3, 2, 0)
+
+    summary = export(tmp_path, second)
+    assert (summary.written, summary.kept, summary.removed) == (1, 2, 2)
+    assert not (tmp_path / "2" / "0" / "0.png").exists()
+    assert (tmp_path / "2" / "3" / "3.png").exists()
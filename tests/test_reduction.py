@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from algebraics.polynomial.batch import solve_rows
+from algebraics.polynomial.enumeration import coefficient_block
+from algebraics.polynomial.reduction import (
+    count_irredundant,
+    is_redundant,
+    square_free_decomposition,
+)
+
+
+def test_square_free_decomposition():
+    # (x - 1)^2 (x + 2) = x^3 - 3x + 2
+    assert square_free_decomposition([2, -3, 0, 1]) == [([2, 1], 1), ([-1, 1], 2)]
+    assert square_free_decomposition([1, 0, 1]) == [([1, 0, 1], 1)]
+
+
+@pytest.mark.parametrize("length, degree, constant", [(6, 3, None), (8, 4, 2)])
+def test_count_irredundant(length, degree, constant):
+    coefficients = coefficient_block(length, degree, constant)
+    expected = (~is_redundant(coefficients)).sum()
+    assert count_irredundant(length, degree, constant) == expected
+
+
+def test_repeated_roots_are_accurate():
+    # x^2 (x - 1)^3 (x + 1)
+    coefficients = np.array([[0, 0, -1, 2, 0, -2, 1]], dtype=np.int8)
+    roots, solved = solve_rows(coefficients, 6)
+    assert solved.all()
+    assert np.sort_complex(roots[0]) == pytest.approx([-1, 0, 0, 1, 1, 1], abs=1e-9)
+
+    # (x^2 + 1)^2
+    roots, solved = solve_rows(np.array([[1, 0, 2, 0, 1]], dtype=np.int8), 4)
+    assert solved.all()
+    assert np.sort_complex(roots[0]) == pytest.approx([-1j, -1j, 1j, 1j], abs=1e-9)
@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+
+from algebraics.config import settings
+from algebraics.polynomial.cache import Dataset, NpyWriter, open_root_cache
+from algebraics.polynomial.generation import generate_roots, stream_roots
+from algebraics.polynomial.models import Shard
+from algebraics.polynomial.sharding import (
+    create_plan,
+    job_status,
+    load_plan,
+    make_plan,
+    merge,
+    roots_path,
+    select_jobs,
+    solve_job,
+    solve_jobs,
+    verify,
+    verify_job,
+)
+
+
+def test_plans_are_stable(tmp_path):
+    plan = make_plan(6, 4, 40)
+    assert [job.id for job in plan.jobs] == list(range(len(plan.jobs)))
+    assert any(job.chunk.start > 0 for job in plan.jobs)
+    assert create_plan(tmp_path, plan) == make_plan(6, 4, 40)
+    assert create_plan(tmp_path, make_plan(6, 4, 40)) == load_plan(tmp_path)
+    with pytest.raises(ValueError):
+        create_plan(tmp_path, make_plan(6, 4, 50))
+
+
+def test_select_jobs():
+    plan = make_plan(6, 4, 40)
+    assert [job.id for job in select_jobs(plan, "1-3,7")] == [1, 2, 3, 7]
+    parts = [select_jobs(plan, part=f"{index}/3") for index in range(3)]
+    assert sorted(job.id for part in parts for job in part) == list(
+        range(len(plan.jobs))
+    )
+
+
+def test_parts_merge_into_the_roots_of_one_machine(tmp_path, monkeypatch):
+    directory = tmp_path / "jobs"
+    create_plan(directory, make_plan(6, 4, 40))
+    plan = load_plan(directory)
+    # Two machines sharing the directory, one interrupted after a few jobs
+    first = solve_jobs(directory, select_jobs(plan, part="0/2"), workers=1)
+    for _ in range(3):
+        next(first)
+    first.close()
+    list(solve_jobs(directory, select_jobs(plan, part="1/2"), workers=2))
+    assert 0 < job_status(directory)[0] < len(plan.jobs)
+    with pytest.raises(ValueError):
+        merge(directory, tmp_path / "dataset")
+
+    list(solve_jobs(directory, select_jobs(plan, part="0/2"), workers=1))
+    assert job_status(directory) == (len(plan.jobs), len(plan.jobs))
+    assert verify(directory) == {}
+    merge(directory, tmp_path / "dataset")
+
+    # Jobs are the chunks stream_roots solves with as many rows
+    streamed = {}
+    for shard, roots in stream_roots(6, 4, 40, workers=1):
+        streamed.setdefault(shard, []).append(roots)
+    dataset = Dataset(tmp_path / "dataset")
+    for shard, parts in streamed.items():
+        assert shard in dataset
+        assert np.array_equal(dataset.get(shard), np.concatenate(parts))
+    assert dataset.get(Shard(length=7, degree=2, constant=1)) is None
+
+    monkeypatch.setattr(settings.DATASET, "DIRECTORY", str(tmp_path / "dataset"))
+    monkeypatch.setattr(settings.CACHE, "ENABLED", False)
+    cache = open_root_cache()
+    assert isinstance(cache, Dataset)
+    for shard, roots in generate_roots(6, 4, workers=1, cache=cache):
+        assert isinstance(roots, np.memmap)
+
+
+def test_verify_finds_damaged_jobs(tmp_path):
+    create_plan(tmp_path, make_plan(5, 3, 30))
+    list(solve_jobs(tmp_path, load_plan(tmp_path).jobs, workers=1))
+    assert verify(tmp_path) == {}
+
+    damaged, missing = [
+        job.id for job in load_plan(tmp_path).jobs if job.chunk.shard.length == 5
+    ][:2]
+    roots = np.load(roots_path(tmp_path, damaged))
+    roots[0, 0] = np.nan
+    np.save(roots_path(tmp_path, damaged), roots)
+    roots_path(tmp_path, missing).with_suffix(".json").unlink()
+    assert set(verify(tmp_path)) == {damaged, missing}
+
+    # Jobs without results are solved again
+    list(solve_jobs(tmp_path, load_plan(tmp_path).jobs, workers=1))
+    assert set(verify(tmp_path)) == {damaged}
+
+
+def test_jobs_solved_twice_at_once_stay_whole(tmp_path):
+    create_plan(tmp_path, make_plan(5, 3, 30))
+    job = load_plan(tmp_path).jobs[-1]
+    # Another machine, whose process may well have the same id, is solving the job
+    degree = job.chunk.shard.degree
+    other = NpyWriter(roots_path(tmp_path, job.id), np.complex128, degree)
+    other.write(np.zeros((1, degree)))
+    solve_job(tmp_path, job)
+    other.discard()
+    assert verify_job(tmp_path, load_plan(tmp_path), job) is None
+    assert not [
+        path for path in tmp_path.rglob("*") if path.suffix in (".tmp", ".rows")
+    ]
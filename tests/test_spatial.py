@@ -0,0 +1,36 @@
+import numpy as np
+
+from algebraics.ui.models import CircleColumns
+from algebraics.ui.spatial import build_grid_index, visible_mask
+
+
+def random_circles(count: int) -> CircleColumns:
+    rng = np.random.default_rng(0)
+    return CircleColumns(
+        x_center=rng.uniform(-2, 2, count).astype(np.float32),
+        y_center=rng.uniform(-1, 3, count).astype(np.float32),
+        radius=np.full(count, 0.01, dtype=np.float32),
+        degree=rng.integers(1, 5, count).astype(np.uint8),
+    )
+
+
+def test_ranges_cover_visible_circles():
+    circles, index = build_grid_index(random_circles(5000), cells=8)
+    region = (-0.3, 0.2, 0.9, 0.7)
+    selected = np.zeros(len(circles), dtype=bool)
+    for start, stop in index.ranges(region, 0.1):
+        selected[start:stop] = True
+
+    assert not (visible_mask(circles, region, 10.0, 0.0) & ~selected).any()
+    assert selected.sum() < len(circles) / 4
+
+
+def test_region_outside_grid_is_empty():
+    _, index = build_grid_index(random_circles(100), cells=4)
+    assert index.ranges((5, 5, 6, 6), 0.1) == []
+
+
+def test_visible_mask_skips_small_circles():
+    circles = random_circles(100)
+    assert not visible_mask(circles, (-2, -1, 2, 3), 1.0, 0.02).any()
+    assert visible_mask(circles, (-2, -1, 2, 3), 10.0, 0.02).all()
@@ -0,0 +1,73 @@
+import json
+import os
+import subprocess
+import sys
+
+# Only needed once the application generates circles or draws their density
+DEFERRED = [
+    "algebraics.polynomial.generation",
+    "algebraics.render.density",
+    "algebraics.ui.worker",
+    "imageio",
+]
+
+# Only needed once the widget generates circles or describes their roots
+SOLVER = [
+    "algebraics.polynomial.batch",
+    "algebraics.polynomial.enumeration",
+    "algebraics.polynomial.ranking",
+]
+
+
+def test_application_defers_heavy_imports():
+    script = (
+        "import json, sys\n"
+        "import algebraics.ui.main_widget, algebraics.ui.startup\n"
+        f"print(json.dumps([name for name in {DEFERRED!r} if name in sys.modules]))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script], check=True, capture_output=True, text=True
+    ).stdout
+    assert json.loads(output) == []
+
+
+def test_gl_widget_defers_solver_imports():
+    script = (
+        "import json, sys\n"
+        "import algebraics.ui.gl_widget\n"
+        f"print(json.dumps([name for name in {SOLVER!r} if name in sys.modules]))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script], check=True, capture_output=True, text=True
+    ).stdout
+    assert json.loads(output) == []
+
+
+def test_first_generation_starts_without_frames():
+    script = (
+        "from PyQt6.QtCore import QTimer\n"
+        "from PyQt6.QtWidgets import QApplication\n"
+        "application = QApplication([])\n"
+        "from algebraics.ui.gl_widget import GLWidget\n"
+        "widget = GLWidget()\n"
+        "widget.generation_started.connect(application.quit)\n"
+        "widget.show()\n"
+        "QTimer.singleShot(10000, application.quit)\n"
+        "application.exec()\n"
+        "print(len(widget.shards))\n"
+        "widget.wait_for_workers()\n"
+    )
+    environment = {
+        **os.environ,
+        "QT_QPA_PLATFORM": "offscreen",
+        "DYNACONF_RENDERING__FIRST_GENERATION_MS": "10",
+        "DYNACONF_CACHE__ENABLED": "false",
+    }
+    output = subprocess.run(
+        [sys.executable, "-c", script],
+        check=True,
+        capture_output=True,
+        text=True,
+        env=environment,
+    ).stdout
+    assert int(output.split()[-1]) > 0
@@ -0,0 +1,68 @@
+from collections import defaultdict
+
+import imageio.v3 as iio
+import numpy as np
+
+from algebraics.polynomial.cache import RootCache
+from algebraics.polynomial.generation import generate_roots, stream_roots
+from algebraics.render.headless import (
+    View,
+    default_palette,
+    generate_circles,
+    render_image,
+)
+from algebraics.render.stream import (
+    CircleFileSink,
+    StoreSink,
+    load_circle_file,
+    render_streamed_image,
+    run_pipeline,
+)
+from algebraics.ui.store import CircleStore
+
+
+def distance(left: np.ndarray, right: np.ndarray) -> float:
+    differences = np.abs(left[:, None] - right[None, :])
+    return max(differences.min(axis=0).max(), differences.min(axis=1).max())
+
+
+def test_chunks_add_up_to_whole_shards(tmp_path):
+    whole = dict(generate_roots(6, 4, workers=1))
+    cache = RootCache(tmp_path, 2**30)
+    for _ in range(2):
+        chunks = defaultdict(list)
+        for shard, roots in stream_roots(6, 4, 100, workers=1, cache=cache):
+            assert len(roots) <= 100
+            chunks[shard].append(np.asarray(roots))
+
+        assert list(chunks) == list(whole)
+        for shard, roots in whole.items():
+            streamed = np.concatenate(chunks[shard])
+            assert streamed.shape == roots.shape
+            assert max(map(distance, streamed, roots), default=0) < 1e-6
+            assert np.array_equal(cache.get(shard), streamed)
+
+
+def test_sinks_receive_every_circle(tmp_path):
+    expected = len(generate_circles(5, 4))
+    assert run_pipeline(5, 4, CircleFileSink(tmp_path), 50, workers=1) == expected
+    assert len(load_circle_file(tmp_path)) == expected
+
+    store = CircleStore()
+    run_pipeline(5, 4, StoreSink(store), 50, workers=1)
+    assert len(store) == expected
+    assert len(store.shards()) == len(dict(generate_roots(5, 4, workers=1)))
+
+
+def test_streamed_image_matches_render_image(tmp_path):
+    view = View.centered(0j, 2.0, 96, 64)
+    palette = default_palette(4)
+    render_image(
+        generate_circles(5, 4), palette, view, tmp_path / "full.png", tile_size=32
+    )
+    render_streamed_image(
+        5, 4, palette, view, tmp_path / "streamed.png", tile_size=32, chunk_rows=50
+    )
+    assert np.array_equal(
+        iio.imread(tmp_path / "full.png"), iio.imread(tmp_path / "streamed.png")
+    )
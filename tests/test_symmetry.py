@@ -0,0 +1,34 @@
+import random
+
+import numpy as np
+import pytest
+
+from algebraics.polynomial.batch import solve_rows
+from algebraics.polynomial.enumeration import coefficient_block
+from algebraics.polynomial.symmetry import canonical_rows, solve_symmetric_block
+
+
+def distance(left: np.ndarray, right: np.ndarray) -> float:
+    differences = np.abs(left[:, None] - right[None, :])
+    return max(differences.min(axis=0).max(), differences.min(axis=1).max())
+
+
+@pytest.mark.parametrize("constant", [None, 1, 2])
+def test_orbits_are_closed(constant):
+    coefficients = coefficient_block(6, 4, constant)
+    canonical, _ = canonical_rows(coefficients, constant)
+    assert (canonical <= np.arange(len(canonical))).all()
+    assert (canonical[canonical] == canonical).all()
+    # Mirroring and negating alone give orbits of 2 or 4 rows
+    assert len(np.unique(canonical)) < len(canonical) / 3
+
+
+@pytest.mark.parametrize("length, degree, constant", [(7, 5, None), (8, 5, 3)])
+def test_matches_brute_force(length, degree, constant):
+    coefficients = coefficient_block(length, degree, constant)
+    coefficients = coefficients[coefficients[:, 0] != 0]
+    roots, solved = solve_rows(coefficients, length, random.Random(0))
+    symmetric = solve_symmetric_block(coefficients, length, constant, random.Random(0))
+
+    assert solved.all() and len(symmetric) == len(roots)
+    assert max(map(distance, roots, symmetric)) < 1e-6